@@ -0,0 +1,225 @@
+"""
+Local stand-ins for the services the SDK talks to, served from one process:
+
+- a streamable-HTTP MCP server with a `get_quote` tool of configurable latency and payload size
+  and its bulk form `get_quotes`,
+- an OAuth authorization server (metadata, dynamic registration with a software statement,
+  an /authorize endpoint that redirects straight back to the callback, and /token),
+- a scripted Anthropic Messages endpoint that streams server-sent events: the first request
+  of a turn asks for `get_quote` (`--tools-per-turn` times, each block taking
+  `--llm-block-delay` to generate), the request carrying the results gets a text answer.
+  Requests for an `--overloaded-model` get a 529 overloaded error.
+
+Run it directly, e.g. `python benchmarks/fake_services.py --port 8765 --tool-latency 0.05`.
+"""
+
+import argparse
+import asyncio
+import json
+import secrets
+import time
+from urllib.parse import urlencode
+
+import uvicorn
+from mcp.server.auth.provider import AccessToken
+from mcp.server.auth.settings import AuthSettings
+from mcp.server.fastmcp import FastMCP
+from starlette.requests import Request
+from starlette.responses import JSONResponse, RedirectResponse, Response, StreamingResponse
+
+
+class FakeTokenVerifier:
+    def __init__(self) -> None:
+        self.tokens: set[str] = set()
+
+    async def verify_token(self, token: str) -> AccessToken | None:
+        if token not in self.tokens:
+            return None
+        return AccessToken(token=token, client_id="bench", scopes=[], expires_at=int(time.time()) + 3600)
+
+
+def create_server(args: argparse.Namespace) -> FastMCP:
+    base_url = f"http://127.0.0.1:{args.port}"
+    verifier = FakeTokenVerifier()
+    codes: set[str] = set()
+    registrations = {"count": 0}
+    tool_calls = {"count": 0}
+
+    server = FastMCP(
+        "viaNexus benchmark",
+        host="127.0.0.1",
+        port=args.port,
+        log_level="WARNING",
+        token_verifier=verifier,
+        auth=AuthSettings(issuer_url=base_url, resource_server_url=base_url, required_scopes=[]),
+    )
+
+    # Deterministic payload: one row per ~50 bytes of a daily price series
+    rows = max(1, args.payload_bytes // 50)
+    payload = {
+        "symbol": "AAPL",
+        "prices": [{"date": f"day-{i:05d}", "close": round(100 + i * 0.01, 2)} for i in range(rows)],
+    }
+
+    @server.tool()
+    async def get_quote(symbol: str) -> dict:
+        """Return a daily price series for a ticker symbol."""
+        tool_calls["count"] += 1
+        await asyncio.sleep(args.tool_latency)
+        return {**payload, "symbol": symbol}
+
+    @server.tool()
+    async def get_quotes(symbols: list[str]) -> dict:
+        """Return the daily price series of several ticker symbols, in request order."""
+        tool_calls["count"] += 1
+        await asyncio.sleep(args.tool_latency)
+        return {"quotes": [{**payload, "symbol": symbol} for symbol in symbols]}
+
+    # ---- OAuth authorization server ----
+
+    @server.custom_route("/.well-known/oauth-authorization-server", methods=["GET"])
+    async def oauth_metadata(request: Request) -> Response:
+        return JSONResponse({
+            "issuer": base_url,
+            "authorization_endpoint": f"{base_url}/authorize",
+            "token_endpoint": f"{base_url}/token",
+            "registration_endpoint": f"{base_url}/register",
+            "response_types_supported": ["code"],
+            "grant_types_supported": ["authorization_code", "refresh_token"],
+            "code_challenge_methods_supported": ["S256"],
+            "token_endpoint_auth_methods_supported": ["client_secret_post"],
+        })
+
+    @server.custom_route("/register", methods=["POST"])
+    async def register(request: Request) -> Response:
+        body = await request.json()
+        if not body.get("software_statement"):
+            return JSONResponse({"error": "invalid_software_statement"}, status_code=400)
+        registrations["count"] += 1
+        body.pop("software_statement")
+        return JSONResponse(
+            {**body, "client_id": f"client-{secrets.token_hex(4)}", "client_secret": secrets.token_hex(16)},
+            status_code=201,
+        )
+
+    @server.custom_route("/authorize", methods=["GET"])
+    async def authorize(request: Request) -> Response:
+        # Consent is implicit: send the user agent straight back with a code
+        code = secrets.token_urlsafe(16)
+        codes.add(code)
+        query = urlencode({"code": code, "state": request.query_params["state"]})
+        return RedirectResponse(f"{request.query_params['redirect_uri']}?{query}", status_code=302)
+
+    @server.custom_route("/token", methods=["POST"])
+    async def token(request: Request) -> Response:
+        form = await request.form()
+        if form.get("grant_type") == "authorization_code" and form.get("code") not in codes:
+            return JSONResponse({"error": "invalid_grant"}, status_code=400)
+        codes.discard(form.get("code"))
+        access_token = secrets.token_urlsafe(24)
+        verifier.tokens.add(access_token)
+        return JSONResponse({
+            "access_token": access_token,
+            "token_type": "Bearer",
+            "expires_in": 3600,
+            "refresh_token": secrets.token_urlsafe(24),
+        })
+
+    @server.custom_route("/stats", methods=["GET"])
+    async def stats(request: Request) -> Response:
+        return JSONResponse({
+            "registrations": registrations["count"],
+            "tokens": len(verifier.tokens),
+            "tool_calls": tool_calls["count"],
+        })
+
+    # ---- Anthropic Messages API ----
+
+    @server.custom_route("/v1/messages", methods=["POST"])
+    async def messages(request: Request) -> Response:
+        body = await request.json()
+        if body["model"] in args.overloaded_model:
+            return JSONResponse(
+                {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}}, status_code=529
+            )
+        last = body["messages"][-1]
+        content = last["content"] if isinstance(last["content"], list) else []
+        answered = any(block.get("type") == "tool_result" for block in content)
+        # Federated clients namespace the tool, e.g. "vianexus__get_quote"
+        tool = next((t["name"] for t in body.get("tools") or [] if t["name"].endswith("get_quote")), "get_quote")
+        return StreamingResponse(
+            _stream_message(body["model"], answered, tool, args),
+            media_type="text/event-stream",
+        )
+
+    return server
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_message(model: str, answered: bool, tool: str, args: argparse.Namespace):
+    message_id = f"msg_{secrets.token_hex(8)}"
+    yield _sse("message_start", {
+        "type": "message_start",
+        "message": {
+            "id": message_id, "type": "message", "role": "assistant", "model": model, "content": [],
+            "stop_reason": None, "stop_sequence": None,
+            "usage": {"input_tokens": 1000, "output_tokens": 1, "cache_read_input_tokens": 800},
+        },
+    })
+    await asyncio.sleep(args.llm_ttft)
+
+    if answered:
+        yield _sse("content_block_start", {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}})
+        for i in range(args.llm_tokens):
+            yield _sse("content_block_delta", {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": f"tok{i} "}})
+            if args.llm_token_delay:
+                await asyncio.sleep(args.llm_token_delay)
+        yield _sse("content_block_stop", {"type": "content_block_stop", "index": 0})
+        stop_reason = "end_turn"
+    else:
+        for index in range(args.tools_per_turn):
+            if index and args.llm_block_delay:
+                await asyncio.sleep(args.llm_block_delay)
+            yield _sse("content_block_start", {
+                "type": "content_block_start", "index": index,
+                "content_block": {"type": "tool_use", "id": f"toolu_{secrets.token_hex(8)}", "name": tool, "input": {}},
+            })
+            yield _sse("content_block_delta", {
+                "type": "content_block_delta", "index": index,
+                "delta": {"type": "input_json_delta", "partial_json": json.dumps({"symbol": f"SYM{index}"})},
+            })
+            yield _sse("content_block_stop", {"type": "content_block_stop", "index": index})
+        stop_reason = "tool_use"
+    yield _sse("message_delta", {
+        "type": "message_delta",
+        "delta": {"stop_reason": stop_reason, "stop_sequence": None},
+        "usage": {"output_tokens": args.llm_tokens if answered else 20},
+    })
+    yield _sse("message_stop", {"type": "message_stop"})
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--tool-latency", type=float, default=0.05, help="seconds per get_quote call")
+    parser.add_argument("--payload-bytes", type=int, default=20_000, help="approximate get_quote result size")
+    parser.add_argument("--llm-ttft", type=float, default=0.2, help="seconds before the first streamed event")
+    parser.add_argument("--llm-tokens", type=int, default=50, help="text deltas in a final answer")
+    parser.add_argument("--llm-token-delay", type=float, default=0.005, help="seconds between text deltas")
+    parser.add_argument("--tools-per-turn", type=int, default=1, help="tool_use blocks in a tool-calling response")
+    parser.add_argument("--llm-block-delay", type=float, default=0.1, help="seconds to generate each further tool_use block")
+    parser.add_argument("--overloaded-model", action="append", default=[], help="model answered with 529 overloaded")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    app = create_server(args).streamable_http_app()
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Import-time benchmark: how long a fresh interpreter takes to import each SDK entry point,
+and which heavy third-party packages that drags in.
+
+Every measurement runs in its own subprocess, so nothing is cached between them. Reports
+the median of `--repeat` runs and, with `--top`, the slowest third-party packages of one
+run as seen by `python -X importtime`:
+
+    python benchmarks/import_time.py --repeat 5 --top 10
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+ENTRY_POINTS = [
+    "vianexus_agent_sdk",
+    "vianexus_agent_sdk.types.events",
+    "vianexus_agent_sdk.batch.runner",
+    "vianexus_agent_sdk.mcp_client.enhanced_mcp_client",
+    "vianexus_agent_sdk.clients.anthropic_client",
+    "vianexus_agent_sdk.gemini.runners.runner",
+]
+HEAVY = ["mcp", "anthropic", "google.adk", "google.genai", "pydantic", "httpx", "cryptography", "opentelemetry"]
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_packages(module: str, top: int) -> list[tuple[int, str]]:
+    """(cumulative microseconds, package) of the slowest third-party packages `module` imports."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        # Top-level packages only, wherever they were first imported
+        if cumulative.strip().isdigit() and "." not in name and name not in sys.stdlib_module_names:
+            if name != "vianexus_agent_sdk" and name != "site":
+                rows.append((int(cumulative), name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def benchmark(args: argparse.Namespace) -> dict:
+    report = {}
+    for module in args.modules or ENTRY_POINTS:
+        runs = [measure(module) for _ in range(args.repeat)]
+        errors = [r["error"] for r in runs if "error" in r]
+        if errors:
+            report[module] = {"error": errors[0]}
+            continue
+        report[module] = {
+            "median_seconds": statistics.median(r["seconds"] for r in runs),
+            "min_seconds": min(r["seconds"] for r in runs),
+            "loaded": runs[0]["loaded"],
+        }
+        if args.top:
+            report[module]["slowest"] = slowest_packages(module, args.top)
+    return report
+
+
+def print_report(report: dict) -> None:
+    for module, stats in report.items():
+        if "error" in stats:
+            print(f"{module:<52} unavailable: {stats['error']}")
+            continue
+        print(
+            f"{module:<52} median={stats['median_seconds'] * 1000:7.1f}ms  min={stats['min_seconds'] * 1000:7.1f}ms"
+            f"  loads: {', '.join(stats['loaded']) or '-'}"
+        )
+        for microseconds, name in stats.get("slowest", []):
+            print(f"    {microseconds / 1000:8.1f}ms  {name}")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", help="modules to import (default: the SDK entry points)")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=0, help="also list the N slowest third-party packages")
+    parser.add_argument("--json", help="also write the report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    report = benchmark(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
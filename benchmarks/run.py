@@ -0,0 +1,214 @@
+"""
+End-to-end benchmark of the Anthropic agent loop against local fake services.
+
+Starts `fake_services.py` in a subprocess, connects N AnthropicClient sessions (each doing the
+full OAuth flow, including dynamic registration with a software statement), then runs T turns
+per session concurrently. Every turn is `--tools-per-turn` tool calls plus two streamed model requests.
+
+Reports connect latency, p50/p99 turn latency, throughput and client memory per session:
+
+    python benchmarks/run.py --sessions 16 --turns 5 --payload-bytes 50000
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import AsyncExitStack
+from typing import Optional
+
+import httpx
+from anthropic import AsyncAnthropic
+
+from vianexus_agent_sdk.clients.anthropic_client import AnthropicClient
+from vianexus_agent_sdk.clients.response_cache import ResponseCache
+from vianexus_agent_sdk.telemetry.tracing import InMemoryTelemetry, _percentile, set_telemetry
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def start_services(port: int, args: argparse.Namespace) -> subprocess.Popen:
+    process = subprocess.Popen([
+        sys.executable, os.path.join(HERE, "fake_services.py"),
+        "--port", str(port),
+        "--tool-latency", str(args.tool_latency),
+        "--payload-bytes", str(args.payload_bytes),
+        "--llm-ttft", str(args.llm_ttft),
+        "--llm-tokens", str(args.llm_tokens),
+        "--llm-token-delay", str(args.llm_token_delay),
+        "--tools-per-turn", str(args.tools_per_turn),
+        "--llm-block-delay", str(args.llm_block_delay),
+    ])
+    async with httpx.AsyncClient() as client:
+        for _ in range(100):
+            try:
+                await client.get(f"http://127.0.0.1:{port}/stats")
+                return process
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Fake services did not start")
+
+
+def make_client(port: int, args: argparse.Namespace, response_cache: Optional[ResponseCache] = None) -> AnthropicClient:
+    client = AnthropicClient({
+        "server": "http://127.0.0.1",
+        "port": port,
+        "software_statement": "benchmark-software-statement",
+        "llm_api_key": "benchmark",
+        "llm_model": "benchmark-model",
+        "max_tokens": 1000,
+        "early_tool_dispatch": args.early_tool_dispatch,
+        "tool_coalescing": {
+            "batch_tools": {"get_quote": {"tool": "get_quotes", "argument": "symbol", "results": "quotes"}}
+            if args.batch_tools else {},
+        },
+        # get_quote results stay fresh for a minute, so answers built from them can be cached
+        "tool_result_cache": {"ttls": {"get_quote": 60}} if response_cache else None,
+        "response_cache": response_cache,
+    })
+    client.anthropic = AsyncAnthropic(api_key="benchmark", base_url=f"http://127.0.0.1:{port}", max_retries=0)
+    return client
+
+
+def _stats(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {}
+    return {
+        "p50": _percentile(values, 0.50),
+        "p99": _percentile(values, 0.99),
+        "mean": sum(values) / len(values),
+        "max": max(values),
+    }
+
+
+async def run_session(client: AnthropicClient, turns: int, latencies: list[float]) -> None:
+    history = client.new_history()
+    for turn in range(turns):
+        started = time.perf_counter()
+        await client.respond(f"Summarize AAPL, turn {turn}", history)
+        latencies.append(time.perf_counter() - started)
+
+
+async def benchmark(args: argparse.Namespace) -> dict:
+    port = args.port or _free_port()
+    services = await start_services(port, args)
+    telemetry = set_telemetry(InMemoryTelemetry()) if args.telemetry else None
+    try:
+        async with AsyncExitStack() as stack:
+            # Memory: everything the clients allocate to connect and answer one turn
+            gc.collect()
+            tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+
+            clients, connect_latencies = [], []
+            # One cache for all sessions, as in a server answering many users
+            response_cache = ResponseCache() if args.response_cache else None
+            for _ in range(args.sessions):
+                client = make_client(port, args, response_cache)
+                started = time.perf_counter()
+                # Sequential: every OAuth flow binds its own callback port
+                await stack.enter_async_context(client.connect())
+                connect_latencies.append(time.perf_counter() - started)
+                clients.append(client)
+
+            warmup: list[float] = []
+            await asyncio.gather(*(run_session(c, 1, warmup) for c in clients))
+            gc.collect()
+            memory_per_session = (tracemalloc.get_traced_memory()[0] - baseline) / args.sessions
+            tracemalloc.stop()
+
+            if telemetry:
+                telemetry.clear()
+            latencies: list[float] = []
+            started = time.perf_counter()
+            await asyncio.gather(*(run_session(c, args.turns, latencies) for c in clients))
+            elapsed = time.perf_counter() - started
+
+        async with httpx.AsyncClient() as http:
+            server_stats = (await http.get(f"http://127.0.0.1:{port}/stats")).json()
+    finally:
+        services.terminate()
+        services.wait()
+        set_telemetry(None)
+
+    report = {
+        "sessions": args.sessions,
+        "turns_per_session": args.turns,
+        "connect_seconds": _stats(connect_latencies),
+        "turn_seconds": _stats(latencies),
+        "warmup_turn_seconds": _stats(warmup),
+        "throughput_turns_per_second": len(latencies) / elapsed,
+        "memory_per_session_bytes": int(memory_per_session),
+        "oauth_registrations": server_stats["registrations"],
+        "mcp_tool_requests": server_stats["tool_calls"],
+    }
+    if response_cache:
+        report["response_cache"] = response_cache.stats()
+    if telemetry:
+        report["telemetry"] = telemetry.summary()
+    return report
+
+
+def print_report(report: dict) -> None:
+    def seconds(stats: dict) -> str:
+        return "  ".join(f"{k}={v * 1000:.1f}ms" for k, v in stats.items())
+
+    print(f"sessions={report['sessions']} turns/session={report['turns_per_session']}")
+    print(f"connect (OAuth + MCP init): {seconds(report['connect_seconds'])}")
+    print(f"turn latency:               {seconds(report['turn_seconds'])}")
+    print(f"throughput:                 {report['throughput_turns_per_second']:.1f} turns/s")
+    print(f"memory per session:         {report['memory_per_session_bytes'] / 1024:.0f} KiB")
+    print(f"OAuth registrations:        {report['oauth_registrations']}")
+    print(f"MCP tool requests:          {report['mcp_tool_requests']}")
+    if "response_cache" in report:
+        cache = report["response_cache"]
+        print(f"response cache:             hits={cache['hits']} misses={cache['misses']} bypassed={cache['bypassed']}")
+    for metric, stats in sorted(report.get("telemetry", {}).items()):
+        if metric.endswith("duration") or metric.endswith("first_token"):
+            print(f"  {metric:<34} n={stats['count']:<5} p50={stats['p50'] * 1000:.1f}ms p99={stats['p99'] * 1000:.1f}ms")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent client sessions")
+    parser.add_argument("--turns", type=int, default=5, help="measured turns per session")
+    parser.add_argument("--port", type=int, default=0, help="port for the fake services (default: any free port)")
+    parser.add_argument("--tool-latency", type=float, default=0.05)
+    parser.add_argument("--payload-bytes", type=int, default=20_000)
+    parser.add_argument("--llm-ttft", type=float, default=0.2)
+    parser.add_argument("--llm-tokens", type=int, default=50)
+    parser.add_argument("--llm-token-delay", type=float, default=0.005)
+    parser.add_argument("--tools-per-turn", type=int, default=1, help="tool calls the model asks for in a turn")
+    parser.add_argument("--llm-block-delay", type=float, default=0.1, help="generation time of each further tool_use block")
+    parser.add_argument("--early-tool-dispatch", action="store_true", help="start tool calls as their blocks finish streaming")
+    parser.add_argument("--batch-tools", action="store_true", help="coalesce get_quote calls into get_quotes")
+    parser.add_argument("--response-cache", action="store_true", help="share a response cache between the sessions")
+    parser.add_argument("--no-telemetry", dest="telemetry", action="store_false", help="skip the per-span breakdown")
+    parser.add_argument("--json", help="also write the report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    report = asyncio.run(benchmark(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+viaNexus agent SDK.
+
+The entry points below are importable from the package root, e.g.
+`from vianexus_agent_sdk import AnthropicClient`, and are loaded on first access, so only
+the LLM backend that is actually used gets imported.
+"""
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+# Public name -> module that defines it
+_LAZY = {
+    "AnthropicClient": "vianexus_agent_sdk.clients.anthropic_client",
+    "EnhancedMCPClient": "vianexus_agent_sdk.mcp_client.enhanced_mcp_client",
+    "MCPConnection": "vianexus_agent_sdk.mcp_client.enhanced_mcp_client",
+    "GeminiLLMAgent": "vianexus_agent_sdk.gemini.agents.llm_agent",
+    "GeminiRunner": "vianexus_agent_sdk.gemini.runners.runner",
+    "GeminiRunnerPool": "vianexus_agent_sdk.gemini.runners.pool",
+    "GeminiAgentToolset": "vianexus_agent_sdk.gemini.tools.agent_toolset",
+    "BatchRunner": "vianexus_agent_sdk.batch.runner",
+    "MessageBatchRunner": "vianexus_agent_sdk.batch.runner",
+    "RateGovernor": "vianexus_agent_sdk.ratelimit.governor",
+    "ModelRouter": "vianexus_agent_sdk.routing.router",
+}
+
+__all__ = list(_LAZY)
+
+if TYPE_CHECKING:
+    from vianexus_agent_sdk.batch.runner import BatchRunner, MessageBatchRunner
+    from vianexus_agent_sdk.clients.anthropic_client import AnthropicClient
+    from vianexus_agent_sdk.gemini.agents.llm_agent import GeminiLLMAgent
+    from vianexus_agent_sdk.gemini.runners.pool import GeminiRunnerPool
+    from vianexus_agent_sdk.gemini.runners.runner import GeminiRunner
+    from vianexus_agent_sdk.gemini.tools.agent_toolset import GeminiAgentToolset
+    from vianexus_agent_sdk.mcp_client.enhanced_mcp_client import EnhancedMCPClient, MCPConnection
+    from vianexus_agent_sdk.ratelimit.governor import RateGovernor
+    from vianexus_agent_sdk.routing.router import ModelRouter
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, TextIO
+
+from vianexus_agent_sdk.ratelimit.governor import RateGovernor, get_default_governor, retry_after
+from vianexus_agent_sdk.types.events import AgentEvent, Final, ToolCallStart, Usage
+
+_USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
+
+
+@dataclass
+class BatchItem:
+    """One prompt of a batch. Extra fields of the input line are kept as `metadata`."""
+    id: str
+    prompt: str
+    metadata: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class BatchSummary:
+    total: int = 0
+    skipped: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    retries: int = 0
+    elapsed: float = 0.0
+
+
+def read_items(path: str) -> list[BatchItem]:
+    """
+    Read prompts from a JSONL file. Each line is an object with a `prompt` (or `query`)
+    and an optional `id` (the line number by default), or a bare JSON string.
+    """
+    items: list[BatchItem] = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"prompt": record}
+            prompt = record.pop("prompt", None) or record.pop("query", None)
+            if not prompt:
+                raise ValueError(f"{path}:{line_number}: missing 'prompt'")
+            items.append(BatchItem(id=str(record.pop("id", line_number)), prompt=prompt, metadata=record))
+    return items
+
+
+def completed_ids(path: str) -> set[str]:
+    """Ids already answered successfully in an output file, so a rerun can skip them."""
+    done: set[str] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by a crash, the item is simply run again
+                continue
+            if record.get("status") == "ok":
+                done.add(str(record.get("id")))
+    return done
+
+
+def _add_usage(totals: dict[str, int], usage: Any) -> None:
+    for name in _USAGE_FIELDS:
+        totals[name] += getattr(usage, name, 0) or 0
+
+
+class BatchRunner:
+    """
+    Runs a JSONL file of prompts through an `AnthropicClient` or a `GeminiRunner` over
+    the agent's single MCP session, `concurrency` prompts at a time, each in a fresh
+    conversation. Results are appended to the output JSONL as they finish, which doubles
+    as the checkpoint: rerunning with `resume=True` skips items already answered.
+
+    Model requests and tool calls go through the agent's rate governor (`governor`
+    overrides it). Items that still fail on a retryable error are retried as a whole,
+    with backoff, and a throttle pauses every worker, not just the one that was throttled.
+    """
+
+    def __init__(
+        self,
+        agent: Any,
+        concurrency: int = 8,
+        max_retries: int = 5,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        governor: Optional[RateGovernor] = None,
+    ) -> None:
+        self.agent = agent
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.governor = governor or getattr(agent, "governor", None) or get_default_governor()
+        # Throttles pause the bucket of the agent's model, shared with its own requests
+        self.model = getattr(agent, "model", None) or getattr(getattr(agent, "agent", None), "model", None)
+
+    async def run(self, input_path: str, output_path: str, resume: bool = True) -> BatchSummary:
+        started = time.monotonic()
+        items = read_items(input_path)
+        done = completed_ids(output_path) if resume else set()
+        pending = [item for item in items if item.id not in done]
+        summary = BatchSummary(total=len(items), skipped=len(items) - len(pending))
+        logging.info("Batch: %s items, %s already done", summary.total, summary.skipped)
+
+        with self._open_output(output_path, resume) as out:
+            def write(record: dict[str, Any]) -> None:
+                out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                out.flush()
+
+            await self._process(pending, write, summary)
+
+        summary.elapsed = time.monotonic() - started
+        logging.info(
+            "Batch finished: %s ok, %s failed, %s retries in %.1fs",
+            summary.succeeded, summary.failed, summary.retries, summary.elapsed,
+        )
+        return summary
+
+    def _open_output(self, path: str, resume: bool) -> TextIO:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        if not resume or not os.path.exists(path):
+            return open(path, "w", encoding="utf-8")
+        out = open(path, "a+", encoding="utf-8")
+        # Terminate a line left incomplete by an interrupted run before appending
+        if out.tell() > 0:
+            out.seek(out.tell() - 1)
+            if out.read(1) != "\n":
+                out.write("\n")
+        return out
+
+    async def _process(self, items: list[BatchItem], write: Callable[[dict], None], summary: BatchSummary) -> None:
+        remaining = iter(items)
+
+        async def worker() -> None:
+            for item in remaining:
+                write(await self._run_item(item, summary))
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(items)))))
+
+    async def _run_item(self, item: BatchItem, summary: BatchSummary) -> dict[str, Any]:
+        started = time.monotonic()
+        try:
+            result = await self._with_retries(lambda: self._answer(item), summary)
+        except Exception as e:
+            logging.error("Batch item %s failed: %s", item.id, e)
+            summary.failed += 1
+            return self._record(item, started, status="error", error=str(e))
+        summary.succeeded += 1
+        return self._record(item, started, status="ok", **result)
+
+    def _record(self, item: BatchItem, started: float, **fields: Any) -> dict[str, Any]:
+        record = {"id": item.id, **fields, "elapsed": round(time.monotonic() - started, 3)}
+        if item.metadata:
+            record["metadata"] = item.metadata
+        return record
+
+    async def _with_retries(self, call: Callable[[], Awaitable[Any]], summary: BatchSummary) -> Any:
+        bucket = self.governor.bucket(model=self.model)
+        attempt = 0
+        while True:
+            await bucket.wait_for_resume()
+            try:
+                return await call()
+            except Exception as e:
+                wait = retry_after(e)
+                if wait is None or attempt >= self.max_retries:
+                    raise
+                delay = max(wait, self.governor.backoff(attempt, self.initial_backoff, self.max_backoff))
+                attempt += 1
+                summary.retries += 1
+                self.governor.throttled(e, wait, model=self.model)
+                logging.warning("Retrying in %.1fs after: %s", delay, e)
+                await asyncio.sleep(delay)
+
+    async def _answer(self, item: BatchItem) -> dict[str, Any]:
+        usage = dict.fromkeys(_USAGE_FIELDS, 0)
+        tool_calls: list[str] = []
+        output = ""
+        async for event in self._stream(item):
+            if isinstance(event, Usage):
+                _add_usage(usage, event)
+            elif isinstance(event, ToolCallStart):
+                tool_calls.append(event.name)
+            elif isinstance(event, Final):
+                output = event.text
+        return {"output": output, "usage": usage, "tool_calls": tool_calls}
+
+    async def _stream(self, item: BatchItem) -> AsyncIterator[AgentEvent]:
+        agent = self.agent
+        if hasattr(agent, "stream_query"):
+            async for event in agent.stream_query(item.prompt, agent.new_history()):
+                yield event
+            return
+
+        # GeminiRunner: a throwaway ADK session per item
+        session_id = f"batch-{uuid.uuid4().hex}"
+        await agent.session_service.create_session(
+            app_name=agent.app_name, user_id=agent.user_id, session_id=session_id
+        )
+        try:
+            async for event in agent.stream_async(item.prompt, streaming=False, session_id=session_id):
+                yield event
+        finally:
+            await agent.session_service.delete_session(
+                app_name=agent.app_name, user_id=agent.user_id, session_id=session_id
+            )
+
+
+@dataclass
+class _ItemState:
+    item: BatchItem
+    history: Any
+    started: float
+    text: list[str] = field(default_factory=list)
+    tool_calls: list[str] = field(default_factory=list)
+    usage: dict[str, int] = field(default_factory=lambda: dict.fromkeys(_USAGE_FIELDS, 0))
+    retries: int = 0
+
+
+class MessageBatchRunner(BatchRunner):
+    """
+    Batch runner for an `AnthropicClient` that sends the model requests through the
+    Message Batches API, at half the price of regular requests.
+
+    Items advance in rounds: every open conversation's next request goes into one batch
+    (split into `batch_size` chunks), and once the batch has ended the requested tool
+    calls run over the MCP session, `concurrency` conversations at a time, before the
+    next round. Only finished items are checkpointed, an interrupted run restarts the
+    unfinished ones from their prompt.
+    """
+
+    def __init__(
+        self,
+        agent: Any,
+        concurrency: int = 8,
+        max_retries: int = 5,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        batch_size: int = 10_000,
+        poll_interval: float = 30.0,
+        max_rounds: int = 10,
+        governor: Optional[RateGovernor] = None,
+    ) -> None:
+        super().__init__(agent, concurrency, max_retries, initial_backoff, max_backoff, governor)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_rounds = max_rounds
+
+    async def _process(self, items: list[BatchItem], write: Callable[[dict], None], summary: BatchSummary) -> None:
+        client = self.agent
+        await client.ensure_connected()
+        tools = await client.get_tools()
+        states: dict[str, _ItemState] = {}
+        for n, item in enumerate(items):
+            state = _ItemState(item=item, history=client.new_history(), started=time.monotonic())
+            state.history.append("user", item.prompt)
+            # custom_id must match ^[a-zA-Z0-9_-]{1,64}$, item ids may not
+            states[f"item-{n}"] = state
+
+        def finish(custom_id: str, **fields: Any) -> None:
+            state = states.pop(custom_id)
+            if fields["status"] == "ok":
+                summary.succeeded += 1
+            else:
+                summary.failed += 1
+            write(self._record(state.item, state.started, **fields))
+
+        for round_number in range(1, self.max_rounds + 1):
+            if not states:
+                return
+            logging.info("Batch round %s: %s open conversations", round_number, len(states))
+            results = await self._run_round(states, tools, summary)
+            slots = asyncio.Semaphore(self.concurrency)
+            tool_rounds = []
+
+            for custom_id, state in list(states.items()):
+                result = results.get(custom_id)
+                if result is None or result.type != "succeeded":
+                    reason = getattr(result, "type", "missing")
+                    if reason in ("errored", "expired", "missing") and state.retries < self.max_retries:
+                        state.retries += 1
+                        summary.retries += 1
+                        continue
+                    finish(custom_id, status="error", error=f"Batch request {reason}: {getattr(result, 'error', '')}")
+                    continue
+
+                message = result.message
+                _add_usage(state.usage, message.usage)
+                state.history.append("assistant", message.content)
+                state.text.extend(b.text for b in message.content if getattr(b, "type", None) == "text")
+                tool_uses = [b for b in message.content if getattr(b, "type", None) == "tool_use"]
+                if not tool_uses:
+                    state.history.compact()
+                    finish(
+                        custom_id, status="ok", output="".join(state.text),
+                        usage=state.usage, tool_calls=state.tool_calls,
+                    )
+                    continue
+                state.tool_calls.extend(tub.name for tub in tool_uses)
+                tool_rounds.append(self._run_tools(state, tool_uses, slots))
+
+            await asyncio.gather(*tool_rounds)
+
+        for custom_id in list(states):
+            finish(custom_id, status="error", error=f"Not finished after {self.max_rounds} rounds")
+
+    async def _run_tools(self, state: _ItemState, tool_uses: list, slots: asyncio.Semaphore) -> None:
+        async with slots:
+            results = await asyncio.gather(*self.agent._dispatch_tool_uses(tool_uses))
+        state.history.append("user", [block for block, _ in results])
+
+    async def _run_round(self, states: dict[str, _ItemState], tools: list, summary: BatchSummary) -> dict[str, Any]:
+        client = self.agent
+        requests = []
+        for custom_id, state in states.items():
+            state.history.compact()
+            system, request_tools, messages = client._build_request(tools, state.history)
+            params = {"model": client.model, "max_tokens": client.max_tokens, "system": system, "messages": messages}
+            if request_tools:
+                params["tools"] = request_tools
+            requests.append({"custom_id": custom_id, "params": params})
+
+        results: dict[str, Any] = {}
+        chunks = [requests[i:i + self.batch_size] for i in range(0, len(requests), self.batch_size)]
+        for chunk_results in await asyncio.gather(*(self._run_batch(chunk, summary) for chunk in chunks)):
+            results.update(chunk_results)
+        return results
+
+    async def _run_batch(self, requests: list[dict], summary: BatchSummary) -> dict[str, Any]:
+        batches = self.agent.anthropic.messages.batches
+        batch = await self._with_retries(lambda: batches.create(requests=requests), summary)
+        logging.info("Submitted message batch %s with %s requests", batch.id, len(requests))
+        while batch.processing_status != "ended":
+            await asyncio.sleep(self.poll_interval)
+            batch = await self._with_retries(lambda: batches.retrieve(batch.id), summary)
+
+        results: dict[str, Any] = {}
+        decoder = await self._with_retries(lambda: batches.results(batch.id), summary)
+        async for entry in decoder:
+            results[entry.custom_id] = entry.result
+        logging.info("Message batch %s ended: %s", batch.id, batch.request_counts)
+        return results
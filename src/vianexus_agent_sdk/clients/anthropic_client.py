@@ -1,83 +1,379 @@
-from anthropic import AsyncAnthropic
+import asyncio
 import logging
 import json
+import time
+from typing import AsyncIterator, Callable, Optional
+try:
+    from anthropic import AsyncAnthropic
+except ImportError as e:  # pragma: no cover - optional dependency
+    raise ImportError(
+        "AnthropicClient requires the 'anthropic' extra: pip install 'vianexus_agent_sdk[anthropic]'"
+    ) from e
+from vianexus_agent_sdk.clients.conversation_history import ConversationHistory
+from vianexus_agent_sdk.clients.conversation_store import ConversationStore
+from vianexus_agent_sdk.clients.response_cache import ResponseCache, response_cache_scope
 from vianexus_agent_sdk.mcp_client.enhanced_mcp_client import EnhancedMCPClient
+from vianexus_agent_sdk.mcp_client.result_processor import PayloadStore, ToolResultProcessor
+from vianexus_agent_sdk.telemetry.tracing import get_telemetry
+from vianexus_agent_sdk.types.events import AgentEvent, Final, TextDelta, ToolCallStart, ToolResult, Usage
+
+_EPHEMERAL_CACHE = {"type": "ephemeral"}
+_USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
 
 class AnthropicClient(EnhancedMCPClient):
-    def __init__(self, config):
-        super().__init__(config)
-        self.anthropic = AsyncAnthropic(api_key=config.get("llm_api_key"))
+    system_prompt = "You are a skilled Financial Analyst."
+
+    def __init__(self, config, connection_manager=None):
+        super().__init__(config, connection_manager)
+        # Retries go through the shared rate governor instead, see `_stream_message`
+        self.anthropic = AsyncAnthropic(api_key=config.get("llm_api_key"), max_retries=0)
         self.model = config.get("llm_model", "claude-3-5-sonnet-20241022")
         self.max_tokens = config.get("max_tokens", 1000)
-        self.messages = []
-        self.max_history_length = config.get("max_history_length", 50)
+        self.conversation_store = ConversationStore.from_config(config.get("conversation_store"))
+        self.history = self.new_history()
+        self.response_cache = ResponseCache.from_config(config.get("response_cache"))
+        self.parallel_tool_calls = config.get("parallel_tool_calls", True)
+        self.max_concurrent_tool_calls = config.get("max_concurrent_tool_calls", 8)
+        self.tool_call_timeout = config.get("tool_call_timeout")
+        self.early_tool_dispatch = config.get("early_tool_dispatch", False)
+        self.prompt_caching = config.get("prompt_caching", True)
+        self.result_processor = ToolResultProcessor(
+            max_chars=config.get("tool_result_max_chars", 20_000),
+            limits=config.get("tool_result_limits"),
+            store=PayloadStore(max_entries=config.get("tool_payload_max_entries", 256)),
+        )
+        self.usage = dict.fromkeys(_USAGE_FIELDS, 0)
+        self.last_usage = dict.fromkeys(_USAGE_FIELDS, 0)
+
+    @property
+    def messages(self) -> tuple[dict, ...]:
+        """The conversation history, read-only. `clear_history` starts a new conversation."""
+        return self.history.messages
+
+    def clear_history(self) -> None:
+        """Forget the conversation so far."""
+        self.history.clear()
+
+    def get_tool_payload(self, handle: str):
+        """Return the full `CallToolResult` behind a handle from a shortened tool result, or None."""
+        return self.result_processor.store.get(handle)
+
+    def new_history(self) -> ConversationHistory:
+        """Create an empty conversation history using this client's budget settings."""
+        return ConversationHistory(
+            max_tokens=self.config.get("max_history_tokens", 50_000),
+            max_messages=self.config.get("max_history_length", 50),
+            keep_recent_turns=self.config.get("history_keep_recent_turns", 2),
+            tool_result_chars=self.config.get("history_tool_result_chars", 1_000),
+            store=self.conversation_store,
+        )
 
     async def process_query(self, query: str) -> str:
-        if not self.session:
+        if not self.is_connected:
             return "Error: MCP session not initialized."
 
+        async for event in self.stream_query(query):
+            if isinstance(event, TextDelta):
+                print(event.text, end="", flush=True)
+        print()
+        return ""
+
+    async def respond(
+        self,
+        query: str,
+        history: Optional[ConversationHistory] = None,
+        on_event: Optional[Callable[[AgentEvent], None]] = None,
+    ) -> str:
+        """
+        Answer `query` within `history` and return the final assistant text.
+        Every streamed event is passed to `on_event` as it arrives.
+        """
+        text = ""
+        async for event in self.stream_query(query, history):
+            if on_event:
+                on_event(event)
+            if isinstance(event, Final):
+                text = event.text
+        return text
+
+    async def stream_query(
+        self,
+        query: str,
+        history: Optional[ConversationHistory] = None,
+        model: Optional[str] = None,
+        max_retries: Optional[int] = None,
+    ) -> AsyncIterator[AgentEvent]:
+        """
+        Answer `query` within `history` (the client's own history by default), yielding
+        TextDelta, ToolCallStart, ToolResult and Usage events as they happen and a Final
+        event with the complete answer. Several conversations can stream concurrently
+        over the same MCP session. `model` and `max_retries` (of each model request)
+        override the client's model and the governor's retries for this query.
+        With a response cache a fresh cached answer is replayed without calling the model.
+        """
+        model = model or self.model
+        history = history if history is not None else self.history
+        cache = self.response_cache
+        if cache is not None:
+            scope = response_cache_scope("anthropic", model, self.system_prompt, self.config.get("server"))
+            follow_up = len(history) > 0
+            # Personal queries are only cached per tenant
+            identity = getattr(self.connection_manager, "tenant_id", None)
+            cached = await cache.lookup(query, scope, follow_up=follow_up, identity=identity)
+            if cached is not None:
+                history.append("user", query)
+                history.append("assistant", [{"type": "text", "text": cached.answer}])
+                yield TextDelta(text=cached.answer)
+                yield Final(text=cached.answer, cached=True)
+                return
+            tool_calls: list[tuple[str, dict]] = []
+            tool_failed = False
+
+        # Rides out a reconnect in progress, raises if the client was never connected
+        await self.ensure_connected()
+
         try:
-            tool_list = await self.session.list_tools()
-            tools = [{
-                "name": t.name,
-                "description": t.description or "",
-                "input_schema": getattr(t, "inputSchema", {}) or {},
-            } for t in (tool_list.tools or [])]
+            tools = await self.get_tools()
         except Exception as e:
             logging.error("Error listing tools: %s", e)
             tools = []
 
-        self.messages.append({"role": "user", "content": query})
+        history.append("user", query)
+        text_parts: list[str] = []
+        telemetry = get_telemetry()
 
-        while True:
-            async with self.anthropic.messages.stream(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                messages=self.messages,
-                tools=tools or None,
-                system="You are a skilled Financial Analyst."
-            ) as stream:
-                async for event in stream:
-                    if event.type == "content_block_delta" and getattr(event.delta, "type", "") == "text_delta":
-                        print(event.delta.text, end="", flush=True)
-
-                msg = await stream.get_final_message()
-
-            tool_uses = [b for b in msg.content if getattr(b, "type", None) == "tool_use"]
-            self.messages.append({"role": "assistant", "content": msg.content})
-
-            if not tool_uses:
-                print()
-                self._trim_history()
-                return ""
-
-            result_blocks = []
-            for tub in tool_uses:
-                name = tub.name
-                args = tub.input if isinstance(tub.input, dict) else {}
+        with telemetry.span("agent.query", provider="anthropic", model=model) as query_span:
+            query_started = time.perf_counter()
+            iteration = 0
+            while True:
+                iteration += 1
+                history.compact()
+                system, request_tools, messages = self._build_request(tools, history)
+                with telemetry.span("llm.request", provider="anthropic", model=model, iteration=iteration) as span:
+                    request_started = time.perf_counter()
+                    first_token = True
+                    slots = self._tool_slots()
+                    started: dict[str, asyncio.Task] = {}
+                    try:
+                        async for event in self._stream_message(
+                            early_tools=self.early_tool_dispatch,
+                            max_retries=max_retries,
+                            model=model,
+                            max_tokens=self.max_tokens,
+                            messages=messages,
+                            tools=request_tools or None,
+                            system=system
+                        ):
+                            if isinstance(event, str):
+                                if first_token:
+                                    first_token = False
+                                    telemetry.record("llm.time_to_first_token", time.perf_counter() - request_started, model=model)
+                                    if iteration == 1:
+                                        telemetry.record("agent.time_to_first_token", time.perf_counter() - query_started, provider="anthropic")
+                                text_parts.append(event)
+                                yield TextDelta(text=event)
+                            elif event.type == "tool_use":
+                                # The block's input is complete, run the call while the model keeps generating
+                                started[event.id] = self._start_tool_use(event, slots)
+                                yield ToolCallStart(id=event.id, name=event.name, arguments=event.input if isinstance(event.input, dict) else {})
+                            else:
+                                msg = event
+                    except BaseException:
+                        for task in started.values():
+                            task.cancel()
+                        raise
+
+                    self._record_usage(msg.usage)
+                    tool_uses = [b for b in msg.content if getattr(b, "type", None) == "tool_use"]
+                    span.set_attributes(**self.last_usage, tool_uses=len(tool_uses), stop_reason=msg.stop_reason)
+                yield Usage(model=model, **self.last_usage)
+                history.append("assistant", msg.content)
+
+                if not tool_uses:
+                    history.compact()
+                    query_span.set_attributes(
+                        iterations=iteration,
+                        history_tokens=history.total_tokens,
+                        history_bytes=history.resident_bytes,
+                    )
+                    telemetry.record("conversation.resident_bytes", history.resident_bytes, provider="anthropic")
+                    text = "".join(text_parts)
+                    if cache is not None and not tool_failed:
+                        await cache.store(
+                            query, scope, text, tool_calls, self.result_cache, follow_up=follow_up, identity=identity
+                        )
+                    yield Final(text=text)
+                    return
+
+                for tub in tool_uses:
+                    if tub.id not in started:
+                        yield ToolCallStart(id=tub.id, name=tub.name, arguments=tub.input if isinstance(tub.input, dict) else {})
+
+                tasks = [started.get(tub.id) or self._start_tool_use(tub, slots) for tub in tool_uses]
+                names = {tub.id: tub.name for tub in tool_uses}
+                if cache is not None:
+                    tool_calls.extend((tub.name, tub.input if isinstance(tub.input, dict) else {}) for tub in tool_uses)
                 try:
-                    result = await self.session.call_tool(name, args)
-                    payload = result.content
-                    if isinstance(payload, (dict, list)):
-                        text_payload = payload[0].text
-                    else:
-                        text_payload = str(payload)
-                    result_blocks.append({
-                        "type": "tool_result",
-                        "tool_use_id": tub.id,
-                        "content": [{"type": "text", "text": text_payload}],
-                    })
-                except Exception as e:
-                    logging.error("Tool '%s' failed: %s", name, e)
-                    result_blocks.append({
-                        "type": "tool_result",
-                        "tool_use_id": tub.id,
-                        "content": [{"type": "text", "text": f"Error: {e}"}],
-                    })
-
-            self.messages.append({"role": "user", "content": result_blocks})
-
-    def _trim_history(self):
-        """Keep conversation history within reasonable bounds"""
-        if len(self.messages) > self.max_history_length:
-            self.messages = self.messages[-self.max_history_length:]
+                    for next_done in asyncio.as_completed(tasks):
+                        block, handle = await next_done
+                        if block.get("is_error"):
+                            tool_failed = True
+                        yield ToolResult(
+                            id=block["tool_use_id"],
+                            name=names[block["tool_use_id"]],
+                            content=block["content"],
+                            is_error=block.get("is_error", False),
+                            handle=handle,
+                        )
+                finally:
+                    for task in tasks:
+                        task.cancel()
+                # Results keep the order of the tool_use blocks so each lines up with its tool_use_id
+                history.append("user", [task.result()[0] for task in tasks])
+
+    async def _stream_message(
+        self, early_tools: bool = False, max_retries: Optional[int] = None, **params
+    ) -> AsyncIterator:
+        """
+        Stream one Messages API request within the model's rate limit: yields the text deltas,
+        with `early_tools` every tool_use block as soon as it is complete, then the final
+        message. Rate-limit, overload and transient errors are retried with backoff as long
+        as nothing has been yielded yet, at most `max_retries` times if given.
+        """
+        governor = self.governor
+        model = params["model"]
+        attempt = 0
+        while True:
+            await governor.acquire(model=model)
+            streamed = False
+            try:
+                async with self.anthropic.messages.stream(**params) as stream:
+                    async for event in stream:
+                        if event.type == "content_block_delta" and getattr(event.delta, "type", "") == "text_delta":
+                            streamed = True
+                            yield event.delta.text
+                        elif early_tools and event.type == "content_block_stop" and event.content_block.type == "tool_use":
+                            # Once a call is started the request must not be repeated
+                            streamed = True
+                            yield event.content_block
+                    msg = await stream.get_final_message()
+            except Exception as e:
+                delay = None if streamed else governor.retry_delay(e, attempt, model=model)
+                if delay is None or (max_retries is not None and attempt >= max_retries):
+                    raise
+                attempt += 1
+                logging.warning("Model request failed, retrying in %.1fs: %s", delay, e)
+                await asyncio.sleep(delay)
+                continue
+            governor.succeeded(model=model)
+            yield msg
+            return
+
+    def _build_request(self, tools: list[dict], history: ConversationHistory) -> tuple:
+        """
+        Return (system, tools, messages) for the next request. With prompt caching on, cache
+        breakpoints mark the system prompt, the tool definitions and the latest history turn,
+        so every tool-use iteration and follow-up query reuses the cached prefix.
+        """
+        messages = history.as_request_messages()
+        if not self.prompt_caching:
+            return self.system_prompt, tools, messages
+
+        system = [{"type": "text", "text": self.system_prompt, "cache_control": _EPHEMERAL_CACHE}]
+        if tools:
+            tools = tools[:-1] + [{**tools[-1], "cache_control": _EPHEMERAL_CACHE}]
+        if messages:
+            last = messages[-1]
+            content = last["content"]
+            if isinstance(content, str):
+                content = [{"type": "text", "text": content}]
+            if content:
+                content = content[:-1] + [{**content[-1], "cache_control": _EPHEMERAL_CACHE}]
+            # Copies only, the cache_control markers must not accumulate in the stored history
+            messages = messages[:-1] + [{**last, "content": content}]
+        return system, tools, messages
+
+    def _record_usage(self, usage) -> None:
+        """Accumulate token usage, including prompt-cache reads and writes."""
+        if usage is None:
+            return
+        for field in _USAGE_FIELDS:
+            value = getattr(usage, field, 0) or 0
+            self.last_usage[field] = value
+            self.usage[field] += value
+        logging.debug(
+            "Usage: input=%s output=%s cache_write=%s cache_read=%s",
+            self.last_usage["input_tokens"],
+            self.last_usage["output_tokens"],
+            self.last_usage["cache_creation_input_tokens"],
+            self.last_usage["cache_read_input_tokens"],
+        )
+
+    def _format_tool(self, tool) -> dict:
+        return {
+            "name": tool.name,
+            "description": tool.description or "",
+            "input_schema": getattr(tool, "inputSchema", {}) or {},
+        }
+
+    def _tool_slots(self) -> asyncio.Semaphore:
+        """
+        Slots for one turn's tool calls: they run concurrently up to `max_concurrent_tool_calls`,
+        or one at a time in order when `parallel_tool_calls` is off.
+        """
+        limit = max(1, int(self.max_concurrent_tool_calls)) if self.parallel_tool_calls else 1
+        return asyncio.Semaphore(limit)
+
+    def _start_tool_use(self, tub, slots: asyncio.Semaphore) -> asyncio.Task:
+        async def _bounded():
+            async with slots:
+                return await self._run_tool_use(tub)
+
+        return asyncio.ensure_future(_bounded())
+
+    def _dispatch_tool_uses(self, tool_uses) -> list[asyncio.Task]:
+        """Start a turn's tool calls and return one task per tool_use, in order."""
+        slots = self._tool_slots()
+        return [self._start_tool_use(tub, slots) for tub in tool_uses]
+
+    async def _run_tool_use(self, tub) -> tuple[dict, Optional[str]]:
+        """
+        Run a single tool call and return (tool_result block, payload handle). The handle is set
+        when the result was shortened for the model. Failures and timeouts become error
+        tool_results instead of raising.
+        """
+        name = tub.name
+        args = tub.input if isinstance(tub.input, dict) else {}
+        try:
+            result = await self.call_tool(name, args, timeout=self.tool_call_timeout)
+            processed = self.result_processor.process(name, result)
+            if processed.truncated:
+                logging.debug(
+                    "Tool '%s' result shortened from %s to %s chars (%s)",
+                    name, processed.original_chars, processed.sent_chars, processed.handle,
+                )
+            block = {"type": "tool_result", "tool_use_id": tub.id, "content": processed.blocks}
+            if processed.is_error:
+                block["is_error"] = True
+            return block, processed.handle
+        except asyncio.TimeoutError:
+            logging.error("Tool '%s' timed out after %ss", name, self.tool_call_timeout)
+            return {
+                "type": "tool_result",
+                "tool_use_id": tub.id,
+                "content": [{"type": "text", "text": f"Error: tool call timed out after {self.tool_call_timeout}s"}],
+                "is_error": True,
+            }, None
+        except Exception as e:
+            logging.error("Tool '%s' failed: %s", name, e)
+            return {
+                "type": "tool_result",
+                "tool_use_id": tub.id,
+                "content": [{"type": "text", "text": f"Error: {e}"}],
+                "is_error": True,
+            }, None
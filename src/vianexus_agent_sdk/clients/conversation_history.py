@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import json
+import time
+import weakref
+from typing import Any, Optional
+
+from vianexus_agent_sdk.clients.conversation_store import (
+    ConversationStore,
+    Payload,
+    get_default_conversation_store,
+)
+
+_OMITTED_NOTE = "characters of an earlier tool result omitted"
+
+
+def _to_dict(block: Any) -> Any:
+    """Convert an SDK content block into a plain dict the API accepts."""
+    if hasattr(block, "model_dump"):
+        return block.model_dump(mode="json", exclude_none=True)
+    return block
+
+
+def estimate_tokens(content: Any, chars_per_token: float = 4.0) -> int:
+    """Rough token estimate for a message content (string or list of blocks)."""
+    if isinstance(content, str):
+        text = content
+    else:
+        text = json.dumps(content, default=str, separators=(",", ":"))
+    return max(1, int(len(text) / chars_per_token))
+
+
+def _is_tool_result_message(message: dict) -> bool:
+    content = message.get("content")
+    return (
+        message.get("role") == "user"
+        and isinstance(content, list)
+        and any(isinstance(b, dict) and b.get("type") == "tool_result" for b in content)
+    )
+
+
+def _shrink_text(text: str, limit: int) -> str:
+    """Keep the head of `text` and note what was dropped, with a hint about the JSON shape if any."""
+    if len(text) <= limit or _OMITTED_NOTE in text[limit:]:
+        return text
+    shape = ""
+    try:
+        parsed = json.loads(text)
+        if isinstance(parsed, list):
+            shape = f" (JSON array of {len(parsed)} items)"
+        elif isinstance(parsed, dict):
+            shape = f" (JSON object with keys: {', '.join(list(parsed)[:20])})"
+    except ValueError:
+        pass
+    return f"{text[:limit]}\n[... {len(text) - limit} {_OMITTED_NOTE}{shape}]"
+
+
+class _Record:
+    """A stored message: compact JSON of its content, with large tool result texts cut out."""
+
+    __slots__ = ("role", "body", "payloads", "tokens", "is_tool_result")
+
+    def __init__(self, role: str, body: bytes, payloads: list[Payload], tokens: int, is_tool_result: bool) -> None:
+        self.role = role
+        self.body = body
+        self.payloads = payloads
+        self.tokens = tokens
+        self.is_tool_result = is_tool_result
+
+    @property
+    def resident_bytes(self) -> int:
+        return len(self.body) + sum(p.size for p in self.payloads if p.resident)
+
+
+def _discard_records(store: ConversationStore, records: list[_Record]) -> None:
+    store.discard([p for r in records for p in r.payloads])
+
+
+class ConversationHistory:
+    """
+    Anthropic message history bounded by an estimated token budget.
+
+    Messages are grouped into turns, a turn starting at each user query, so a tool_use is
+    never separated from its tool_result. Once the budget is exceeded, tool results of
+    older turns are shrunk first, then those of recent turns, and only then are whole turns
+    dropped oldest-first.
+
+    Messages are kept as compact records in `store` (the process-wide `ConversationStore`
+    by default), which may spill large tool results to disk to stay within its memory budget.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 50_000,
+        max_messages: Optional[int] = None,
+        keep_recent_turns: int = 2,
+        tool_result_chars: int = 1_000,
+        chars_per_token: float = 4.0,
+        store: Optional[ConversationStore] = None,
+    ) -> None:
+        self.max_tokens = max_tokens
+        self.max_messages = max_messages
+        self.keep_recent_turns = keep_recent_turns
+        self.tool_result_chars = tool_result_chars
+        self.chars_per_token = chars_per_token
+        self.store = store if store is not None else get_default_conversation_store()
+        self.last_used = time.monotonic()
+        self._records: list[_Record] = []
+        self._resident = 0
+        self.store.register(self)
+        # Spilled rows of a history that is garbage collected are deleted too
+        weakref.finalize(self, _discard_records, self.store, self._records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def messages(self) -> tuple[dict, ...]:
+        """The stored messages, decoded. Read-only: change the history with `append` and `clear`."""
+        return tuple(self._decode(r) for r in self._records)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(r.tokens for r in self._records)
+
+    @property
+    def resident_bytes(self) -> int:
+        """Bytes of message data held in memory, not counting spilled tool results."""
+        return self._resident
+
+    def append(self, role: str, content: Any) -> None:
+        if isinstance(content, list):
+            content = [_to_dict(b) for b in content]
+        record = self._encode(role, content)
+        self._records.append(record)
+        self._resident += record.resident_bytes
+        self.last_used = time.monotonic()
+        self.store.enforce_budget()
+
+    def clear(self) -> None:
+        _discard_records(self.store, self._records)
+        self._records.clear()
+        self._resident = 0
+
+    def as_request_messages(self) -> list[dict]:
+        """Messages to send with the next request. Spilled tool results are read back here."""
+        self.last_used = time.monotonic()
+        return [self._decode(r) for r in self._records]
+
+    def spill(self, max_bytes: int) -> int:
+        """Spill tool results, oldest first, until `max_bytes` are freed. Returns the bytes freed."""
+        freed = 0
+        for payload in (p for r in self._records for p in r.payloads if p.resident):
+            if freed >= max_bytes:
+                break
+            freed += self.store.spill(payload)
+        self._resident -= freed
+        return freed
+
+    def _encode(self, role: str, content: Any) -> _Record:
+        payloads: list[Payload] = []
+        chars = 0
+        is_tool_result = False
+        if isinstance(content, list):
+            # Copies, the caller's blocks are left alone
+            content = [dict(b) if isinstance(b, dict) else b for b in content]
+            for i, block in enumerate(content):
+                if not isinstance(block, dict) or block.get("type") != "tool_result":
+                    continue
+                is_tool_result = True
+                inner = block.get("content")
+                if isinstance(inner, str) and len(inner) >= self.store.spill_threshold:
+                    payloads.append(Payload(i, None, inner))
+                    chars += len(inner)
+                    block["content"] = ""
+                elif isinstance(inner, list):
+                    parts = block["content"] = [dict(p) if isinstance(p, dict) else p for p in inner]
+                    for j, part in enumerate(parts):
+                        text = part.get("text") if isinstance(part, dict) and part.get("type") == "text" else None
+                        if text and len(text) >= self.store.spill_threshold:
+                            payloads.append(Payload(i, j, text))
+                            chars += len(text)
+                            part["text"] = ""
+        serialized = json.dumps(content, default=str, separators=(",", ":"), ensure_ascii=False)
+        chars += len(content) if isinstance(content, str) else len(serialized)
+        tokens = max(1, int(chars / self.chars_per_token))
+        return _Record(role, serialized.encode("utf-8"), payloads, tokens, is_tool_result and role == "user")
+
+    def _decode(self, record: _Record) -> dict:
+        content = json.loads(record.body)
+        for payload in record.payloads:
+            text = self.store.load(payload)
+            if payload.part is None:
+                content[payload.block]["content"] = text
+            else:
+                content[payload.block]["content"][payload.part]["text"] = text
+        return {"role": record.role, "content": content}
+
+    def _replace(self, index: int, record: _Record) -> None:
+        old = self._records[index]
+        _discard_records(self.store, [old])
+        self._resident += record.resident_bytes - old.resident_bytes
+        self._records[index] = record
+
+    def _drop(self, count: int) -> None:
+        dropped = self._records[:count]
+        _discard_records(self.store, dropped)
+        self._resident -= sum(r.resident_bytes for r in dropped)
+        del self._records[:count]
+
+    def _turn_starts(self) -> list[int]:
+        return [
+            i for i, r in enumerate(self._records)
+            if r.role == "user" and not r.is_tool_result
+        ]
+
+    def _over_budget(self) -> bool:
+        if self.max_messages is not None and len(self._records) > self.max_messages:
+            return True
+        return self.total_tokens > self.max_tokens
+
+    def compact(self) -> None:
+        """Bring the history back under budget without splitting tool_use/tool_result pairs."""
+        if not self._over_budget():
+            return
+
+        starts = self._turn_starts()
+        protected_from = starts[-self.keep_recent_turns] if len(starts) >= self.keep_recent_turns > 0 else 0
+        self._shrink_tool_results(0, protected_from)
+
+        if self.total_tokens > self.max_tokens:
+            # Recent turns are still too big: shrink everything but the newest message
+            self._shrink_tool_results(0, max(0, len(self._records) - 1))
+
+        while self._over_budget():
+            starts = self._turn_starts()
+            if len(starts) < 2:
+                break
+            self._drop(starts[1])
+
+    def _shrink_tool_results(self, start: int, end: int) -> None:
+        for i in range(start, end):
+            record = self._records[i]
+            if not record.is_tool_result:
+                continue
+            message = self._decode(record)
+            changed = False
+            for block in message["content"]:
+                if not isinstance(block, dict) or block.get("type") != "tool_result":
+                    continue
+                inner = block.get("content")
+                if isinstance(inner, str):
+                    shrunk = _shrink_text(inner, self.tool_result_chars)
+                    changed = changed or shrunk != inner
+                    block["content"] = shrunk
+                elif isinstance(inner, list):
+                    for part in inner:
+                        if isinstance(part, dict) and part.get("type") == "text":
+                            shrunk = _shrink_text(part.get("text", ""), self.tool_result_chars)
+                            changed = changed or shrunk != part.get("text")
+                            part["text"] = shrunk
+            if changed:
+                self._replace(i, self._encode(record.role, message["content"]))
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import weakref
+import zlib
+from typing import TYPE_CHECKING, Any, Optional
+
+from vianexus_agent_sdk.types.config import ConversationStoreConfig
+
+if TYPE_CHECKING:
+    from vianexus_agent_sdk.clients.conversation_history import ConversationHistory
+
+
+class Payload:
+    """
+    A tool result text of a stored message, zlib-compressed in memory or spilled to disk.
+    `block` / `part` locate it in the message content (`part` is None for string content).
+    """
+
+    __slots__ = ("block", "part", "data", "row", "size")
+
+    def __init__(self, block: int, part: Optional[int], text: str) -> None:
+        self.block = block
+        self.part = part
+        self.data: Optional[bytes] = zlib.compress(text.encode("utf-8"), 1)
+        self.row: Optional[int] = None
+        self.size = len(self.data)
+
+    @property
+    def resident(self) -> bool:
+        return self.data is not None
+
+
+class ConversationStore:
+    """
+    Memory accounting and spill space shared by the conversation histories of a process.
+
+    Histories keep their messages as compact JSON records, with large tool results
+    (`spill_threshold` characters and up) zlib-compressed on the side. Once the histories
+    together hold more than `memory_budget` bytes, those tool results are moved to a SQLite
+    file (`spill_path`, a temporary file by default), least recently used conversations and
+    oldest messages first, and read back only to build the next request.
+
+    One instance is meant to be shared by every client of a process, see
+    `get_default_conversation_store`.
+    """
+
+    def __init__(
+        self,
+        memory_budget: Optional[int] = None,
+        spill_path: Optional[str] = None,
+        spill_threshold: int = 2048,
+    ) -> None:
+        self.memory_budget = memory_budget
+        self.spill_path = os.path.expanduser(spill_path) if spill_path else None
+        self.spill_threshold = spill_threshold
+        self.spills = 0
+        self.rehydrations = 0
+        self._histories: "weakref.WeakSet[ConversationHistory]" = weakref.WeakSet()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._temporary = False
+        self._spilled_bytes = 0
+
+    @classmethod
+    def from_config(cls, config: ConversationStoreConfig | "ConversationStore" | None) -> "ConversationStore":
+        """Build a store from a config dict. An existing one is returned as is, None gives the default."""
+        if config is None:
+            return get_default_conversation_store()
+        if isinstance(config, ConversationStore):
+            return config
+        return cls(
+            memory_budget=config.get("memory_budget"),
+            spill_path=config.get("spill_path"),
+            spill_threshold=config.get("spill_threshold", 2048),
+        )
+
+    def register(self, history: "ConversationHistory") -> None:
+        self._histories.add(history)
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(h.resident_bytes for h in list(self._histories))
+
+    def enforce_budget(self) -> None:
+        """Spill tool results until the histories fit the memory budget."""
+        if self.memory_budget is None:
+            return
+        excess = self.resident_bytes - self.memory_budget
+        if excess <= 0:
+            return
+        for history in sorted(list(self._histories), key=lambda h: h.last_used):
+            excess -= history.spill(excess)
+            if excess <= 0:
+                return
+        logging.debug("Conversation histories exceed the memory budget by %s bytes after spilling", excess)
+
+    # ---- spill file ----
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            path = self.spill_path
+            if path is None:
+                fd, path = tempfile.mkstemp(prefix="vianexus-conversations-", suffix=".db")
+                os.close(fd)
+                self.spill_path = path
+                self._temporary = True
+                atexit.register(self.close)
+            else:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            # Spilled payloads are a cache of this process, durability does not matter
+            self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=OFF")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS payloads (id INTEGER PRIMARY KEY, data BLOB)")
+        return self._conn
+
+    def spill(self, payload: Payload) -> int:
+        """Move `payload` to disk. Returns the bytes freed."""
+        if payload.data is None:
+            return 0
+        with self._lock:
+            cursor = self._connect().execute("INSERT INTO payloads (data) VALUES (?)", (payload.data,))
+        payload.row = cursor.lastrowid
+        payload.data = None
+        self.spills += 1
+        self._spilled_bytes += payload.size
+        return payload.size
+
+    def load(self, payload: Payload) -> str:
+        """The text of `payload`, read from disk if it was spilled."""
+        data = payload.data
+        if data is None:
+            with self._lock:
+                row = self._connect().execute("SELECT data FROM payloads WHERE id = ?", (payload.row,)).fetchone()
+            if row is None:
+                raise RuntimeError(f"Spilled conversation payload {payload.row} is missing from {self.spill_path}")
+            data = row[0]
+            self.rehydrations += 1
+        return zlib.decompress(data).decode("utf-8")
+
+    def discard(self, payloads: list[Payload]) -> None:
+        """Delete the spilled rows of payloads that are no longer needed."""
+        rows = [(p.row,) for p in payloads if p.row is not None]
+        if not rows or self._conn is None:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM payloads WHERE id = ?", rows)
+        self._spilled_bytes -= sum(p.size for p in payloads if p.row is not None)
+        for p in payloads:
+            p.row = None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            if self._temporary and self.spill_path:
+                for suffix in ("", "-wal", "-shm"):
+                    try:
+                        os.remove(self.spill_path + suffix)
+                    except OSError:
+                        pass
+                self.spill_path = None
+                self._temporary = False
+
+    def stats(self) -> dict[str, Any]:
+        sizes = sorted(h.resident_bytes for h in list(self._histories))
+        return {
+            "sessions": len(sizes),
+            "resident_bytes": sum(sizes),
+            "spilled_bytes": self._spilled_bytes,
+            "memory_budget": self.memory_budget,
+            "bytes_per_session": {
+                "mean": sum(sizes) / len(sizes) if sizes else 0,
+                "p50": sizes[len(sizes) // 2] if sizes else 0,
+                "max": sizes[-1] if sizes else 0,
+            },
+            "spills": self.spills,
+            "rehydrations": self.rehydrations,
+        }
+
+
+_default_store: Optional[ConversationStore] = None
+
+
+def get_default_conversation_store() -> ConversationStore:
+    """The process-wide conversation store (no memory budget), created on first use."""
+    global _default_store
+    if _default_store is None:
+        _default_store = ConversationStore()
+    return _default_store
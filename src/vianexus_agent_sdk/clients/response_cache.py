@@ -0,0 +1,468 @@
+from __future__ import annotations
+
+import array
+import asyncio
+import hashlib
+import inspect
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterable, Optional, Sequence, Union
+
+from vianexus_agent_sdk.telemetry.tracing import get_telemetry
+from vianexus_agent_sdk.types.config import ResponseCacheConfig
+
+if TYPE_CHECKING:
+    from vianexus_agent_sdk.mcp_client.result_cache import ToolResultCache
+
+# A local embedding model: text -> vector, sync (run in a thread) or async
+Embedder = Callable[[str], Union[Sequence[float], Awaitable[Sequence[float]]]]
+
+# Spellings of the same metric, folded before the query is tokenized
+_PHRASES = (
+    (re.compile(r"\bp\s*/\s*e(?:\s+ratio)?\b|\bprice[\s-]+(?:to[\s-]+)?earnings(?:\s+ratio)?\b|\bpe\s+ratio\b", re.I), "pe"),
+    (re.compile(r"\beps\b|\bearnings\s+per\s+share\b", re.I), "eps"),
+    (re.compile(r"\bmarket\s+cap(?:italization)?\b|\bmkt\s+cap\b", re.I), "marketcap"),
+    (re.compile(r"\bdiv(?:idend)?\s+yield\b", re.I), "dividendyield"),
+)
+_STOPWORDS = frozenset(
+    "a an the is are was were be what whats which who how me my i we our please tell show give get "
+    "can could would will you your of for to on in at by about current currently now today latest "
+    "right stock stocks share shares do does did there".split()
+)
+# Words that make a query lean on earlier turns ("what about its margin?")
+_REFERENCES = frozenset(
+    "it its it's that this those these they them their same also above previous again else other "
+    "others instead one ones".split()
+)
+# First-person words: the answer depends on who asks ("what is my AAPL position?")
+_PERSONAL = frozenset("i i'm i've i'd me my mine myself we we're we've us our ours ourselves".split())
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9.$]*")
+_ENTITY = re.compile(r"\$[A-Za-z]{1,5}\b|\b[A-Z]{2,5}(?:\.[A-Z])?\b|\b\d+(?:\.\d+)?%?")
+
+
+def _folded(query: str) -> str:
+    text = query.replace("’", "'")
+    for pattern, replacement in _PHRASES:
+        text = pattern.sub(replacement, text)
+    return re.sub(r"'s\b", "", text)
+
+
+def normalize_query(query: str) -> str:
+    """
+    The cache key text of `query`: lowercased, metric spellings folded, punctuation and
+    filler words dropped. Word order is kept, as it carries meaning ("USD to EUR" is not
+    "EUR to USD"). "What's AAPL's P/E?" and "AAPL pe ratio" both become "aapl pe".
+    """
+    tokens = (t.rstrip(".") for t in _TOKEN.findall(_folded(query).lower()))
+    return " ".join(t for t in tokens if t and t not in _STOPWORDS)
+
+
+def query_entities(query: str) -> str:
+    """The tickers (in capitals or as $cashtags) and numbers of `query` in order of appearance, space separated."""
+    found = (m.group().lstrip("$").upper() for m in _ENTITY.finditer(_folded(query)))
+    return " ".join(dict.fromkeys(found))
+
+
+def is_personal(query: str) -> bool:
+    """True if the answer to `query` depends on who asks it (first-person wording)."""
+    return bool(set(re.findall(r"[a-z']+", query.replace("’", "'").lower())) & _PERSONAL)
+
+
+def is_follow_up(query: str) -> bool:
+    """True if `query` cannot be answered without the conversation before it."""
+    if not query_entities(query):
+        return True
+    words = set(re.findall(r"[a-z']+", query.lower()))
+    return bool(words & _REFERENCES) or re.match(r"\s*(and|what about|how about)\b", query, re.I) is not None
+
+
+def response_cache_scope(*parts: Any) -> str:
+    """Cache scope of a model setup (provider, model, system prompt, server...): answers only match within one."""
+    return hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def _entry_scope(query: str, scope: str, identity: Optional[str]) -> Optional[str]:
+    # Personal answers are only shared with the same identity, and not cached without one
+    if not is_personal(query):
+        return scope
+    if identity is None:
+        return None
+    return response_cache_scope(scope, identity)
+
+
+def _unit(vector: Sequence[float]) -> list[float]:
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector] if norm else list(vector)
+
+
+def _dot(a: Sequence[float], b: Sequence[float]) -> float:
+    return math.fsum(x * y for x, y in zip(a, b)) if len(a) == len(b) else 0.0
+
+
+@dataclass
+class CachedResponse:
+    """A cached answer. Times are wall clock (`time.time()`) so entries survive in SQLite."""
+
+    scope: str
+    key: str
+    entities: str
+    query: str
+    answer: str
+    tools: list[str] = field(default_factory=list)
+    created_at: float = 0.0
+    expires_at: float = 0.0
+    # Unit vector of the normalized query, when the cache has an embedder
+    embedding: Optional[list[float]] = None
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at > time.time()
+
+
+class MemoryResponseBackend:
+    """In-process LRU of cached responses."""
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: OrderedDict[tuple[str, str], CachedResponse] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, scope: str, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get((scope, key))
+        if entry is not None:
+            self._entries.move_to_end((scope, key))
+        return entry
+
+    def similar(self, scope: str, entities: str) -> list[CachedResponse]:
+        """Fresh entries of `scope` about the same entities that have an embedding."""
+        now = time.time()
+        return [
+            e for e in self._entries.values()
+            if e.scope == scope and e.entities == entities and e.embedding is not None and e.expires_at > now
+        ]
+
+    def put(self, entry: CachedResponse) -> None:
+        self._entries[(entry.scope, entry.key)] = entry
+        self._entries.move_to_end((entry.scope, entry.key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, scope: str, key: str) -> None:
+        self._entries.pop((scope, key), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteResponseBackend:
+    """
+    Cached responses in a SQLite file, shared by the processes using the same `path` and kept
+    across restarts. Least recently used entries are deleted beyond `max_entries`.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10_000) -> None:
+        self.path = os.path.expanduser(path)
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " scope TEXT, key TEXT, entities TEXT, query TEXT, answer TEXT, tools TEXT,"
+            " created_at REAL, expires_at REAL, last_used REAL, embedding BLOB,"
+            " PRIMARY KEY (scope, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_entities ON responses (scope, entities)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def _entry(row: tuple) -> CachedResponse:
+        scope, key, entities, query, answer, tools, created_at, expires_at, blob = row
+        embedding = None
+        if blob is not None:
+            embedding = array.array("f", blob).tolist()
+        return CachedResponse(scope, key, entities, query, answer, json.loads(tools), created_at, expires_at, embedding)
+
+    _COLUMNS = "scope, key, entities, query, answer, tools, created_at, expires_at, embedding"
+
+    def get(self, scope: str, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM responses WHERE scope = ? AND key = ?", (scope, key)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE responses SET last_used = ? WHERE scope = ? AND key = ?", (time.time(), scope, key)
+                )
+        return self._entry(row) if row is not None else None
+
+    def similar(self, scope: str, entities: str) -> list[CachedResponse]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM responses"
+                " WHERE scope = ? AND entities = ? AND embedding IS NOT NULL AND expires_at > ?",
+                (scope, entities, time.time()),
+            ).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def put(self, entry: CachedResponse) -> None:
+        blob = array.array("f", entry.embedding).tobytes() if entry.embedding is not None else None
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry.scope, entry.key, entry.entities, entry.query, entry.answer, json.dumps(entry.tools),
+                    entry.created_at, entry.expires_at, now, blob,
+                ),
+            )
+            self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            excess = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE rowid IN"
+                    " (SELECT rowid FROM responses ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+
+    def delete(self, scope: str, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE scope = ? AND key = ?", (scope, key))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+ResponseBackend = Union[MemoryResponseBackend, SQLiteResponseBackend]
+
+
+class ResponseCache:
+    """
+    Opt-in cache of final answers, in front of the agent loop.
+
+    Queries are matched on their normalized text (see `normalize_query`) and, with an
+    `embedder`, on the cosine similarity of its embeddings (at least `similarity`) between
+    queries naming the same tickers. An answer stays fresh as long as the data it was
+    built from: the shortest TTL of the tools it called (per-tool `ttls`, else the TTL of
+    the client's tool result cache, else `default_ttl`), at most `max_age` seconds. Answers
+    that used a tool with no TTL or a failing tool call are not cached, and stale answers
+    are never served. Follow-up questions that lean on earlier turns bypass the cache.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[ResponseBackend] = None,
+        ttls: Optional[dict[str, float]] = None,
+        default_ttl: Optional[float] = None,
+        max_age: float = 3600.0,
+        embedder: Optional[Embedder] = None,
+        similarity: float = 0.92,
+    ) -> None:
+        self.backend = backend if backend is not None else MemoryResponseBackend()
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.max_age = max_age
+        self.embedder = embedder
+        self.similarity = similarity
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.stores = 0
+        self.bypassed = 0
+        self._embeddings: OrderedDict[str, list[float]] = OrderedDict()
+
+    @classmethod
+    def from_config(cls, config: ResponseCacheConfig | "ResponseCache" | None) -> Optional["ResponseCache"]:
+        """Build a cache from a config dict. An existing instance is returned as is."""
+        if config is None or isinstance(config, ResponseCache):
+            return config
+        backend = config.get("backend", "memory")
+        if backend == "sqlite":
+            if not config.get("path"):
+                raise ValueError("The sqlite response cache backend requires a 'path'")
+            store = SQLiteResponseBackend(config["path"], max_entries=config.get("max_entries", 10_000))
+        elif backend == "memory":
+            store = MemoryResponseBackend(max_entries=config.get("max_entries", 1024))
+        else:
+            raise ValueError(f"Unknown response cache backend: {backend!r}")
+        return cls(
+            backend=store,
+            ttls=config.get("ttls"),
+            default_ttl=config.get("default_ttl"),
+            max_age=config.get("max_age", 3600.0),
+            embedder=config.get("embedder"),
+            similarity=config.get("similarity", 0.92),
+        )
+
+    def ttl_for(self, name: str, result_cache: Optional["ToolResultCache"] = None) -> Optional[float]:
+        """How long data from tool `name` stays fresh, or None if it must not be cached."""
+        ttl = self.ttls.get(name)
+        if ttl is None and result_cache is not None:
+            ttl = result_cache.ttl_for(name)
+        if ttl is None:
+            ttl = self.default_ttl
+        if ttl is None or ttl <= 0:
+            return None
+        return ttl
+
+    def freshness(
+        self,
+        tool_calls: Iterable[tuple[str, dict[str, Any]]],
+        result_cache: Optional["ToolResultCache"] = None,
+    ) -> Optional[float]:
+        """
+        Seconds an answer built from `tool_calls` stays fresh, or None if it is not cacheable.
+        A result served from `result_cache` counts with its remaining lifetime, not its full TTL.
+        """
+        fresh_for = self.max_age
+        for name, arguments in tool_calls:
+            ttl = self.ttl_for(name, result_cache)
+            if ttl is None:
+                return None
+            if result_cache is not None:
+                remaining = result_cache.remaining_ttl(name, arguments)
+                if remaining is not None:
+                    ttl = min(ttl, remaining)
+            fresh_for = min(fresh_for, ttl)
+        return fresh_for if fresh_for > 0 else None
+
+    async def _embed(self, key: str) -> Optional[list[float]]:
+        if self.embedder is None:
+            return None
+        vector = self._embeddings.get(key)
+        if vector is None:
+            if inspect.iscoroutinefunction(self.embedder):
+                raw = await self.embedder(key)
+            else:
+                # Local models are CPU bound, keep them off the event loop
+                raw = await asyncio.to_thread(self.embedder, key)
+                if inspect.isawaitable(raw):
+                    raw = await raw
+            vector = self._embeddings[key] = _unit(raw)
+            if len(self._embeddings) > 256:
+                self._embeddings.popitem(last=False)
+        else:
+            self._embeddings.move_to_end(key)
+        return vector
+
+    async def lookup(
+        self, query: str, scope: str, follow_up: bool = False, identity: Optional[str] = None
+    ) -> Optional[CachedResponse]:
+        """
+        A fresh cached answer to `query`, or None. Pass `follow_up=True` when the query is asked
+        within an ongoing conversation: it is then only answered from the cache if it stands
+        on its own (see `is_follow_up`). `identity` is the user or tenant asking: personal
+        queries (see `is_personal`) only match answers given to the same identity, and bypass
+        the cache without one.
+        """
+        with get_telemetry().span("response_cache.lookup") as span:
+            scope = _entry_scope(query, scope, identity)
+            if scope is None or (follow_up and is_follow_up(query)):
+                self.bypassed += 1
+                span.set_attribute("result", "bypass")
+                return None
+            key = normalize_query(query)
+            entry = self.backend.get(scope, key)
+            if entry is not None and not entry.fresh:
+                # The data behind the answer is past its freshness window
+                self.backend.delete(scope, key)
+                self.stale += 1
+                entry = None
+            result = "hit"
+            if entry is None and self.embedder is not None and key:
+                entities = query_entities(query)
+                # Only queries naming tickers: "aapl pe" and "msft pe" embed alike
+                candidates = self.backend.similar(scope, entities) if entities else []
+                if candidates:
+                    vector = await self._embed(key)
+                    score, best = max(((_dot(vector, c.embedding), c) for c in candidates), key=lambda x: x[0])
+                    if score >= self.similarity:
+                        entry = best
+                        result = "semantic_hit"
+                        self.semantic_hits += 1
+            if entry is None:
+                self.misses += 1
+                result = "miss"
+            else:
+                self.hits += 1
+            span.set_attribute("result", result)
+            return entry
+
+    async def store(
+        self,
+        query: str,
+        scope: str,
+        answer: str,
+        tool_calls: Iterable[tuple[str, dict[str, Any]]] = (),
+        result_cache: Optional["ToolResultCache"] = None,
+        follow_up: bool = False,
+        identity: Optional[str] = None,
+    ) -> bool:
+        """Cache `answer` to `query`, if it can be: see `freshness` and `lookup`. Returns True if stored."""
+        tool_calls = list(tool_calls)
+        fresh_for = self.freshness(tool_calls, result_cache)
+        key = normalize_query(query)
+        scope = _entry_scope(query, scope, identity)
+        if fresh_for is None or not answer or not key or scope is None or (follow_up and is_follow_up(query)):
+            return False
+        now = time.time()
+        self.backend.put(
+            CachedResponse(
+                scope=scope,
+                key=key,
+                entities=query_entities(query),
+                query=query,
+                answer=answer,
+                tools=sorted({name for name, _ in tool_calls}),
+                created_at=now,
+                expires_at=now + fresh_for,
+                embedding=await self._embed(key),
+            )
+        )
+        self.stores += 1
+        return True
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def close(self) -> None:
+        self.backend.close()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "bypassed": self.bypassed,
+            "stores": self.stores,
+            "evictions": self.backend.evictions,
+            "entries": len(self.backend),
+        }
@@ -0,0 +1,7 @@
+import importlib.util
+
+# Fail early with the fix instead of a bare ModuleNotFoundError from deep inside a submodule
+if importlib.util.find_spec("google") is None or importlib.util.find_spec("google.adk") is None:
+    raise ImportError(
+        "The Gemini backend requires the 'gemini' extra: pip install 'vianexus_agent_sdk[gemini]'"
+    )
@@ -1,13 +1,13 @@
 from typing import Any
 from google.adk.agents.llm_agent import LlmAgent
 from pydantic import BaseModel
-from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset
+from google.adk.tools.base_toolset import BaseToolset
 
 class GeminiLLMAgent(LlmAgent):
     model: str
-    tools: list[MCPToolset]
+    tools: list[BaseToolset]
     
-    def __init__(self, model: str, tools: list[MCPToolset]):
+    def __init__(self, model: str, tools: list[BaseToolset]):
         super().__init__(
             name="ViaNexus_Agent",
             model=model,
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+from google.adk.sessions import BaseSessionService, InMemorySessionService
+from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset
+
+from vianexus_agent_sdk.clients.response_cache import ResponseCache
+from vianexus_agent_sdk.gemini.agents.llm_agent import GeminiLLMAgent
+from vianexus_agent_sdk.gemini.runners.runner import GeminiRunner
+from vianexus_agent_sdk.types.events import AgentEvent, Final
+
+
+def create_session_service(store: Optional[str] = None) -> BaseSessionService:
+    """
+    Session service for `store`: None keeps sessions in memory, a database URL such as
+    `sqlite:///sessions.db` (or a bare `.db` path) persists them through ADK's
+    `DatabaseSessionService`, which requires `sqlalchemy`.
+    """
+    if store is None:
+        return InMemorySessionService()
+    try:
+        from google.adk.sessions.database_session_service import DatabaseSessionService
+    except ImportError as e:
+        raise ImportError("Persistent Gemini sessions require the 'sqlalchemy' package") from e
+    db_url = store if "://" in store else f"sqlite:///{store}"
+    return DatabaseSessionService(db_url=db_url)
+
+
+@dataclass
+class _SessionEntry:
+    last_active: float
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    # Resolved once the session exists in the service, so concurrent first queries create it once
+    ready: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class GeminiRunnerPool:
+    """
+    Serves many users from one process with a single MCP toolset.
+
+    Every agent of the pool (one per model, created on first use) shares `toolset` and
+    therefore its MCP connection, and one runner per agent serves all sessions. Sessions
+    live in one session service, in memory or in SQLite (see `create_session_service`).
+    Sessions idle for `session_ttl` seconds are evicted, and beyond `max_sessions` the least
+    recently used idle sessions go first, so memory stays bounded. Evicting forgets the
+    session in the pool; it is deleted from the service only with `delete_evicted`, which
+    defaults to on for an in-memory service and off for a persistent one.
+    Queries within a session run one at a time, `max_concurrent_queries` caps them overall.
+    A `response_cache` is shared by the runners of all models.
+
+    Usage:
+        pool = GeminiRunnerPool(toolset, model="gemini-2.5-flash", session_store="sqlite:///sessions.db")
+        answer = await pool.ask("user-1", "What is AAPL's P/E?")
+        ...
+        await pool.close()
+    """
+
+    def __init__(
+        self,
+        toolset: MCPToolset,
+        model: str,
+        app_name: str = "viaNexus_Agent",
+        session_service: Optional[BaseSessionService] = None,
+        session_store: Optional[str] = None,
+        session_ttl: Optional[float] = 3600.0,
+        max_sessions: int = 10_000,
+        max_concurrent_queries: int = 32,
+        response_cache: Optional[ResponseCache] = None,
+        delete_evicted: Optional[bool] = None,
+    ) -> None:
+        self.toolset = toolset
+        self.model = model
+        self.app_name = app_name
+        self.session_service = session_service or create_session_service(session_store)
+        self.session_ttl = session_ttl
+        self.max_sessions = max_sessions
+        self.response_cache = response_cache
+        if delete_evicted is None:
+            # Deleting is what frees an in-memory session; a persistent one is kept for later
+            delete_evicted = isinstance(self.session_service, InMemorySessionService)
+        self.delete_evicted = delete_evicted
+        self._runners: dict[str, GeminiRunner] = {}
+        self._sessions: OrderedDict[tuple[str, str], _SessionEntry] = OrderedDict()
+        self._query_slots = asyncio.Semaphore(max_concurrent_queries)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    async def runner(self, model: Optional[str] = None) -> GeminiRunner:
+        """The runner of `model` (the pool's default model if None), created on first use."""
+        model = model or self.model
+        runner = self._runners.get(model)
+        if runner is None:
+            agent = GeminiLLMAgent(model=model, tools=[self.toolset])
+            runner = GeminiRunner(
+                agent=agent,
+                user_id=None,
+                app_name=self.app_name,
+                session_id=None,
+                session_service=self.session_service,
+                response_cache=self.response_cache,
+            )
+            await runner.initialize()
+            self._runners[model] = runner
+        return runner
+
+    async def _session(self, user_id: str, session_id: str) -> _SessionEntry:
+        """Track the session, creating it in the service unless it exists there already."""
+        key = (user_id, session_id)
+        if key not in self._sessions:
+            await self.evict_expired()
+            if len(self._sessions) >= self.max_sessions:
+                await self._evict_lru(len(self._sessions) - self.max_sessions + 1)
+        entry = self._sessions.get(key)
+        if entry is None:
+            # Register before awaiting the service, later queries wait for this creation
+            entry = self._sessions[key] = _SessionEntry(last_active=time.monotonic())
+            try:
+                exists = await self.session_service.get_session(
+                    app_name=self.app_name, user_id=user_id, session_id=session_id
+                )
+                if exists is None:
+                    await self.session_service.create_session(
+                        app_name=self.app_name, user_id=user_id, session_id=session_id
+                    )
+            except BaseException:
+                if self._sessions.get(key) is entry:
+                    del self._sessions[key]
+                raise
+            finally:
+                entry.ready.set()
+        else:
+            await entry.ready.wait()
+            if self._sessions.get(key) is not entry:
+                # Creating it failed or it was ended meanwhile, start over
+                return await self._session(user_id, session_id)
+        entry.last_active = time.monotonic()
+        if key in self._sessions:
+            self._sessions.move_to_end(key)
+        return entry
+
+    async def stream(
+        self,
+        user_id: str,
+        query: str,
+        session_id: str = "default",
+        model: Optional[str] = None,
+        streaming: bool = True,
+    ) -> AsyncIterator[AgentEvent]:
+        """Answer `query` in the user's session, yielding typed agent events as they happen."""
+        runner = await self.runner(model)
+        entry = await self._session(user_id, session_id)
+        async with entry.lock, self._query_slots:
+            try:
+                async for event in runner.stream_async(
+                    query, streaming=streaming, session_id=session_id, user_id=user_id
+                ):
+                    yield event
+            finally:
+                entry.last_active = time.monotonic()
+
+    async def ask(
+        self, user_id: str, query: str, session_id: str = "default", model: Optional[str] = None
+    ) -> str:
+        """Answer `query` in the user's session and return the final text."""
+        text = ""
+        async for event in self.stream(user_id, query, session_id, model, streaming=False):
+            if isinstance(event, Final):
+                text = event.text
+        return text
+
+    async def end_session(self, user_id: str, session_id: str = "default") -> None:
+        """Forget a session and delete it from the session service."""
+        self._sessions.pop((user_id, session_id), None)
+        await self.session_service.delete_session(
+            app_name=self.app_name, user_id=user_id, session_id=session_id
+        )
+
+    async def evict_expired(self) -> int:
+        """Evict sessions idle for longer than `session_ttl`. Returns how many were evicted."""
+        if self.session_ttl is None:
+            return 0
+        cutoff = time.monotonic() - self.session_ttl
+        expired = [
+            key for key, entry in self._sessions.items()
+            if entry.last_active < cutoff and self._idle(entry)
+        ]
+        await self._evict(expired)
+        return len(expired)
+
+    async def _evict_lru(self, count: int) -> None:
+        # Ordered by last use, so the idle sessions at the front go first
+        victims = [key for key, entry in self._sessions.items() if self._idle(entry)][:count]
+        await self._evict(victims)
+
+    @staticmethod
+    def _idle(entry: _SessionEntry) -> bool:
+        return entry.ready.is_set() and not entry.lock.locked()
+
+    async def _evict(self, keys: list[tuple[str, str]]) -> None:
+        for key in keys:
+            self._sessions.pop(key, None)
+        if keys:
+            logging.debug("Evicted %s Gemini sessions, %s left", len(keys), len(self._sessions))
+        if not self.delete_evicted:
+            return
+        results = await asyncio.gather(
+            *(
+                self.session_service.delete_session(app_name=self.app_name, user_id=user_id, session_id=session_id)
+                for user_id, session_id in keys
+            ),
+            return_exceptions=True,
+        )
+        for key, result in zip(keys, results):
+            if isinstance(result, BaseException):
+                logging.warning("Could not delete Gemini session %s: %s", key, result)
+
+    async def close(self) -> None:
+        """Close the shared toolset connection. Persistent sessions are kept."""
+        self._sessions.clear()
+        self._runners.clear()
+        await self.toolset.close()
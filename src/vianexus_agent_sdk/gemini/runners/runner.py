@@ -1,35 +1,214 @@
 import logging
-from typing import Any, AsyncGenerator
+import time
+from typing import Any, AsyncGenerator, Optional
 from google.genai import types as genai_types
+from google.adk.agents.invocation_context import new_invocation_context_id
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.events import Event
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from google.adk.sessions import BaseSessionService, InMemorySessionService
+from vianexus_agent_sdk.clients.response_cache import CachedResponse, ResponseCache, response_cache_scope
 from vianexus_agent_sdk.gemini.agents.llm_agent import GeminiLLMAgent
+from vianexus_agent_sdk.gemini.tools.client_toolset import ClientMCPToolset
+from vianexus_agent_sdk.telemetry.tracing import get_telemetry
+from vianexus_agent_sdk.types.events import AgentEvent, Final, TextDelta, ToolCallStart, ToolResult, Usage
 
 
 class GeminiRunner(Runner):
-    def __init__(self, agent: GeminiLLMAgent, user_id: str, app_name: str, session_id: str):
+    def __init__(
+        self,
+        agent: GeminiLLMAgent,
+        user_id: Optional[str],
+        app_name: str,
+        session_id: Optional[str],
+        session_service: Optional[BaseSessionService] = None,
+        response_cache: Optional[ResponseCache] = None,
+    ):
         self.user_id = user_id
         self.app_name = app_name
         self.agent = agent
-        self.session_service = None
+        self.session_service = session_service
         self.runner = None
         self.session_id = session_id
+        self.response_cache = response_cache
     async def initialize(self):
-        self.session_service = InMemorySessionService()
-        await self.session_service.create_session(
-            user_id=self.user_id,
-            app_name=self.app_name,
-            session_id=self.session_id,
-        )
+        """
+        Set up the runner, with a private in-memory session service unless one was passed in.
+        The runner's own session is created unless it already exists, e.g. in a persistent store.
+        """
+        if self.session_service is None:
+            self.session_service = InMemorySessionService()
+        if self.session_id and await self.session_service.get_session(
+            app_name=self.app_name, user_id=self.user_id, session_id=self.session_id
+        ) is None:
+            await self.session_service.create_session(
+                user_id=self.user_id,
+                app_name=self.app_name,
+                session_id=self.session_id,
+            )
         super().__init__(
             app_name=self.app_name,
             agent=self.agent,
             session_service=self.session_service,
         )
 
+    def _cache_scope(self) -> str:
+        return response_cache_scope(
+            "gemini", getattr(self.agent, "model", None), getattr(self.agent, "instruction", None), self.app_name
+        )
+
+    async def _cached_answer(
+        self, query: str, session_id: Optional[str], user_id: Optional[str]
+    ) -> tuple[Optional[CachedResponse], bool]:
+        """
+        The response cache entry for `query` in the session, and whether the session already has
+        turns. A cached answer is recorded in the session so later turns can refer to it.
+        """
+        session = await self.session_service.get_session(
+            app_name=self.app_name, user_id=user_id or self.user_id, session_id=session_id or self.session_id
+        )
+        follow_up = bool(session is not None and session.events)
+        cached = await self.response_cache.lookup(
+            query, self._cache_scope(), follow_up=follow_up, identity=user_id or self.user_id
+        )
+        if cached is not None and session is not None:
+            invocation_id = new_invocation_context_id()
+            for author, role, text in (("user", "user", query), (self.agent.name, "model", cached.answer)):
+                await self.session_service.append_event(session, Event(
+                    invocation_id=invocation_id,
+                    author=author,
+                    content=genai_types.Content(role=role, parts=[genai_types.Part(text=text)]),
+                ))
+        return cached, follow_up
+
+    async def _cache_answer(
+        self, query: str, answer: str, tool_calls: list[tuple[str, dict]], follow_up: bool, user_id: Optional[str]
+    ) -> None:
+        # Tools served through a shared client carry that client's tool result cache
+        result_cache = next(
+            (t.client.result_cache for t in self.agent.tools if isinstance(t, ClientMCPToolset)), None
+        )
+        await self.response_cache.store(
+            query, self._cache_scope(), answer, tool_calls, result_cache, follow_up=follow_up,
+            identity=user_id or self.user_id,
+        )
+
     async def run_async(self, query: str) -> AsyncGenerator[Any, Any]:
+        if self.response_cache is not None:
+            cached, follow_up = await self._cached_answer(query, None, None)
+            if cached is not None:
+                yield [genai_types.Part(text=cached.answer)]
+                return
+        user_content = genai_types.Content(role='user', parts=[genai_types.Part(text=query)])
+        tool_calls: list[tuple[str, dict]] = []
+        tool_failed = False
+        answer = ""
+        with get_telemetry().span("agent.query", provider="gemini", model=getattr(self.agent, "model", None)) as span:
+            events = 0
+            async for event in super().run_async(user_id=self.user_id, session_id=self.session_id, new_message=user_content):
+                logging.debug(f"Runner Event: {event}")
+                events += 1
+                tool_calls.extend((call.name or "", dict(call.args or {})) for call in event.get_function_calls())
+                for response in event.get_function_responses():
+                    payload = response.response or {}
+                    if isinstance(payload, dict) and (payload.get("isError") or payload.get("error")):
+                        tool_failed = True
+                if event.is_final_response() and event.content and event.content.parts and event.content.parts[0].text:
+                    answer = event.content.parts[0].text
+                    yield event.content.parts
+            span.set_attribute("events", events)
+        if self.response_cache is not None and not tool_failed:
+            await self._cache_answer(query, answer, tool_calls, follow_up, None)
+
+    async def stream_async(
+        self,
+        query: str,
+        streaming: bool = True,
+        session_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> AsyncGenerator[AgentEvent, None]:
+        """
+        Run `query` and yield typed agent events: TextDelta, ToolCallStart, ToolResult,
+        Usage and a closing Final. With `streaming` the model output is streamed as
+        partial text chunks instead of arriving as whole messages. `session_id` (and
+        `user_id`) run the query in another existing session instead of the runner's own.
+        With a response cache a fresh cached answer is replayed without calling the model.
+        """
+        if self.response_cache is not None:
+            cached, follow_up = await self._cached_answer(query, session_id, user_id)
+            if cached is not None:
+                yield TextDelta(text=cached.answer)
+                yield Final(text=cached.answer, cached=True)
+                return
+        tool_calls: list[tuple[str, dict]] = []
+        tool_failed = False
         user_content = genai_types.Content(role='user', parts=[genai_types.Part(text=query)])
-        async for event in super().run_async(user_id=self.user_id, session_id=self.session_id, new_message=user_content):
-            logging.debug(f"Runner Event: {event}")
-            if event.is_final_response() and event.content and event.content.parts and event.content.parts[0].text:
-                yield event.content.parts
\ No newline at end of file
+        run_config = RunConfig(streaming_mode=StreamingMode.SSE if streaming else StreamingMode.NONE)
+        model = getattr(self.agent, "model", None)
+        telemetry = get_telemetry()
+        final_text = ""
+        streamed_partial = False
+        with telemetry.span("agent.query", provider="gemini", model=model) as span:
+            started = time.perf_counter()
+            first_token = True
+            tool_started: dict[str, float] = {}
+            usage = {"input_tokens": 0, "output_tokens": 0, "cache_read_input_tokens": 0}
+            async for event in super().run_async(
+                user_id=user_id or self.user_id,
+                session_id=session_id or self.session_id,
+                new_message=user_content,
+                run_config=run_config,
+            ):
+                logging.debug(f"Runner Event: {event}")
+                parts = event.content.parts if event.content and event.content.parts else []
+                text = "".join(p.text for p in parts if p.text and not getattr(p, "thought", False))
+                if text and first_token:
+                    first_token = False
+                    telemetry.record("agent.time_to_first_token", time.perf_counter() - started, provider="gemini")
+
+                if event.partial:
+                    if text:
+                        streamed_partial = True
+                        yield TextDelta(text=text)
+                    continue
+
+                # The closing non-partial event repeats text that was already streamed
+                if text and not streamed_partial:
+                    yield TextDelta(text=text)
+                streamed_partial = False
+
+                for call in event.get_function_calls():
+                    tool_calls.append((call.name or "", dict(call.args or {})))
+                    tool_started[call.id or call.name or ""] = time.perf_counter()
+                    yield ToolCallStart(id=call.id or "", name=call.name or "", arguments=dict(call.args or {}))
+                for response in event.get_function_responses():
+                    payload = response.response or {}
+                    is_error = bool(payload.get("isError") or payload.get("error")) if isinstance(payload, dict) else False
+                    tool_failed = tool_failed or is_error
+                    call_started = tool_started.pop(response.id or response.name or "", None)
+                    if call_started is not None:
+                        # ADK runs the tools itself, time them from the call to the response event
+                        telemetry.record("mcp.call_tool.duration", time.perf_counter() - call_started, tool=response.name or "")
+                    yield ToolResult(
+                        id=response.id or "",
+                        name=response.name or "",
+                        content=payload,
+                        is_error=is_error,
+                    )
+                if event.usage_metadata:
+                    event_usage = Usage(
+                        input_tokens=event.usage_metadata.prompt_token_count or 0,
+                        output_tokens=event.usage_metadata.candidates_token_count or 0,
+                        cache_read_input_tokens=event.usage_metadata.cached_content_token_count or 0,
+                        model=model,
+                    )
+                    for key in usage:
+                        usage[key] += getattr(event_usage, key)
+                    yield event_usage
+                if event.is_final_response() and text:
+                    final_text = text
+            span.set_attributes(**usage)
+
+        if self.response_cache is not None and not tool_failed:
+            await self._cache_answer(query, final_text, tool_calls, follow_up, user_id)
+        yield Final(text=final_text)
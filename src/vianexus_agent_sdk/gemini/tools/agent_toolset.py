@@ -1,9 +1,71 @@
+from typing import Any, List, Optional
+
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.tools.base_tool import BaseTool
 from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset
 from google.adk.tools.mcp_tool.mcp_toolset import StreamableHTTPConnectionParams
+from google.adk.tools.tool_context import ToolContext
+from mcp import types
+from pydantic import ValidationError
+
+from vianexus_agent_sdk.mcp_client.result_cache import ToolResultCache
+
+
+class CachedMCPTool(BaseTool):
+    """
+    Wraps an MCP tool so its calls go through a shared `ToolResultCache`. Results are cached
+    as `CallToolResult`s and handed back in the shape the wrapped tool returns them.
+    """
+
+    def __init__(self, tool: BaseTool, result_cache: ToolResultCache):
+        super().__init__(
+            name=tool.name,
+            description=tool.description,
+            is_long_running=tool.is_long_running,
+        )
+        self._tool = tool
+        self._result_cache = result_cache
+        self._returns_dict = False
+
+    async def process_llm_request(self, *, tool_context: ToolContext, llm_request: LlmRequest) -> None:
+        await self._tool.process_llm_request(tool_context=tool_context, llm_request=llm_request)
+        # The wrapped tool registers itself, route the model's calls through the cache instead
+        if llm_request.tools_dict.get(self.name) is self._tool:
+            llm_request.tools_dict[self.name] = self
+
+    async def _call(self, args: dict[str, Any], tool_context: ToolContext) -> Any:
+        result = await self._tool.run_async(args=args, tool_context=tool_context)
+        if isinstance(result, dict):
+            self._returns_dict = True
+            try:
+                return types.CallToolResult.model_validate(result)
+            except ValidationError:
+                return result
+        return result
+
+    async def run_async(self, *, args: dict[str, Any], tool_context: ToolContext) -> Any:
+        result = await self._result_cache.get_or_call(
+            self.name, args, lambda: self._call(args, tool_context)
+        )
+        if self._returns_dict and isinstance(result, types.CallToolResult):
+            return result.model_dump(exclude_none=True, mode="json")
+        return result
 
 
 class GeminiAgentToolset(MCPToolset):
-    def __init__(self, connection_params: StreamableHTTPConnectionParams):
+    def __init__(
+        self,
+        connection_params: StreamableHTTPConnectionParams,
+        result_cache: Optional[ToolResultCache] = None,
+    ):
         super().__init__(
             connection_params=connection_params
-        )
\ No newline at end of file
+        )
+        self.result_cache = result_cache
+
+    async def get_tools(self, readonly_context: Optional[ReadonlyContext] = None) -> List[BaseTool]:
+        tools = await super().get_tools(readonly_context)
+        if self.result_cache is None:
+            return tools
+        return [CachedMCPTool(tool, self.result_cache) for tool in tools]
@@ -0,0 +1,52 @@
+from typing import Any, List, Optional
+
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.tools._gemini_schema_util import _to_gemini_schema
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.base_toolset import BaseToolset
+from google.adk.tools.tool_context import ToolContext
+from google.genai.types import FunctionDeclaration
+from mcp import types
+
+from vianexus_agent_sdk.mcp_client.enhanced_mcp_client import MCPConnection
+
+
+class ClientMCPTool(BaseTool):
+    """An MCP tool called through an `MCPConnection`, with its caches, batching and rate limits."""
+
+    def __init__(self, tool: types.Tool, client: MCPConnection):
+        super().__init__(name=tool.name, description=tool.description or "")
+        self._tool = tool
+        self._client = client
+
+    def _get_declaration(self) -> FunctionDeclaration:
+        return FunctionDeclaration(
+            name=self.name,
+            description=self.description,
+            parameters=_to_gemini_schema(self._tool.inputSchema),
+        )
+
+    async def run_async(self, *, args: dict[str, Any], tool_context: ToolContext) -> Any:
+        result = await self._client.call_tool(self.name, args)
+        return result.model_dump(mode="json", exclude_none=True)
+
+
+class ClientMCPToolset(BaseToolset):
+    """
+    The tools of a connected `MCPConnection` for a Gemini agent, so Gemini shares the
+    client's MCP session (and tool catalog) instead of opening its own. The client owns
+    the connection: closing the toolset leaves it open.
+    """
+
+    def __init__(self, client: MCPConnection, tool_filter: Optional[List[str]] = None):
+        super().__init__(tool_filter=tool_filter)
+        self.client = client
+
+    async def get_tools(self, readonly_context: Optional[ReadonlyContext] = None) -> List[BaseTool]:
+        # Refreshes the client's catalog when it is stale
+        await self.client.get_tools()
+        tools = [ClientMCPTool(tool, self.client) for tool in self.client.tool_catalog.tools]
+        return [tool for tool in tools if self._is_tool_selected(tool, readonly_context)]
+
+    async def close(self) -> None:
+        pass
@@ -6,44 +6,54 @@ from abc import ABC, abstractmethod
 from contextlib import AsyncExitStack
 from typing import Any, Optional
 
-from mcp import ClientSession
+from mcp import ClientSession, types
 
+from vianexus_agent_sdk.telemetry.tracing import get_telemetry
 
-class BaseMCPClient(ABC):
+from .tool_catalog import ToolCatalog
+
+
+class BaseMCPConnection:
     """
-    Base client for MCP connections and an interactive chat loop.
-    Subclasses implement `process_query`.
+    An MCP session with its tool catalog, without any chat API. Used on its own where
+    only tools are needed, e.g. for the servers of a federation.
     """
 
-    def __init__(self, readstream: Any, writestream: Any) -> None:
+    def __init__(
+        self,
+        readstream: Any,
+        writestream: Any,
+        tool_cache_ttl: Optional[float] = 300.0,
+    ) -> None:
         self.session: Optional[ClientSession] = None
         self._exit_stack = AsyncExitStack()
         self.readstream = readstream
         self.writestream = writestream
+        self.tool_catalog = ToolCatalog(ttl=tool_cache_ttl, formatter=self._format_tool)
 
     @property
     def is_connected(self) -> bool:
         return self.session is not None
 
-    async def _ainput(self, prompt: str) -> str:
-        # Non-blocking input so the loop plays nicely with asyncio
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, lambda: input(prompt))
-
     async def connect_to_server(self) -> bool:
         """
-        Connect and initialize the MCP session. Logs tool names on success.
+        Connect and initialize the MCP session. Primes the tool catalog on success.
         """
         try:
             self.session = await self._exit_stack.enter_async_context(
-                ClientSession(self.readstream, self.writestream)
+                ClientSession(
+                    self.readstream,
+                    self.writestream,
+                    message_handler=self._handle_message,
+                )
             )
-            await self.session.initialize()
+            with get_telemetry().span("mcp.initialize"):
+                await self.session.initialize()
 
-            # Optional: list available tools for visibility
+            # Prime the tool catalog so the first query does not pay for discovery
             try:
-                response = await self.session.list_tools()
-                tools = getattr(response, "tools", []) or []
+                tools = await self._fetch_tools()
+                self.tool_catalog.update(tools)
                 logging.debug("Connected. Tools: %s", [t.name for t in tools])
             except Exception as tool_err:
                 logging.debug("Tool discovery failed: %s", tool_err)
@@ -53,6 +63,60 @@ class BaseMCPClient(ABC):
             logging.error("Failed to connect to MCP server: %s", e)
             return False
 
+    async def _fetch_tools(self) -> list[types.Tool]:
+        """List every tool on the server, following pagination cursors."""
+        tools: list[types.Tool] = []
+        cursor: Optional[str] = None
+        with get_telemetry().span("mcp.list_tools") as span:
+            pages = 0
+            while True:
+                response = await self.session.list_tools(cursor=cursor)
+                pages += 1
+                tools.extend(getattr(response, "tools", []) or [])
+                cursor = getattr(response, "nextCursor", None)
+                if not cursor:
+                    span.set_attributes(pages=pages, tools=len(tools))
+                    return tools
+
+    async def get_tools(self) -> list[Any]:
+        """
+        Return the converted tool schemas from the catalog, refreshing it
+        when the TTL has expired or the server announced a change.
+        """
+        return await self.tool_catalog.get(self._fetch_tools)
+
+    def _format_tool(self, tool: types.Tool) -> Any:
+        """Convert an MCP tool into the schema the LLM expects. Subclasses override."""
+        return tool
+
+    async def _handle_message(self, message: Any) -> None:
+        """Handle server-initiated messages from the MCP session."""
+        if isinstance(message, types.ServerNotification):
+            if isinstance(message.root, types.ToolListChangedNotification):
+                logging.debug("Server tool list changed, invalidating tool catalog")
+                self.tool_catalog.invalidate()
+        elif isinstance(message, Exception):
+            logging.debug("MCP session error: %s", message)
+            self._on_session_error(message)
+
+    def _on_session_error(self, error: Exception) -> None:
+        """Called for transport errors reported by the session. Subclasses may reconnect."""
+
+    async def cleanup(self) -> None:
+        await self._exit_stack.aclose()
+
+
+class BaseMCPClient(BaseMCPConnection, ABC):
+    """
+    Base client for MCP connections and an interactive chat loop.
+    Subclasses implement `process_query`.
+    """
+
+    async def _ainput(self, prompt: str) -> str:
+        # Non-blocking input so the loop plays nicely with asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: input(prompt))
+
     async def chat_loop(self) -> None:
         """
         Simple REPL loop. Type 'quit' to exit.
@@ -89,6 +153,3 @@ class BaseMCPClient(ABC):
     async def process_query(self, query: str) -> str:
         """Implement model/tool-specific query handling."""
         raise NotImplementedError
-
-    async def cleanup(self) -> None:
-        await self._exit_stack.aclose()
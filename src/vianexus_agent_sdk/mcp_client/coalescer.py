@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from mcp import types
+
+from vianexus_agent_sdk.telemetry.tracing import get_telemetry
+from vianexus_agent_sdk.types.config import ToolCoalescingConfig
+
+# Key of a tool's `_meta` under which a server declares the tool's batch form
+BATCH_META_KEY = "vianexus/batch"
+
+ToolCall = Callable[[str, Optional[dict[str, Any]]], Awaitable[types.CallToolResult]]
+
+
+@dataclass(frozen=True)
+class BatchForm:
+    """
+    How calls of a tool fold into one call of a bulk tool: `tool(argument=x)` for several x
+    becomes `bulk_tool(batch_argument=[x, ...])` with the other arguments unchanged. The bulk
+    result (its structured content, or its text parsed as JSON, or the `results` key of
+    either) is a list in request order or a mapping keyed by the values.
+    """
+
+    tool: str
+    argument: str
+    batch_argument: str
+    results: Optional[str] = None
+
+    @classmethod
+    def parse(cls, spec: Any) -> Optional["BatchForm"]:
+        if spec is None or isinstance(spec, BatchForm):
+            return spec
+        try:
+            return cls(
+                tool=spec["tool"],
+                argument=spec["argument"],
+                batch_argument=spec.get("batch_argument") or f"{spec['argument']}s",
+                results=spec.get("results"),
+            )
+        except (KeyError, TypeError, AttributeError):
+            logging.warning("Ignoring invalid batch form: %r", spec)
+            return None
+
+
+@dataclass
+class _Group:
+    """Calls waiting to be sent as one bulk request."""
+
+    form: BatchForm
+    base: dict[str, Any]
+    call: ToolCall
+    idempotent: bool = False
+    values: dict[str, Any] = field(default_factory=dict)
+    waiters: dict[str, list[asyncio.Future]] = field(default_factory=dict)
+    timer: Optional[asyncio.TimerHandle] = None
+
+    def add(self, value: Any) -> asyncio.Future:
+        key = json.dumps(value, sort_keys=True)
+        if not self.idempotent:
+            # Each call of a tool with side effects keeps its own slot in the bulk request
+            key = f"{len(self.values)}:{key}"
+        self.values.setdefault(key, value)
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(key, []).append(waiter)
+        return waiter
+
+
+def _json(result: types.CallToolResult) -> Any:
+    if result.structuredContent is not None:
+        data = result.structuredContent
+        # FastMCP wraps results that are not objects as {"result": ...}
+        if isinstance(data, dict) and set(data) == {"result"}:
+            return data["result"]
+        return data
+    for block in result.content:
+        if isinstance(block, types.TextContent):
+            try:
+                return json.loads(block.text)
+            except ValueError:
+                return None
+    return None
+
+
+def _item_result(item: Any) -> types.CallToolResult:
+    return types.CallToolResult(
+        content=[types.TextContent(type="text", text=json.dumps(item))],
+        structuredContent=item if isinstance(item, dict) else None,
+    )
+
+
+def _unsplit(form: BatchForm, bulk: types.CallToolResult | Exception, value: Any) -> types.CallToolResult | Exception:
+    """What a caller gets when the bulk call has no result for its value and is not replayed."""
+    if isinstance(bulk, Exception) or bulk.isError:
+        return bulk
+    return types.CallToolResult(
+        content=[types.TextContent(type="text", text=f"Bulk call {form.tool} returned no result for {value!r}")],
+        isError=True,
+    )
+
+
+class ToolCallCoalescer:
+    """
+    Merges concurrent MCP tool calls before they reach the session.
+
+    Calls of a tool with a batch form (from `batch_tools`, or declared by the server in the
+    tool's `_meta["vianexus/batch"]`) that arrive within `window` seconds of each other and
+    differ only in the batched argument are sent as one bulk call of up to `max_batch`
+    values, and the bulk result is split back out to the callers. For idempotent tools,
+    identical values are sent once, and a value the bulk result has no entry for, or a bulk
+    call that fails, falls back to single calls, so callers see the same results and errors
+    as without batching. Other tools send every call's value and are never replayed: the
+    callers get the bulk call's error instead. With `share_inflight`, identical concurrent
+    calls of an idempotent tool share one request. Every other call goes straight
+    through; the MCP session already keeps many requests in flight on the shared pool.
+    """
+
+    def __init__(
+        self,
+        window: float = 0.005,
+        max_batch: int = 50,
+        batch_tools: Optional[dict[str, Any]] = None,
+        share_inflight: bool = True,
+    ) -> None:
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self.batch_tools = {name: BatchForm.parse(spec) for name, spec in (batch_tools or {}).items()}
+        self.share_inflight = share_inflight
+        self.batches = 0
+        self.batched_calls = 0
+        self.shared = 0
+        self.fallbacks = 0
+        self._groups: dict[str, _Group] = {}
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def from_config(
+        cls, config: ToolCoalescingConfig | "ToolCallCoalescer" | bool | None
+    ) -> Optional["ToolCallCoalescer"]:
+        """Build a coalescer from a config dict. An existing one is returned as is, False disables it."""
+        if config is False:
+            return None
+        if isinstance(config, ToolCallCoalescer):
+            return config
+        config = config if isinstance(config, dict) else {}
+        return cls(
+            window=config.get("window", 0.005),
+            max_batch=config.get("max_batch", 50),
+            batch_tools=config.get("batch_tools"),
+            share_inflight=config.get("share_inflight", True),
+        )
+
+    def batch_form(self, name: str, tools: list[types.Tool]) -> Optional[BatchForm]:
+        """The batch form of tool `name`, from `batch_tools` or the tool's metadata."""
+        if name in self.batch_tools:
+            return self.batch_tools[name]
+        for tool in tools:
+            if tool.name == name:
+                return BatchForm.parse((tool.meta or {}).get(BATCH_META_KEY))
+        return None
+
+    async def call(
+        self,
+        name: str,
+        arguments: Optional[dict[str, Any]],
+        call: ToolCall,
+        form: Optional[BatchForm] = None,
+        share: bool = False,
+        scope: str = "",
+    ) -> types.CallToolResult:
+        """
+        Run `call(name, arguments)`, batched with similar calls by `form` or shared if `share`.
+        Only calls of the same `scope` (the server) are merged, and identical values only
+        when `share` (the tool is idempotent).
+        """
+        value = (arguments or {}).get(form.argument) if form is not None else None
+        if isinstance(value, (str, int, float, bool)) and self.max_batch > 1:
+            return await self._enqueue(scope, name, arguments, call, form, value, share)
+        if share and self.share_inflight:
+            return await self._shared(scope, name, arguments, call)
+        return await call(name, arguments)
+
+    async def _shared(
+        self, scope: str, name: str, arguments: Optional[dict[str, Any]], call: ToolCall
+    ) -> types.CallToolResult:
+        key = f"{scope}/{name}:{json.dumps(arguments or {}, sort_keys=True, separators=(',', ':'), default=str)}"
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.ensure_future(call(name, arguments))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.shared += 1
+        # Shield so a cancelled caller does not abort the request of the others
+        return await asyncio.shield(task)
+
+    async def _enqueue(
+        self,
+        scope: str,
+        name: str,
+        arguments: dict[str, Any],
+        call: ToolCall,
+        form: BatchForm,
+        value: Any,
+        idempotent: bool,
+    ) -> types.CallToolResult:
+        base = {k: v for k, v in arguments.items() if k != form.argument}
+        key = f"{scope}/{name}:{json.dumps(base, sort_keys=True, separators=(',', ':'), default=str)}"
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = _Group(form=form, base=base, call=call, idempotent=idempotent)
+            group.timer = asyncio.get_running_loop().call_later(self.window, self._flush, key, name)
+        waiter = group.add(value)
+        if len(group.values) >= self.max_batch:
+            self._flush(key, name)
+        return await waiter
+
+    def _flush(self, key: str, name: str) -> None:
+        group = self._groups.pop(key, None)
+        if group is None:
+            return
+        if group.timer is not None:
+            group.timer.cancel()
+        asyncio.ensure_future(self._run(name, group))
+
+    async def _run(self, name: str, group: _Group) -> None:
+        form = group.form
+        keys = list(group.values)
+        results: dict[str, Any] = {}
+        if len(keys) > 1:
+            values = [group.values[k] for k in keys]
+            self.batches += 1
+            self.batched_calls += sum(len(w) for w in group.waiters.values())
+            get_telemetry().record("mcp.coalesce.batch_size", len(keys), tool=name)
+            bulk: types.CallToolResult | Exception
+            try:
+                bulk = await group.call(form.tool, {**group.base, form.batch_argument: values})
+                results = self._split(form, bulk, keys, values)
+            except Exception as e:
+                bulk = e
+                logging.warning("Bulk call %s of %s failed: %s", form.tool, name, e)
+            missing = [k for k in keys if k not in results]
+            if missing and not group.idempotent:
+                # Replaying could repeat side effects, report the bulk call's outcome instead
+                for k in missing:
+                    results[k] = _unsplit(form, bulk, group.values[k])
+            elif missing:
+                self.fallbacks += len(missing)
+
+        async def single(k: str) -> None:
+            try:
+                results[k] = await group.call(name, {**group.base, form.argument: group.values[k]})
+            except Exception as e:
+                results[k] = e
+
+        await asyncio.gather(*(single(k) for k in keys if k not in results))
+        for k, waiters in group.waiters.items():
+            for waiter in waiters:
+                if waiter.done():
+                    continue
+                if isinstance(results[k], BaseException):
+                    waiter.set_exception(results[k])
+                else:
+                    waiter.set_result(results[k])
+
+    @staticmethod
+    def _split(
+        form: BatchForm, bulk: types.CallToolResult, keys: list[str], values: list[Any]
+    ) -> dict[str, types.CallToolResult]:
+        """Per-value results of a bulk call, leaving out values it has no entry for."""
+        if bulk.isError:
+            logging.warning("Bulk call %s returned an error", form.tool)
+            return {}
+        data = _json(bulk)
+        if form.results is not None and isinstance(data, dict):
+            data = data.get(form.results)
+        if isinstance(data, list) and len(data) == len(values):
+            return {k: _item_result(item) for k, item in zip(keys, data) if item is not None}
+        if isinstance(data, dict):
+            items = {k: data.get(str(v)) for k, v in zip(keys, values)}
+            return {k: _item_result(item) for k, item in items.items() if item is not None}
+        logging.warning("Unexpected result shape from bulk call %s", form.tool)
+        return {}
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "batched_calls": self.batched_calls,
+            "shared": self.shared,
+            "fallbacks": self.fallbacks,
+        }
@@ -1,18 +1,32 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Optional
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
 
+import httpx
+from mcp import types
+
+from vianexus_agent_sdk.ratelimit.governor import RateGovernor, is_throttle
+from vianexus_agent_sdk.telemetry.tracing import get_telemetry
 from vianexus_agent_sdk.types.config import BaseConfig
 
-from .base_mcp_client import BaseMCPClient
+from .base_mcp_client import BaseMCPClient, BaseMCPConnection
+from .coalescer import ToolCallCoalescer
+from .result_cache import ToolResultCache, _estimate_size
 from .streamable_http import StreamableHttpSetup
+from .supervisor import SupervisedConnection, is_connection_error
 
 
-class EnhancedMCPClient(BaseMCPClient):
+class MCPConnection(BaseMCPConnection):
     """
-    High-level client that owns auth + transport setup.
-    Subclasses still implement `process_query`.
+    High-level MCP connection that owns auth + transport setup, reconnects, caches and
+    rate limits, without a chat API. `EnhancedMCPClient` adds one on top.
+
+    With a `servers` mapping in the config the connection federates several MCP servers
+    instead, see `MCPFederation`.
     """
 
     def __init__(
@@ -21,11 +35,49 @@ class EnhancedMCPClient(BaseMCPClient):
         connection_manager: Optional[StreamableHttpSetup] = None,
     ) -> None:
         self.config = config
-        self.connection_manager = (
-            connection_manager or StreamableHttpSetup.from_config(config)
+        self.governor = RateGovernor.from_config(config.get("rate_limits"))
+        self.federation = None
+        if config.get("servers"):
+            # Imported here, federation members are themselves MCPConnections
+            from .federation import MCPFederation
+
+            self.federation = MCPFederation(
+                config["servers"],
+                separator=config.get("tool_namespace_separator", "__"),
+                # Members share this client's governor
+                defaults={**config, "rate_limits": self.governor},
+            )
+            self.federation.on_tools_changed = lambda: self.tool_catalog.invalidate()
+        self.connection_manager = connection_manager or (
+            None if self.federation else StreamableHttpSetup.from_config(config)
         )
         self.auth_layer = None
-        super().__init__(readstream=None, writestream=None)
+        self.result_cache = ToolResultCache.from_config(config.get("tool_result_cache"))
+        self.coalescer = ToolCallCoalescer.from_config(config.get("tool_coalescing"))
+        self.supervisor: Optional[SupervisedConnection] = None
+        self.idempotent_tools = set(config.get("idempotent_tools") or ())
+        self.tool_call_retries = config.get("tool_call_retries", 2)
+        super().__init__(
+            readstream=None,
+            writestream=None,
+            tool_cache_ttl=config.get("tool_cache_ttl", 300.0),
+        )
+
+    @property
+    def is_connected(self) -> bool:
+        if self.federation is not None:
+            return self.federation.is_connected
+        return self.session is not None
+
+    @property
+    def server_key(self) -> str:
+        """Name of this client's MCP server in `rate_limits["servers"]`."""
+        return f"{self.connection_manager.server}:{self.connection_manager.port}"
+
+    async def _fetch_tools(self) -> list[types.Tool]:
+        if self.federation is not None:
+            return await self.federation.list_tools()
+        return await super()._fetch_tools()
 
     async def setup_connection(self) -> bool:
         try:
@@ -35,38 +87,222 @@ class EnhancedMCPClient(BaseMCPClient):
             logging.error("Failed to setup connection: %s", e)
             return False
 
-    async def run(self) -> bool:
-        if not await self.setup_connection():
-            return False
+    async def call_tool(
+        self,
+        name: str,
+        arguments: Optional[dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> types.CallToolResult:
+        """
+        Call a tool on the MCP session, going through the result cache when one is configured,
+        then the coalescer and the rate governor. `timeout` bounds the whole call, retries
+        included.
+        """
+        if self.federation is not None:
+            # Members apply their own cache, retries and instrumentation
+            return await self.federation.call_tool(name, arguments, timeout)
+        telemetry = get_telemetry()
+        with telemetry.span("mcp.call_tool", tool=name) as span:
+            if self.result_cache is None:
+                result = await self._coalesced_call_tool(name, arguments, timeout)
+            else:
+                called = []
+
+                def call():
+                    called.append(True)
+                    return self._coalesced_call_tool(name, arguments, timeout)
+
+                result = await self.result_cache.get_or_call(name, arguments, call)
+                span.set_attribute("cache_hit", not called)
+            span.set_attribute("is_error", bool(result.isError))
+            if telemetry.enabled:
+                size = _estimate_size(result)
+                span.set_attribute("payload_bytes", size)
+                telemetry.record("mcp.call_tool.payload_bytes", size, tool=name)
+            return result
+
+    async def _coalesced_call_tool(
+        self, name: str, arguments: Optional[dict[str, Any]], timeout: Optional[float]
+    ) -> types.CallToolResult:
+        """Batch the call with similar ones if the tool has a batch form, share identical idempotent calls."""
+        if self.coalescer is None:
+            return await self._governed_call_tool(name, arguments, timeout)
+        return await self.coalescer.call(
+            name,
+            arguments,
+            lambda tool, args: self._governed_call_tool(tool, args, timeout),
+            form=self.coalescer.batch_form(name, self.tool_catalog.tools),
+            share=self.is_idempotent(name),
+            scope=self.server_key,
+        )
+
+    async def _governed_call_tool(
+        self, name: str, arguments: Optional[dict[str, Any]], timeout: Optional[float]
+    ) -> types.CallToolResult:
+        """
+        Call the tool within the server's rate limit and the tool's circuit breaker. Throttles
+        are retried for every tool, other transient errors only for idempotent tools, all
+        within one `timeout`.
+        """
+        breaker = self.governor.breaker(f"{self.server_key}/{name}")
+        trial = breaker.check()
 
+        governed = self.governor.call(
+            lambda: self._session_call_tool(name, arguments),
+            server=self.server_key,
+            retry=lambda e: is_throttle(e) or self.is_idempotent(name),
+        )
         try:
-            async with self.connection_manager.connection_context() as (
-                readstream,
-                writestream,
-                get_session_id,
-            ):
-                logging.debug("HTTP transport established")
-                self.readstream = readstream
-                self.writestream = writestream
-
-                if not await self.connect_to_server():
-                    logging.error("Failed to initialize MCP session")
-                    return False
-
-                # Optional: log session id if available
+            result = await (asyncio.wait_for(governed, timeout=timeout) if timeout else governed)
+        except Exception:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # Cancelled without an outcome, let the next call be the trial
+            if trial:
+                breaker.release_trial()
+            raise
+        breaker.record_success()
+        return result
+
+    async def _session_call_tool(
+        self, name: str, arguments: Optional[dict[str, Any]]
+    ) -> types.CallToolResult:
+        """
+        Call the tool, retrying idempotent tools on a fresh session if the connection drops.
+        A drop caused by the server throttling the call is raised as that HTTP error instead,
+        so the governor pauses and retries it.
+        """
+        retries = self.tool_call_retries if self.is_idempotent(name) else 0
+        attempt = 0
+        while True:
+            await self.ensure_connected()
+            started = time.monotonic()
+            try:
+                return await self.session.call_tool(name, arguments)
+            except Exception as e:
+                throttle = (
+                    self.connection_manager.throttled_since(started)
+                    if self.connection_manager is not None and is_connection_error(e)
+                    else None
+                )
+                if throttle is not None:
+                    if self.supervisor is not None:
+                        self.supervisor.connection_lost(e)
+                    raise httpx.HTTPStatusError(
+                        f"MCP server throttled tool {name}: HTTP {throttle.status_code}",
+                        request=throttle.request,
+                        response=throttle,
+                    ) from e
+                if self.supervisor is None or not is_connection_error(e) or attempt >= retries:
+                    raise
+                attempt += 1
+                logging.warning("Retrying tool %s after connection error: %s", name, e)
+                self.supervisor.connection_lost(e)
+
+    def is_idempotent(self, name: str) -> bool:
+        """True if the tool is safe to repeat: listed in `idempotent_tools` or annotated so by the server."""
+        if name in self.idempotent_tools:
+            return True
+        for tool in self.tool_catalog.tools:
+            if tool.name == name and tool.annotations is not None:
+                return bool(tool.annotations.readOnlyHint or tool.annotations.idempotentHint)
+        return False
+
+    async def ensure_connected(self, timeout: Optional[float] = None) -> None:
+        """Wait for a live MCP session, riding out a reconnect in progress."""
+        if self.federation is not None:
+            await self.federation.ensure_connected(timeout)
+        elif self.supervisor is not None:
+            await self.supervisor.wait_ready(
+                timeout if timeout is not None else self.config.get("reconnect_timeout", 60.0)
+            )
+        elif self.session is None:
+            raise RuntimeError("MCP session not initialized.")
+
+    def _on_session_error(self, error: Exception) -> None:
+        if self.supervisor is not None and is_connection_error(error):
+            self.supervisor.connection_lost(error)
+
+    @asynccontextmanager
+    async def connect(self) -> AsyncIterator["MCPConnection"]:
+        """
+        Authenticate, open the transport and initialize the MCP session for the
+        duration of the block. Use this to drive the client programmatically.
+        """
+        if self.federation is not None:
+            async with self.federation.connect():
+                # Prime the merged catalog now that every server is up
+                self.tool_catalog.update(await self._fetch_tools())
                 try:
-                    sid = get_session_id() if get_session_id else None
-                    if sid:
-                        logging.debug("Session ID: %s", sid)
-                except Exception as _:
-                    pass
+                    yield self
+                finally:
+                    self.tool_catalog.invalidate()
+            return
+
+        if not await self.setup_connection():
+            raise RuntimeError("Failed to setup connection")
+
+        if self.config.get("reconnect", True):
+            self.supervisor = SupervisedConnection(
+                self,
+                self.connection_manager,
+                max_attempts=self.config.get("max_reconnect_attempts"),
+                initial_backoff=self.config.get("reconnect_backoff", 0.5),
+                max_backoff=self.config.get("reconnect_max_backoff", 30.0),
+                resume_sessions=self.config.get("resume_sessions", True),
+            )
+            try:
+                await self.supervisor.start()
+                logging.debug("Session ID: %s", self.supervisor.session_id)
+                yield self
+            finally:
+                await self.supervisor.close()
+                self.supervisor = None
+            return
+
+        async with self.connection_manager.connection_context() as (
+            readstream,
+            writestream,
+            get_session_id,
+        ):
+            logging.debug("HTTP transport established")
+            self.readstream = readstream
+            self.writestream = writestream
+
+            if not await self.connect_to_server():
+                raise RuntimeError("Failed to initialize MCP session")
+
+            # Optional: log session id if available
+            try:
+                sid = get_session_id() if get_session_id else None
+                if sid:
+                    logging.debug("Session ID: %s", sid)
+            except Exception as _:
+                pass
+
+            try:
+                yield self
+            finally:
+                await self.cleanup()
+                self.session = None
+
+    async def cleanup(self) -> None:
+        await super().cleanup()
 
+
+class EnhancedMCPClient(MCPConnection, BaseMCPClient):
+    """
+    High-level client that owns auth + transport setup.
+    Subclasses still implement `process_query`.
+    """
+
+    async def run(self) -> bool:
+        try:
+            async with self.connect():
                 await self.chat_loop()
         except Exception as e:
             logging.error("Connection setup failed: %s", e)
             return False
 
         return True
-
-    async def cleanup(self) -> None:
-        await super().cleanup()
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Optional
+
+from mcp import types
+
+from vianexus_agent_sdk.providers.oauth import find_free_port
+from vianexus_agent_sdk.servers.callback.async_callback_server import AsyncCallbackServer
+from vianexus_agent_sdk.types.config import BaseConfig
+
+from .enhanced_mcp_client import MCPConnection
+
+# Tool names the LLM APIs accept
+_TOOL_NAME = re.compile(r"^[a-zA-Z0-9_-]{1,64}$")
+
+
+class FederationMember(MCPConnection):
+    """The connection to one server of a federation, with its own auth layer, session and caches."""
+
+    def __init__(self, name: str, config: BaseConfig) -> None:
+        self.name = name
+        self.on_tools_changed: Optional[Callable[[], None]] = None
+        super().__init__(config)
+
+    async def _handle_message(self, message: Any) -> None:
+        await super()._handle_message(message)
+        if (
+            isinstance(message, types.ServerNotification)
+            and isinstance(message.root, types.ToolListChangedNotification)
+            and self.on_tools_changed
+        ):
+            self.on_tools_changed()
+
+    @property
+    def server_key(self) -> str:
+        return self.name
+
+
+class MCPFederation:
+    """
+    Sessions to several MCP servers, kept open at once, behind one tool namespace.
+
+    Each server's tools are exposed as `<server><separator><tool>` and calls are routed to
+    the owning session, so calls to different servers run concurrently. All members share
+    one OAuth callback listener and the process-wide HTTP pool. A server that cannot be
+    reached at connect time is left out (and logged) unless no server can be reached.
+    Keys of `defaults` (e.g. the client config) apply to every server unless overridden.
+    """
+
+    def __init__(
+        self,
+        servers: dict[str, BaseConfig],
+        separator: str = "__",
+        defaults: Optional[dict[str, Any]] = None,
+    ) -> None:
+        if not servers:
+            raise ValueError("A federation needs at least one server")
+        self.separator = separator
+        self.members: dict[str, FederationMember] = {}
+        storages: dict[int, str] = {}
+        for name, config in servers.items():
+            if separator in name or not _TOOL_NAME.match(name):
+                raise ValueError(f"Invalid server name {name!r}: use letters, digits, '-' or '_' without {separator!r}")
+            shared = {k: v for k, v in (defaults or {}).items() if k != "servers"}
+            member = FederationMember(name, {**shared, **config})
+            # "file" and "sqlite" storages are namespaced per server, one instance would mix their tokens
+            storage = member.connection_manager.token_storage
+            if id(storage) in storages:
+                raise ValueError(
+                    f"Servers {storages[id(storage)]!r} and {name!r} share one TokenStorage instance: "
+                    "give each server its own, or pass a factory `namespace -> TokenStorage`"
+                )
+            storages[id(storage)] = name
+            self.members[name] = member
+        self.on_tools_changed: Optional[Callable[[], None]] = None
+        self.callback_server: Optional[AsyncCallbackServer] = None
+        for member in self.members.values():
+            member.on_tools_changed = self._tools_changed
+
+    def _tools_changed(self) -> None:
+        if self.on_tools_changed:
+            self.on_tools_changed()
+
+    @property
+    def connected(self) -> dict[str, FederationMember]:
+        return {name: m for name, m in self.members.items() if m.is_connected or m.supervisor is not None}
+
+    @property
+    def is_connected(self) -> bool:
+        return bool(self.connected)
+
+    @asynccontextmanager
+    async def connect(self) -> AsyncIterator["MCPFederation"]:
+        """Connect every server for the duration of the block."""
+        self.callback_server = AsyncCallbackServer(port=find_free_port())
+        await self.callback_server.start()
+        try:
+            async with AsyncExitStack() as stack:
+                for member in self.members.values():
+                    member.connection_manager.callback_server = self.callback_server
+
+                async def _connect(member: FederationMember) -> None:
+                    await stack.enter_async_context(member.connect())
+
+                members = list(self.members.values())
+                if all(m.config.get("reconnect", True) for m in members):
+                    # Supervised transports live in their own tasks, so servers can connect in parallel
+                    results = await asyncio.gather(*(_connect(m) for m in members), return_exceptions=True)
+                else:
+                    results = []
+                    for member in members:
+                        try:
+                            results.append(await _connect(member))
+                        except Exception as e:
+                            results.append(e)
+
+                for member, result in zip(members, results):
+                    if isinstance(result, BaseException):
+                        logging.error("Could not connect to MCP server %s: %s", member.name, result)
+                if not self.is_connected:
+                    raise RuntimeError("Could not connect to any MCP server")
+                logging.debug("Federation connected: %s", list(self.connected))
+                yield self
+        finally:
+            await self.callback_server.stop()
+            self.callback_server = None
+
+    def namespaced(self, server: str, tool: str) -> str:
+        return f"{server}{self.separator}{tool}"
+
+    def resolve(self, name: str) -> tuple[FederationMember, str]:
+        """Split a namespaced tool name into the owning member and the server's own tool name."""
+        server, sep, tool = name.partition(self.separator)
+        member = self.members.get(server)
+        if not sep or member is None:
+            raise ValueError(f"Unknown tool {name!r}")
+        return member, tool
+
+    async def list_tools(self) -> list[types.Tool]:
+        """All servers' tools under namespaced names. Servers are listed concurrently."""
+        members = list(self.connected.values())
+        results = await asyncio.gather(*(m.get_tools() for m in members), return_exceptions=True)
+        tools: list[types.Tool] = []
+        for member, result in zip(members, results):
+            if isinstance(result, BaseException):
+                logging.warning("Listing tools of %s failed: %s", member.name, result)
+                continue
+            for tool in result:
+                name = self.namespaced(member.name, tool.name)
+                if not _TOOL_NAME.match(name):
+                    logging.warning("Skipping tool %s: namespaced name is not a valid tool name", name)
+                    continue
+                description = f"[{member.name}] {tool.description or ''}".strip()
+                tools.append(tool.model_copy(update={"name": name, "description": description}))
+        return tools
+
+    async def call_tool(
+        self, name: str, arguments: Optional[dict[str, Any]] = None, timeout: Optional[float] = None
+    ) -> types.CallToolResult:
+        member, tool = self.resolve(name)
+        return await member.call_tool(tool, arguments, timeout)
+
+    async def ensure_connected(self, timeout: Optional[float] = None) -> None:
+        """Wait until at least one server has a live session."""
+        members = list(self.connected.values())
+        if not members:
+            raise RuntimeError("Not connected. Use `async with client.connect()` first.")
+        waits = [asyncio.ensure_future(m.ensure_connected(timeout)) for m in members]
+        try:
+            for next_done in asyncio.as_completed(waits):
+                try:
+                    await next_done
+                    return
+                except Exception as e:
+                    error = e
+            raise error
+        finally:
+            for wait in waits:
+                wait.cancel()
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+import weakref
+from typing import Any, Optional
+
+import httpx
+
+from vianexus_agent_sdk.types.config import HttpPoolConfig
+
+# Same defaults as the MCP SDK's own client factory
+_DEFAULT_TIMEOUT = httpx.Timeout(30.0, read=300.0)
+
+
+class _SharedTransport(httpx.AsyncBaseTransport):
+    """Delegates to the pool's transport. Closing a client must not close the shared pool."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport) -> None:
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class HttpClientPool:
+    """
+    A shared connection pool (keep-alive, optional HTTP/2) behind lightweight httpx clients.
+
+    Every client handed out reuses the same warm connections and TLS sessions, so the MCP
+    transport, the OAuth registration/token requests and the redirect handler of any number
+    of clients talking to the same server share them. Clients can be closed freely, only
+    `aclose()` on the pool closes the connections.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+    ) -> None:
+        if http2 and importlib.util.find_spec("h2") is None:
+            logging.debug("HTTP/2 requested but the 'h2' package is not installed, using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._transport: Optional[httpx.AsyncHTTPTransport] = None
+
+    @classmethod
+    def from_config(cls, config: HttpPoolConfig | "HttpClientPool" | None) -> Optional["HttpClientPool"]:
+        """Build a pool from a config dict. An existing pool is returned as is."""
+        if config is None or isinstance(config, HttpClientPool):
+            return config
+        return cls(
+            max_connections=config.get("max_connections", 100),
+            max_keepalive_connections=config.get("max_keepalive_connections", 20),
+            keepalive_expiry=config.get("keepalive_expiry", 30.0),
+            http2=config.get("http2", True),
+        )
+
+    @property
+    def transport(self) -> httpx.AsyncHTTPTransport:
+        if self._transport is None:
+            self._transport = httpx.AsyncHTTPTransport(http2=self.http2, limits=self.limits)
+        return self._transport
+
+    def client(
+        self,
+        headers: Optional[dict[str, str]] = None,
+        timeout: Optional[httpx.Timeout] = None,
+        auth: Optional[httpx.Auth] = None,
+        **kwargs: Any,
+    ) -> httpx.AsyncClient:
+        """Return an httpx client backed by the shared pool. Compatible with `McpHttpClientFactory`."""
+        kwargs.setdefault("follow_redirects", True)
+        return httpx.AsyncClient(
+            headers=headers,
+            timeout=timeout if timeout is not None else _DEFAULT_TIMEOUT,
+            auth=auth,
+            transport=_SharedTransport(self.transport),
+            **kwargs,
+        )
+
+    async def aclose(self) -> None:
+        if self._transport is not None:
+            await self._transport.aclose()
+            self._transport = None
+
+
+_default_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, HttpClientPool]" = weakref.WeakKeyDictionary()
+
+
+def get_default_pool() -> HttpClientPool:
+    """The process-wide pool for the running event loop, created on first use."""
+    loop = asyncio.get_running_loop()
+    pool = _default_pools.get(loop)
+    if pool is None:
+        pool = _default_pools[loop] = HttpClientPool()
+    return pool
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from mcp import types
+
+from vianexus_agent_sdk.types.config import ToolResultCacheConfig
+
+
+def _estimate_size(value: Any) -> int:
+    if hasattr(value, "model_dump_json"):
+        try:
+            return len(value.model_dump_json(exclude_none=True))
+        except Exception:
+            pass
+    return len(repr(value))
+
+
+class ToolResultCache:
+    """
+    Opt-in cache for idempotent MCP tool results.
+
+    Only tools with a TTL (per-tool `ttls` or `default_ttl`) are cached. Entries are keyed on
+    the tool name plus canonical JSON of the arguments and evicted LRU-first once
+    `max_entries` or `max_bytes` is exceeded. Concurrent identical calls share one request.
+    One instance can be shared by several clients.
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[dict[str, float]] = None,
+        default_ttl: Optional[float] = None,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+        self._bytes = 0
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def from_config(
+        cls, config: ToolResultCacheConfig | "ToolResultCache" | None
+    ) -> Optional["ToolResultCache"]:
+        """Build a cache from a config dict. An existing instance is returned as is."""
+        if config is None or isinstance(config, ToolResultCache):
+            return config
+        return cls(
+            ttls=config.get("ttls"),
+            default_ttl=config.get("default_ttl"),
+            max_entries=config.get("max_entries", 1024),
+            max_bytes=config.get("max_bytes", 64 * 1024 * 1024),
+        )
+
+    def ttl_for(self, name: str) -> Optional[float]:
+        """TTL in seconds for `name`, or None if the tool is not cacheable."""
+        ttl = self.ttls.get(name, self.default_ttl)
+        if ttl is None or ttl <= 0:
+            return None
+        return ttl
+
+    @staticmethod
+    def make_key(name: str, arguments: Optional[dict[str, Any]]) -> str:
+        canonical = json.dumps(arguments or {}, sort_keys=True, separators=(",", ":"), default=str)
+        return f"{name}:{canonical}"
+
+    def get(self, key: str) -> Any:
+        """Return a live entry and mark it as recently used, or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def remaining_ttl(self, name: str, arguments: Optional[dict[str, Any]]) -> Optional[float]:
+        """Seconds until the cached result of (name, arguments) expires, or None if none is cached."""
+        entry = self._entries.get(self.make_key(name, arguments))
+        if entry is None:
+            return None
+        remaining = entry[0] - time.monotonic()
+        return remaining if remaining > 0 else None
+
+    def put(self, key: str, value: Any, ttl: float) -> None:
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, size, value)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Drop every entry, or only the entries of tool `name`."""
+        if name is None:
+            self._entries.clear()
+            self._bytes = 0
+            return
+        for key in [k for k in self._entries if k.startswith(f"{name}:")]:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    async def get_or_call(
+        self,
+        name: str,
+        arguments: Optional[dict[str, Any]],
+        call: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Return a cached result for (name, arguments) or run `call` to produce one.
+        Tools without a TTL always go straight to `call`.
+        """
+        ttl = self.ttl_for(name)
+        if ttl is None:
+            return await call()
+
+        key = self.make_key(name, arguments)
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._fill(key, ttl, call))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.shared += 1
+        # Shield so a cancelled or timed out caller does not abort the shared request
+        return await asyncio.shield(task)
+
+    async def _fill(self, key: str, ttl: float, call: Callable[[], Awaitable[Any]]) -> Any:
+        result = await call()
+        if isinstance(result, types.CallToolResult) and not result.isError:
+            self.put(key, result, ttl)
+        return result
+
+    def _finish(self, key: str, task: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logging.debug("Cached tool call %s failed: %s", key, task.exception())
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared": self.shared,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import json
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from mcp import types
+
+from .result_cache import _estimate_size
+
+# Image types the model accepts inline, anything else is described instead
+_IMAGE_TYPES = ("image/png", "image/jpeg", "image/gif", "image/webp")
+# Never cut a single block below this many characters
+_MIN_BLOCK_CHARS = 200
+
+
+@dataclass
+class ProcessedResult:
+    """A tool result ready for the model, plus the handle of the full payload if it was cut."""
+    blocks: list[dict[str, Any]]
+    is_error: bool = False
+    handle: Optional[str] = None
+    original_chars: int = 0
+    sent_chars: int = 0
+    notes: list[str] = field(default_factory=list)
+
+    @property
+    def truncated(self) -> bool:
+        return self.handle is not None
+
+
+class PayloadStore:
+    """
+    Keeps full tool results that were cut down for the model, addressable by handle.
+    Oldest payloads are evicted once `max_entries` or `max_bytes` is exceeded.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 256 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[int, str, types.CallToolResult]] = OrderedDict()
+        self._bytes = 0
+
+    def put(self, name: str, result: types.CallToolResult) -> str:
+        handle = f"payload-{uuid.uuid4().hex[:16]}"
+        size = _estimate_size(result)
+        self._entries[handle] = (size, name, result)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (old_size, _, _) = self._entries.popitem(last=False)
+            self._bytes -= old_size
+            self.evictions += 1
+        return handle
+
+    def get(self, handle: str) -> Optional[types.CallToolResult]:
+        entry = self._entries.get(handle)
+        if entry is None:
+            return None
+        self._entries.move_to_end(handle)
+        return entry[2]
+
+    def pop(self, handle: str) -> Optional[types.CallToolResult]:
+        entry = self._entries.pop(handle, None)
+        if entry is None:
+            return None
+        self._bytes -= entry[0]
+        return entry[2]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {"entries": len(self._entries), "bytes": self._bytes, "evictions": self.evictions}
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _shrink_json(value: Any, budget: int) -> Any:
+    """
+    Cut a JSON value down to roughly `budget` serialized characters, keeping its shape:
+    long arrays keep their first and last items around a marker, objects shrink their
+    largest members first.
+    """
+    size = len(_dumps(value))
+    if size <= budget:
+        return value
+    if isinstance(value, str):
+        return value[: max(budget - 20, 20)] + "..."
+    if isinstance(value, list):
+        if len(value) <= 2:
+            return [_shrink_json(item, budget // 2) for item in value]
+        tail = value[-1]
+        tail_size = len(_dumps(tail))
+        head: list[Any] = []
+        used = tail_size + 60
+        for item in value[:-1]:
+            item_size = len(_dumps(item)) + 1
+            if head and used + item_size > budget:
+                break
+            head.append(item)
+            used += item_size
+        omitted = len(value) - len(head) - 1
+        if omitted <= 0:
+            return value
+        return head + [f"... {omitted} of {len(value)} items omitted ..."] + [tail]
+    if isinstance(value, dict):
+        shrunk = dict(value)
+        # Shrink the biggest members first, they are usually the bulk (e.g. a time series)
+        for key in sorted(shrunk, key=lambda k: len(_dumps(shrunk[k])), reverse=True):
+            size = len(_dumps(shrunk))
+            if size <= budget:
+                break
+            member_size = len(_dumps(shrunk[key]))
+            shrunk[key] = _shrink_json(shrunk[key], max(member_size - (size - budget), _MIN_BLOCK_CHARS // 2))
+        return shrunk
+    return value
+
+
+def _describe_json(value: Any) -> str:
+    """A one-line summary of a JSON value's shape."""
+    if isinstance(value, list):
+        fields = ""
+        if value and isinstance(value[0], dict):
+            fields = f", items have fields: {', '.join(list(value[0])[:20])}"
+        return f"JSON array of {len(value)} items{fields}"
+    if isinstance(value, dict):
+        parts = []
+        for key, member in list(value.items())[:20]:
+            parts.append(f"{key} ({len(member)} items)" if isinstance(member, list) else key)
+        return f"JSON object with keys: {', '.join(parts)}"
+    return type(value).__name__
+
+
+def _shrink_text(text: str, limit: int) -> tuple[str, str]:
+    """Return (shortened text, shape summary), shrinking JSON structurally and plain text head + tail."""
+    try:
+        parsed = json.loads(text)
+    except ValueError:
+        parsed = None
+    if isinstance(parsed, (list, dict)):
+        shrunk = _dumps(_shrink_json(parsed, limit))
+        if len(shrunk) <= limit:
+            return shrunk, _describe_json(parsed)
+        text = shrunk
+    marker = "\n[...]\n"
+    head = int((limit - len(marker)) * 0.8)
+    tail = max(limit - len(marker) - head, 0)
+    return f"{text[:head]}{marker}{text[len(text) - tail:] if tail else ''}", (
+        _describe_json(parsed) if parsed is not None else f"text of {len(text)} characters"
+    )
+
+
+class ToolResultProcessor:
+    """
+    Turns an MCP `CallToolResult` into model-ready content blocks.
+
+    Every content block is converted (text, images, embedded resources, resource links),
+    structured content is used when present, and text beyond the tool's character limit is
+    shrunk (JSON structurally, plain text head + tail). The full result of anything that was
+    cut is kept in the `PayloadStore` and its handle noted in the result.
+    """
+
+    def __init__(
+        self,
+        max_chars: Optional[int] = 20_000,
+        limits: Optional[dict[str, Optional[int]]] = None,
+        store: Optional[PayloadStore] = None,
+    ) -> None:
+        self.max_chars = max_chars
+        self.limits = dict(limits or {})
+        self.store = store if store is not None else PayloadStore()
+
+    def limit_for(self, name: str) -> Optional[int]:
+        """Character limit for `name`, or None for no limit."""
+        return self.limits.get(name, self.max_chars)
+
+    def process(self, name: str, result: types.CallToolResult) -> ProcessedResult:
+        blocks = self._to_blocks(result)
+        original = sum(len(b["text"]) for b in blocks if b["type"] == "text")
+        processed = ProcessedResult(
+            blocks=blocks,
+            is_error=bool(result.isError),
+            original_chars=original,
+            sent_chars=original,
+        )
+
+        limit = self.limit_for(name)
+        if limit is None or original <= limit:
+            return processed
+
+        processed.handle = self.store.put(name, result)
+        for block in blocks:
+            if block["type"] != "text":
+                continue
+            # Share the limit between text blocks in proportion to their size
+            block_limit = max(int(limit * len(block["text"]) / original), _MIN_BLOCK_CHARS)
+            if len(block["text"]) > block_limit:
+                block["text"], shape = _shrink_text(block["text"], block_limit)
+                processed.notes.append(shape)
+        processed.sent_chars = sum(len(b["text"]) for b in blocks if b["type"] == "text")
+        blocks.append({
+            "type": "text",
+            "text": (
+                f"[Result shortened from {original} to {processed.sent_chars} characters "
+                f"({'; '.join(processed.notes)}). Full result kept as {processed.handle}.]"
+            ),
+        })
+        return processed
+
+    def _to_blocks(self, result: types.CallToolResult) -> list[dict[str, Any]]:
+        structured = getattr(result, "structuredContent", None)
+        blocks: list[dict[str, Any]] = []
+        for item in result.content or []:
+            if isinstance(item, types.TextContent):
+                # Tools returning structured content usually repeat it as JSON text
+                if structured is not None and _same_json(item.text, structured):
+                    continue
+                blocks.append({"type": "text", "text": item.text})
+            elif isinstance(item, types.ImageContent):
+                if item.mimeType in _IMAGE_TYPES:
+                    blocks.append({
+                        "type": "image",
+                        "source": {"type": "base64", "media_type": item.mimeType, "data": item.data},
+                    })
+                else:
+                    blocks.append({"type": "text", "text": f"[{item.mimeType} image omitted]"})
+            elif isinstance(item, types.AudioContent):
+                blocks.append({"type": "text", "text": f"[{item.mimeType} audio omitted]"})
+            elif isinstance(item, types.EmbeddedResource):
+                resource = item.resource
+                if isinstance(resource, types.TextResourceContents):
+                    blocks.append({"type": "text", "text": f"Resource {resource.uri}:\n{resource.text}"})
+                else:
+                    blocks.append({"type": "text", "text": f"[Binary resource {resource.uri} ({resource.mimeType}) omitted]"})
+            elif isinstance(item, types.ResourceLink):
+                description = f" - {item.description}" if item.description else ""
+                blocks.append({"type": "text", "text": f"Resource link {item.name}: {item.uri}{description}"})
+            else:
+                blocks.append({"type": "text", "text": str(item)})
+        if structured is not None:
+            blocks.insert(0, {"type": "text", "text": _dumps(structured)})
+        if not blocks:
+            blocks.append({"type": "text", "text": "(no content)"})
+        return blocks
+
+
+def _same_json(text: str, value: Any) -> bool:
+    try:
+        return json.loads(text) == value
+    except ValueError:
+        return False
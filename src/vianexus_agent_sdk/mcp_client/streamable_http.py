@@ -1,13 +1,20 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
 
+import httpx
+from mcp.client.auth import TokenStorage
 from mcp.client.streamable_http import streamablehttp_client
 from vianexus_agent_sdk.providers.oauth import (
     ViaNexusOAuthClientProvider,
     ViaNexusOAuthProvider,
 )
+from vianexus_agent_sdk.providers.token_storage import create_token_storage
+from vianexus_agent_sdk.servers.callback.async_callback_server import AsyncCallbackServer
+from .http_pool import HttpClientPool, get_default_pool
 from vianexus_agent_sdk.types.config import BaseConfig
 
 
@@ -28,14 +35,27 @@ class StreamableHttpSetup:
     port: int
     software_statement: str
     auth_layer: Optional[ViaNexusOAuthClientProvider] = None
+    token_storage: Optional[TokenStorage] = None
+    token_refresh_margin: Optional[float] = 60.0
+    # None uses the process-wide pool, so clients of the same server share connections
+    http_pool: Optional[HttpClientPool] = None
+    # A running callback listener to share with other setups, None starts one per auth layer
+    callback_server: Optional[AsyncCallbackServer] = None
+    # Last 429/529 answered on the transport, with when it was seen (time.monotonic())
+    _throttle: Optional[tuple[float, httpx.Response]] = field(default=None, init=False, repr=False)
 
     @classmethod
     def from_config(cls, config: BaseConfig) -> "StreamableHttpSetup":
         # Defensive lookups. Fail early with KeyError if missing.
+        server = _normalize_server(config["server"])
+        port = int(config["port"])
         return cls(
-            server=_normalize_server(config["server"]),
-            port=int(config["port"]),
+            server=server,
+            port=port,
             software_statement=config["software_statement"],
+            token_storage=create_token_storage(config, namespace=f"{server}:{port}"),
+            token_refresh_margin=config.get("token_refresh_margin", 60.0),
+            http_pool=HttpClientPool.from_config(config.get("http_pool")),
         )
 
     async def create_auth_layer(self) -> ViaNexusOAuthClientProvider:
@@ -46,16 +66,55 @@ class StreamableHttpSetup:
             server_url=self.server,
             server_port=self.port,
             software_statement=self.software_statement,
+            token_storage=self.token_storage,
+            token_refresh_margin=self.token_refresh_margin,
+            callback_server=self.callback_server,
+            http_pool=self.http_pool,
         )
         self.auth_layer = await provider.initialize()
         return self.auth_layer
 
-    def connection_context(self):
+    def connection_context(self, session_id: Optional[str] = None, terminate_on_close: bool = True):
         """
         Return the streamable HTTP transport context manager.
-        Requires `create_auth_layer()` to have succeeded.
+        Requires `create_auth_layer()` to have succeeded. Pass the `session_id` of an
+        earlier session to ask the server to resume it.
         """
         if not self.auth_layer:
             raise RuntimeError("Auth not initialized. Call create_auth_layer() first.")
         url = f"{self.server}:{self.port}/mcp"
-        return streamablehttp_client(url=url, auth=self.auth_layer)
+        pool = self.http_pool or get_default_pool()
+        return streamablehttp_client(
+            url=url,
+            headers={"mcp-session-id": session_id} if session_id else None,
+            terminate_on_close=terminate_on_close,
+            auth=self.auth_layer,
+            httpx_client_factory=lambda **kwargs: pool.client(
+                event_hooks={"response": [self._record_throttle]}, **kwargs
+            ),
+        )
+
+    async def _record_throttle(self, response: httpx.Response) -> None:
+        # The MCP transport raises on a 429 inside its own task and closes, callers only see
+        # the connection drop. Keep the response so they can tell it was a throttle.
+        if response.status_code in (429, 529):
+            self._throttle = (time.monotonic(), response)
+
+    def throttled_since(self, since: float) -> Optional[httpx.Response]:
+        """The 429/529 response the server sent on the transport after `since` (monotonic), if any."""
+        if self._throttle is not None and self._throttle[0] >= since:
+            return self._throttle[1]
+        return None
+
+    async def terminate_session(self, session_id: str) -> None:
+        """Ask the server to end MCP session `session_id`, as the transport does on close."""
+        pool = self.http_pool or get_default_pool()
+        try:
+            async with pool.client(headers={"mcp-session-id": session_id}, auth=self.auth_layer) as client:
+                response = await client.delete(f"{self.server}:{self.port}/mcp")
+            if response.status_code == 405:
+                logging.debug("Server does not allow session termination")
+            elif response.status_code not in (200, 204):
+                logging.warning("Session termination failed: %s", response.status_code)
+        except Exception as e:
+            logging.warning("Session termination failed: %s", e)
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from contextlib import AsyncExitStack
+from typing import TYPE_CHECKING, Optional
+
+import anyio
+import httpx
+from mcp.shared.exceptions import McpError
+from mcp import ClientSession
+from mcp.types import CONNECTION_CLOSED, ErrorData, JSONRPCError
+
+if TYPE_CHECKING:
+    from .base_mcp_client import BaseMCPConnection
+    from .streamable_http import StreamableHttpSetup
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """True for failures that mean the transport or MCP session is gone, not that a call failed."""
+    if isinstance(error, (httpx.TransportError, anyio.ClosedResourceError, anyio.BrokenResourceError, ConnectionError)):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in (404, 502, 503, 504)
+    if isinstance(error, McpError):
+        return error.error.code == CONNECTION_CLOSED or error.error.message == "Session terminated"
+    return False
+
+
+def _fail_pending(session: ClientSession) -> None:
+    """
+    Answer the requests still waiting on `session` with CONNECTION_CLOSED. The session does
+    this itself when its stream ends, but not when the transport's task group was cancelled.
+    """
+    # Private to the MCP SDK, checked so a release that renames it only loses this cleanup
+    streams = getattr(session, "_response_streams", None)
+    if not isinstance(streams, dict):
+        logging.warning("Cannot fail the pending requests of a closed MCP session on this mcp version")
+        return
+    for request_id, stream in list(streams.items()):
+        try:
+            stream.send_nowait(
+                JSONRPCError(
+                    jsonrpc="2.0",
+                    id=request_id,
+                    error=ErrorData(code=CONNECTION_CLOSED, message="Connection closed"),
+                )
+            )
+        except Exception:
+            pass
+
+
+class SupervisedConnection:
+    """
+    Keeps a client's transport and MCP session alive in a background task.
+
+    When the connection drops, the session is torn down and re-established with
+    jittered exponential backoff, offering the previous MCP session id for resumption
+    first. The auth layer (and its tokens) and the client's conversation state survive.
+    Closing the connection ends the server session; a dropped session is only ended when
+    it is not going to be resumed.
+    """
+
+    def __init__(
+        self,
+        client: "BaseMCPConnection",
+        connection_manager: "StreamableHttpSetup",
+        max_attempts: Optional[int] = None,
+        initial_backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        resume_sessions: bool = True,
+    ) -> None:
+        self.client = client
+        self.connection_manager = connection_manager
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.resume_sessions = resume_sessions
+        self.session_id: Optional[str] = None
+        self.reconnects = 0
+        self._ready = asyncio.Event()
+        self._lost = asyncio.Event()
+        self._closing = False
+        self._task: Optional[asyncio.Task] = None
+        self._ever_connected = False
+        self._connected = False
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    async def start(self) -> None:
+        """Connect and return once the first session is initialized, raising if it cannot be."""
+        self._task = asyncio.create_task(self._run(), name="mcp-connection-supervisor")
+        ready = asyncio.ensure_future(self._ready.wait())
+        await asyncio.wait({ready, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        if not ready.done():
+            ready.cancel()
+            self._task.result()
+            raise ConnectionError("MCP connection closed before it was ready")
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> None:
+        """Wait for a live session, e.g. while a reconnect is in progress."""
+        if self._task is None or self._task.done():
+            raise ConnectionError("MCP connection is closed")
+        await asyncio.wait_for(self._ready.wait(), timeout)
+
+    def connection_lost(self, error: Optional[BaseException] = None) -> None:
+        """Signal that the current session is unusable and should be replaced."""
+        if self._connected and not self._lost.is_set():
+            logging.warning("MCP connection lost: %s", error)
+            # Callers waiting for readiness must now wait for the replacement session
+            self._ready.clear()
+            self._lost.set()
+
+    async def close(self) -> None:
+        self._closing = True
+        self._lost.set()
+        if self._task is not None:
+            try:
+                await self._task
+            except Exception as e:
+                logging.debug("MCP connection supervisor stopped: %s", e)
+            self._task = None
+
+    async def _run(self) -> None:
+        attempt = 0
+        while not self._closing:
+            resume_id = self.session_id if self.resume_sessions else None
+            self._connected = False
+            try:
+                await self._connect_once(resume_id)
+            except Exception as e:
+                if self._connected:
+                    logging.debug("MCP transport closed with: %s", e)
+                elif resume_id:
+                    # The server does not know the old session, start a fresh one right away
+                    logging.debug("Session %s could not be resumed: %s", resume_id, e)
+                    self.session_id = None
+                    continue
+                if not self._ever_connected:
+                    raise
+                else:
+                    logging.warning("MCP reconnect failed: %s", e)
+
+            if self._closing:
+                break
+            attempt = 1 if self._connected else attempt + 1
+            if self.max_attempts is not None and attempt > self.max_attempts:
+                raise ConnectionError(f"Giving up on the MCP connection after {self.max_attempts} attempts")
+            delay = min(self.max_backoff, self.initial_backoff * 2 ** (attempt - 1))
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def _connect_once(self, resume_id: Optional[str]) -> None:
+        self._lost.clear()
+        # The transport decides on termination when it opens, only `close()` knows it is final
+        async with self.connection_manager.connection_context(
+            session_id=resume_id,
+            terminate_on_close=False,
+        ) as (readstream, writestream, get_session_id):
+            self.client.readstream = readstream
+            self.client.writestream = writestream
+            self.client._exit_stack = AsyncExitStack()
+            try:
+                if not await self.client.connect_to_server():
+                    raise ConnectionError("Failed to initialize MCP session")
+                self.session_id = get_session_id() if get_session_id else None
+                if self._ever_connected:
+                    self.reconnects += 1
+                    logging.info("MCP connection re-established (session %s)", self.session_id)
+                self._ever_connected = True
+                self._connected = True
+                self._ready.set()
+                await self._lost.wait()
+            finally:
+                self._ready.clear()
+                if self.client.session is not None:
+                    _fail_pending(self.client.session)
+                self.client.session = None
+                await self.client._exit_stack.aclose()
+                if self.session_id and (self._closing or not self.resume_sessions):
+                    await self.connection_manager.terminate_session(self.session_id)
+                    self.session_id = None
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from mcp import types
+
+
+class ToolCatalog:
+    """
+    Cache of the server's tool list together with the converted (LLM-facing) schemas.
+    Entries expire after `ttl` seconds (None keeps them until invalidated, 0 disables caching).
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = 300.0,
+        formatter: Optional[Callable[[types.Tool], Any]] = None,
+    ) -> None:
+        self.ttl = ttl
+        self.formatter = formatter or (lambda tool: tool)
+        self.hits = 0
+        self.misses = 0
+        self._tools: Optional[list[types.Tool]] = None
+        self._schemas: list[Any] = []
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def tools(self) -> list[types.Tool]:
+        """Raw MCP tool definitions from the last refresh."""
+        return list(self._tools or [])
+
+    def is_fresh(self) -> bool:
+        if self._tools is None:
+            return False
+        if self.ttl is None:
+            return True
+        return (time.monotonic() - self._fetched_at) < self.ttl
+
+    def invalidate(self) -> None:
+        """Drop the cached catalog so the next lookup refreshes it."""
+        self._tools = None
+        self._schemas = []
+
+    def update(self, tools: list[types.Tool]) -> list[Any]:
+        """Replace the catalog with `tools` and rebuild the converted schemas."""
+        self._tools = list(tools)
+        self._schemas = [self.formatter(t) for t in self._tools]
+        self._fetched_at = time.monotonic()
+        return self._schemas
+
+    async def get(self, fetch: Callable[[], Awaitable[list[types.Tool]]]) -> list[Any]:
+        """
+        Return the converted schemas, calling `fetch` only when the cache is stale.
+        Concurrent callers share a single refresh.
+        """
+        if self.is_fresh():
+            self.hits += 1
+            return self._schemas
+
+        async with self._lock:
+            if self.is_fresh():
+                self.hits += 1
+                return self._schemas
+            self.misses += 1
+            return self.update(await fetch())
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._tools or []),
+            "fresh": self.is_fresh(),
+        }
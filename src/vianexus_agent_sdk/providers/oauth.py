@@ -1,21 +1,171 @@
 import asyncio
-from typing import Any
-import requests
+from importlib import metadata
+import logging
+import time
+from typing import Any, Awaitable, Callable
 import socket
 from mcp.client.auth import OAuthClientProvider, TokenStorage
 from mcp.shared.auth import OAuthClientInformationFull, OAuthClientMetadata, OAuthToken
-from vianexus_agent_sdk.servers.callback.callback_server import CallbackServer
+from vianexus_agent_sdk.mcp_client.http_pool import HttpClientPool, get_default_pool
+from vianexus_agent_sdk.providers.token_storage import InMemoryTokenStorage
+from vianexus_agent_sdk.servers.callback.async_callback_server import AsyncCallbackServer
+from vianexus_agent_sdk.telemetry.tracing import get_telemetry
 from mcp import ClientSession
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse, parse_qs
 import httpx
 
+def _mcp_resends_requests() -> bool:
+    """Whether the installed MCP SDK sends every request again after it succeeded (fixed in 1.14)."""
+    try:
+        major, minor = (int(p) for p in metadata.version("mcp").split(".")[:2])
+    except (metadata.PackageNotFoundError, ValueError):
+        return False
+    return (major, minor) < (1, 14)
+
+
+_MCP_RESENDS_REQUESTS = _mcp_resends_requests()
+
 class ViaNexusOAuthClientProvider(OAuthClientProvider):
     """Manages Agent server connections and tool execution."""
-    def __init__(self, server_url, client_metadata, storage, redirect_handler, callback_handler, software_statement) -> None:
+    def __init__(self, server_url, client_metadata, storage, redirect_handler, callback_handler, software_statement, http_pool: HttpClientPool | None = None, registration_lock: asyncio.Lock | None = None) -> None:
         super().__init__(server_url, client_metadata, storage, redirect_handler, callback_handler)
         self.software_statement = software_statement
+        self.http_pool = http_pool
+        # Set when several providers share one client registration through their storage
+        self.registration_lock = registration_lock
+        self._refresh_task: asyncio.Task | None = None
+
+    async def async_auth_flow(self, request: httpx.Request):
+        """
+        The MCP SDK's auth flow. MCP SDK versions before 1.14 send every request a second
+        time after a successful response, which ran each tool call twice; on those the flow
+        is stopped once the original request succeeds.
+        """
+        flow = super().async_auth_flow(request)
+        try:
+            next_request = await flow.__anext__()
+            while True:
+                response = yield next_request
+                if _MCP_RESENDS_REQUESTS and next_request is request and response.status_code != 401:
+                    return
+                next_request = await flow.asend(response)
+        except StopAsyncIteration:
+            return
+        finally:
+            await flow.aclose()
+
+    async def _initialize(self) -> None:
+        """Load stored tokens and client info, restoring the token expiry."""
+        await super()._initialize()
+        self._use_tokens(*await self._stored_tokens())
+
+    async def _stored_tokens(self) -> tuple[OAuthToken | None, float | None]:
+        """The stored tokens and their absolute expiry, when the storage keeps one."""
+        storage = self.context.storage
+        get_with_expiry = getattr(storage, "get_tokens_and_expiry", None)
+        if get_with_expiry is not None:
+            return await get_with_expiry()
+        return await storage.get_tokens(), None
+
+    def _use_tokens(self, tokens: OAuthToken | None, expires_at: float | None) -> None:
+        """
+        Make `tokens` current. A stored absolute expiry is used as is, so a token that expired
+        while stored reads as expired and the auth flow refreshes it before sending a request.
+        """
+        self.context.current_tokens = tokens
+        if tokens is None:
+            self.context.token_expiry_time = None
+        elif expires_at is not None:
+            self.context.token_expiry_time = expires_at
+        else:
+            self.context.update_token_expiry(tokens)
+
+    async def refresh_if_expiring(self, margin: float = 60.0) -> bool:
+        """
+        Refresh the access token if it expires within `margin` seconds.
+        Returns True when a new token is in place.
+        """
+        async with self.context.lock:
+            if not self._initialized:
+                await self._initialize()
+
+            # Another process sharing the storage may have refreshed already
+            current = self.context.current_tokens
+            stored, expires_at = await self._stored_tokens()
+            if stored and (not current or stored.access_token != current.access_token):
+                self._use_tokens(stored, expires_at)
+
+            expiry = self.context.token_expiry_time
+            if expiry is None or expiry - time.time() > margin or not self.context.can_refresh_token():
+                return False
+
+            acquire = getattr(self.context.storage, "acquire_refresh_lease", None)
+            if acquire and not await acquire():
+                return False
+            try:
+                with get_telemetry().span("oauth.refresh_token") as span:
+                    request = await self._refresh_token()
+                    async with (self.http_pool or get_default_pool()).client() as client:
+                        response = await client.send(request)
+                    refreshed = await self._handle_refresh_response(response)
+                    span.set_attributes(status=response.status_code, refreshed=refreshed)
+            finally:
+                release = getattr(self.context.storage, "release_refresh_lease", None)
+                if acquire and release:
+                    await release()
+
+        if refreshed:
+            logging.debug("Access token refreshed ahead of expiry")
+        else:
+            self._initialized = False
+        return refreshed
+
+    def start_background_refresh(self, margin: float = 60.0, check_interval: float = 30.0) -> None:
+        """Keep the access token fresh in the background so requests never wait on a refresh."""
+        if self._refresh_task and not self._refresh_task.done():
+            return
+
+        async def _refresh_loop():
+            while True:
+                try:
+                    await self.refresh_if_expiring(margin)
+                except Exception as e:
+                    logging.warning("Background token refresh failed: %s", e)
+                expiry = self.context.token_expiry_time
+                delay = check_interval if expiry is None else expiry - margin - time.time()
+                await asyncio.sleep(min(max(delay, 1.0), check_interval))
+
+        self._refresh_task = asyncio.create_task(_refresh_loop())
+
+    def stop_background_refresh(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
 
     async def _register_client(self):
+        """Registration request for the MCP auth flow, None when the client is already registered."""
+        if self.registration_lock is not None:
+            await self._register_shared_client()
+            return None
+        return await self._registration_request()
+
+    async def _register_shared_client(self) -> None:
+        """
+        Reuse the client registration in the shared storage, registering it first if no
+        provider has yet. The lock makes concurrent first flows register only once.
+        """
+        async with self.registration_lock:
+            self.context.client_info = await self.context.storage.get_client_info()
+            request = await self._registration_request()
+            if request is None:
+                return
+            with get_telemetry().span("oauth.register_client") as span:
+                async with (self.http_pool or get_default_pool()).client() as client:
+                    response = await client.send(request)
+                span.set_attribute("status", response.status_code)
+                await self._handle_registration_response(response)
+
+    async def _registration_request(self) -> httpx.Request | None:
         """Build registration request with software statement."""
         if self.context.client_info:
             return None
@@ -48,32 +198,55 @@ def find_free_port(start_port=3030, max_attempts=100):
 class ViaNexusOAuthProvider:
     """Manages MCP server connections and tool execution."""
 
-    def __init__(self, server_url: str, server_port: str, software_statement: str) -> None:
+    def __init__(
+        self,
+        server_url: str,
+        server_port: str,
+        software_statement: str,
+        token_storage: TokenStorage | None = None,
+        token_refresh_margin: float | None = 60.0,
+        callback_server: AsyncCallbackServer | None = None,
+        http_pool: HttpClientPool | None = None,
+        redirect_handler: Callable[[str], Awaitable[None]] | None = None,
+        registration_lock: asyncio.Lock | None = None,
+    ) -> None:
         self.name: str = "ViaNexus_OAuthProvider"
         self.server_url: str = server_url
         self.server_port: str = server_port if server_port else "443"
         self.software_statement: str = software_statement
-        self.callback_server: CallbackServer | None = None
+        self.token_storage: TokenStorage = token_storage or InMemoryTokenStorage()
+        self.token_refresh_margin = token_refresh_margin
+        # A callback server passed in is shared with other providers and not owned by this one
+        self.callback_server: AsyncCallbackServer | None = callback_server
+        self._owns_callback_server = callback_server is None
+        self.http_pool = http_pool
+        # Receives the authorization URL, e.g. to show it to the user. By default it is requested directly
+        self.redirect_handler = redirect_handler
+        self.registration_lock = registration_lock
+        self.oauth_provider: ViaNexusOAuthClientProvider | None = None
 
     async def initialize(self) -> ViaNexusOAuthClientProvider:
         """Initialize the server connection."""
+        telemetry = get_telemetry()
         try:
-            # Find a free port for the callback server
-            callback_port = find_free_port()
-            self.callback_server = CallbackServer(port=callback_port)
-            self.callback_server.start()
+            with telemetry.span("oauth.callback_server.start"):
+                if self.callback_server is None:
+                    # Find a free port for the callback server
+                    self.callback_server = AsyncCallbackServer(port=find_free_port())
+                await self.callback_server.start()
+            # State of the authorization currently in flight, taken from the authorization URL
+            pending_state: list[str] = []
 
             async def callback_handler() -> tuple[str, str | None]:
                 """Wait for OAuth callback and return auth code and state."""
-                try:
-                    auth_code = self.callback_server.wait_for_callback(timeout=300)
-                    return auth_code, self.callback_server.get_state()
-                except Exception as e:
-                    raise e
+                if not pending_state:
+                    raise RuntimeError("No authorization in progress")
+                with telemetry.span("oauth.wait_for_callback"):
+                    return await self.callback_server.wait_for_callback(pending_state.pop(), timeout=300)
 
             client_metadata_dict = {
                 "client_name": "ViaNexus Auth Client",
-                "redirect_uris": [f"http://localhost:{callback_port}/callback"],
+                "redirect_uris": [self.callback_server.redirect_uri],
                 "grant_types": ["authorization_code", "refresh_token"],
                 "response_types": ["code"],
                 "token_endpoint_auth_method": "client_secret_post",
@@ -81,8 +254,17 @@ class ViaNexusOAuthProvider:
 
             async def _default_redirect_handler(authorization_url: str) -> None:
                 """Default redirect handler that opens the URL in a browser."""
-                loop = asyncio.get_event_loop()
-                response = await loop.run_in_executor(None, requests.get, authorization_url)
+                # Register the state before the request, the callback may arrive before it returns
+                state = parse_qs(urlparse(authorization_url).query).get("state", [""])[0]
+                self.callback_server.expect(state)
+                pending_state[:] = [state]
+                if self.redirect_handler is not None:
+                    await self.redirect_handler(authorization_url)
+                    return
+                with telemetry.span("oauth.authorize_redirect") as span:
+                    async with (self.http_pool or get_default_pool()).client() as client:
+                        response = await client.get(authorization_url)
+                    span.set_attribute("status", response.status_code)
                 try:
                     response.raise_for_status()
                 except Exception as e:
@@ -93,46 +275,37 @@ class ViaNexusOAuthProvider:
                 client_metadata=OAuthClientMetadata.model_validate(
                     client_metadata_dict
                 ),
-                storage=InMemoryTokenStorage(),
+                storage=self.token_storage,
                 redirect_handler=_default_redirect_handler,
                 callback_handler=callback_handler,
-                software_statement=self.software_statement
+                software_statement=self.software_statement,
+                http_pool=self.http_pool,
+                registration_lock=self.registration_lock,
             )
         except Exception as e:
             # Clean up callback server if initialization fails
-            if self.callback_server:
-                self.callback_server.stop()
-                self.callback_server = None
+            self._close_callback_server()
             raise e
 
+        if self.token_refresh_margin is not None:
+            oauth_provider.start_background_refresh(margin=self.token_refresh_margin)
+        self.oauth_provider = oauth_provider
         return oauth_provider
 
     def cleanup(self):
-        """Clean up the callback server."""
-        if self.callback_server:
-            self.callback_server.stop()
+        """Clean up the callback server and the background token refresh."""
+        if self.oauth_provider:
+            self.oauth_provider.stop_background_refresh()
+        self._close_callback_server()
+
+    def _close_callback_server(self):
+        if self.callback_server and self._owns_callback_server:
+            try:
+                self.callback_server.close()
+            except Exception as e:
+                logging.debug(f"Error stopping callback server: {e}")
             self.callback_server = None
 
     def __del__(self):
         """Destructor to ensure cleanup."""
         self.cleanup()
-
-
-class InMemoryTokenStorage(TokenStorage):
-    """Simple in-memory token storage implementation."""
-
-    def __init__(self):
-        self._tokens: OAuthToken | None = None
-        self._client_info: OAuthClientInformationFull | None = None
-
-    async def get_tokens(self) -> OAuthToken | None:
-        return self._tokens
-
-    async def set_tokens(self, tokens: OAuthToken) -> None:
-        self._tokens = tokens
-
-    async def get_client_info(self) -> OAuthClientInformationFull | None:
-        return self._client_info
-
-    async def set_client_info(self, client_info: OAuthClientInformationFull) -> None:
-        self._client_info = client_info
\ No newline at end of file
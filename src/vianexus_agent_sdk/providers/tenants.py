@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from mcp.client.auth import TokenStorage
+from mcp.shared.auth import OAuthClientInformationFull, OAuthToken
+
+from vianexus_agent_sdk.mcp_client.http_pool import HttpClientPool
+from vianexus_agent_sdk.mcp_client.streamable_http import StreamableHttpSetup, _normalize_server
+from vianexus_agent_sdk.providers.oauth import ViaNexusOAuthClientProvider, ViaNexusOAuthProvider, find_free_port
+from vianexus_agent_sdk.providers.token_storage import create_token_storage
+from vianexus_agent_sdk.servers.callback.async_callback_server import AsyncCallbackServer
+from vianexus_agent_sdk.types.config import BaseConfig
+
+
+class TenantTokenStorage(TokenStorage):
+    """A tenant's own tokens next to the client registration shared by every tenant."""
+
+    def __init__(self, tokens: TokenStorage, registration: TokenStorage) -> None:
+        self.tokens = tokens
+        self.registration = registration
+
+    async def get_tokens(self) -> OAuthToken | None:
+        return await self.tokens.get_tokens()
+
+    async def set_tokens(self, tokens: OAuthToken) -> None:
+        await self.tokens.set_tokens(tokens)
+
+    async def get_client_info(self) -> OAuthClientInformationFull | None:
+        return await self.registration.get_client_info()
+
+    async def set_client_info(self, client_info: OAuthClientInformationFull) -> None:
+        await self.registration.set_client_info(client_info)
+
+    def __getattr__(self, name: str) -> Any:
+        # Refresh leases and the like belong to the tenant's tokens
+        return getattr(self.tokens, name)
+
+
+@dataclass
+class TenantHttpSetup(StreamableHttpSetup):
+    """Transport setup whose auth layer is a tenant's credentials from a `TenantAuthManager`."""
+
+    manager: Optional["TenantAuthManager"] = None
+    tenant_id: str = ""
+
+    async def create_auth_layer(self) -> ViaNexusOAuthClientProvider:
+        self.auth_layer = await self.manager.auth(self.tenant_id)
+        return self.auth_layer
+
+
+class TenantAuthManager:
+    """
+    Many authenticated viaNexus identities in one process.
+
+    The client is registered with the software statement once and that registration is
+    reused by every tenant. Each tenant has its own tokens, kept in `token_storage`
+    ("memory", "sqlite" or a factory `tenant_id -> TokenStorage`) and refreshed in the
+    background. Every authorization flow goes through one callback listener, and every
+    tenant's requests share the connection pool, each carrying that tenant's token.
+
+    `redirect_handler(tenant_id, authorization_url)` gets the authorization URL of a
+    tenant that has to sign in, e.g. to send it to that user. By default the URL is
+    requested directly, as for a single client.
+
+    Usage:
+        async with TenantAuthManager.from_config(config) as tenants:
+            client = AnthropicClient(config, connection_manager=tenants.connection_manager("alice"))
+            async with client.connect():
+                ...
+    """
+
+    def __init__(
+        self,
+        server: str,
+        port: int,
+        software_statement: str,
+        token_storage: Any = "memory",
+        token_storage_path: Optional[str] = None,
+        token_refresh_margin: Optional[float] = 60.0,
+        http_pool: Optional[HttpClientPool] = None,
+        callback_port: Optional[int] = None,
+        redirect_handler: Optional[Callable[[str, str], Awaitable[None]]] = None,
+    ) -> None:
+        if token_storage == "file" or hasattr(token_storage, "get_tokens"):
+            raise ValueError("Tenants need a token storage per identity: 'memory', 'sqlite' or a factory")
+        self.server = _normalize_server(server)
+        self.port = int(port)
+        self.software_statement = software_statement
+        self.token_storage = token_storage
+        self.token_storage_path = token_storage_path
+        self.token_refresh_margin = token_refresh_margin
+        self.http_pool = http_pool
+        self.callback_port = callback_port
+        self.redirect_handler = redirect_handler
+        self.callback_server: Optional[AsyncCallbackServer] = None
+        self._registration: Optional[TokenStorage] = None
+        self._registration_lock = asyncio.Lock()
+        self._providers: dict[str, ViaNexusOAuthProvider] = {}
+        self._pending: dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def from_config(cls, config: BaseConfig, **kwargs: Any) -> "TenantAuthManager":
+        return cls(
+            server=config["server"],
+            port=config["port"],
+            software_statement=config["software_statement"],
+            token_storage=config.get("token_storage") or "memory",
+            token_storage_path=config.get("token_storage_path"),
+            token_refresh_margin=config.get("token_refresh_margin", 60.0),
+            http_pool=HttpClientPool.from_config(config.get("http_pool")),
+            **kwargs,
+        )
+
+    @property
+    def tenants(self) -> list[str]:
+        return list(self._providers)
+
+    def _storage(self, namespace: str) -> TokenStorage:
+        if callable(self.token_storage):
+            return self.token_storage(namespace)
+        config = {"token_storage": self.token_storage}
+        if self.token_storage_path:
+            config["token_storage_path"] = self.token_storage_path
+        return create_token_storage(config, namespace=namespace)
+
+    async def start(self) -> None:
+        """Start the shared callback listener."""
+        if self.callback_server is not None:
+            return
+        self.callback_server = AsyncCallbackServer(port=self.callback_port or find_free_port())
+        await self.callback_server.start()
+        # The registration names the redirect URI, so it is only reused with the same listener address
+        self._registration = self._storage(f"{self.server}:{self.port}/tenants@{self.callback_server.redirect_uri}")
+
+    async def stop(self) -> None:
+        """Stop every tenant's token refresh and the callback listener. Stored tokens are kept."""
+        for provider in self._providers.values():
+            provider.cleanup()
+        self._providers.clear()
+        if self.callback_server is not None:
+            await self.callback_server.stop()
+            self.callback_server = None
+
+    async def __aenter__(self) -> "TenantAuthManager":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.stop()
+
+    async def auth(self, tenant_id: str) -> ViaNexusOAuthClientProvider:
+        """The tenant's auth layer (an `httpx.Auth`), created on first use."""
+        provider = self._providers.get(tenant_id)
+        if provider is not None:
+            return provider.oauth_provider
+        # Concurrent first calls for one tenant share a single setup
+        pending = self._pending.get(tenant_id)
+        if pending is None:
+            pending = self._pending[tenant_id] = asyncio.ensure_future(self._create(tenant_id))
+            pending.add_done_callback(lambda _: self._pending.pop(tenant_id, None))
+        return await asyncio.shield(pending)
+
+    async def _create(self, tenant_id: str) -> ViaNexusOAuthClientProvider:
+        if self.callback_server is None:
+            raise RuntimeError("TenantAuthManager not started. Use `async with manager:` first.")
+        redirect_handler = None
+        if self.redirect_handler is not None:
+            async def redirect_handler(url: str) -> None:
+                await self.redirect_handler(tenant_id, url)
+
+        storage = TenantTokenStorage(
+            tokens=self._storage(f"{self.server}:{self.port}/tenant/{tenant_id}"),
+            registration=self._registration,
+        )
+        provider = ViaNexusOAuthProvider(
+            server_url=self.server,
+            server_port=self.port,
+            software_statement=self.software_statement,
+            token_storage=storage,
+            token_refresh_margin=self.token_refresh_margin,
+            callback_server=self.callback_server,
+            http_pool=self.http_pool,
+            redirect_handler=redirect_handler,
+            registration_lock=self._registration_lock,
+        )
+        auth = await provider.initialize()
+        self._providers[tenant_id] = provider
+        logging.debug("Auth layer ready for tenant %s (%s tenants)", tenant_id, len(self._providers))
+        return auth
+
+    def connection_manager(self, tenant_id: str) -> TenantHttpSetup:
+        """A transport setup for an MCP client acting as `tenant_id`."""
+        return TenantHttpSetup(
+            server=self.server,
+            port=self.port,
+            software_statement=self.software_statement,
+            http_pool=self.http_pool,
+            callback_server=self.callback_server,
+            manager=self,
+            tenant_id=tenant_id,
+        )
+
+    async def remove(self, tenant_id: str) -> None:
+        """Forget a tenant: stop its token refresh. Its stored tokens are kept."""
+        provider = self._providers.pop(tenant_id, None)
+        if provider is not None:
+            provider.cleanup()
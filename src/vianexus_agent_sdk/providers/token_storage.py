@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from typing import Any, Optional
+
+from mcp.client.auth import TokenStorage
+from mcp.shared.auth import OAuthClientInformationFull, OAuthToken
+
+
+def _dump_tokens(tokens: OAuthToken) -> tuple[str, Optional[float]]:
+    expires_at = time.time() + tokens.expires_in if tokens.expires_in else None
+    return tokens.model_dump_json(exclude_none=True), expires_at
+
+
+def _load_tokens(raw: Optional[str]) -> Optional[OAuthToken]:
+    """
+    Rebuild a stored token. Its `expires_in` is still relative to when it was issued, so
+    callers take the expiry from the stored absolute time, see `get_tokens_and_expiry`.
+    """
+    return OAuthToken.model_validate_json(raw) if raw else None
+
+
+class InMemoryTokenStorage(TokenStorage):
+    """Simple in-memory token storage implementation."""
+
+    def __init__(self):
+        self._tokens: OAuthToken | None = None
+        self._expires_at: float | None = None
+        self._client_info: OAuthClientInformationFull | None = None
+
+    async def get_tokens(self) -> OAuthToken | None:
+        return self._tokens
+
+    async def get_tokens_and_expiry(self) -> tuple[OAuthToken | None, float | None]:
+        """The tokens and their absolute expiry (`time.time()` based, None if they do not expire)."""
+        return self._tokens, self._expires_at
+
+    async def set_tokens(self, tokens: OAuthToken) -> None:
+        self._tokens = tokens
+        self._expires_at = time.time() + tokens.expires_in if tokens.expires_in else None
+
+    async def get_client_info(self) -> OAuthClientInformationFull | None:
+        return self._client_info
+
+    async def set_client_info(self, client_info: OAuthClientInformationFull) -> None:
+        self._client_info = client_info
+
+
+class EncryptedFileTokenStorage(TokenStorage):
+    """
+    Persists tokens and client registration in a Fernet-encrypted file so restarts
+    skip dynamic client registration and the browser flow. Requires `cryptography`.
+    Entries are keyed by `namespace` (e.g. the server URL), so one file can hold several.
+    """
+
+    # One lock per file, so instances for different namespaces do not overwrite each other
+    _locks: dict[str, asyncio.Lock] = {}
+
+    def __init__(self, path: str, key: str | bytes, namespace: str = "default") -> None:
+        try:
+            from cryptography.fernet import Fernet
+        except ImportError as e:
+            raise ImportError("EncryptedFileTokenStorage requires the 'cryptography' package") from e
+        self.path = os.path.expanduser(path)
+        self.namespace = namespace
+        self._fernet = Fernet(key)
+        self._lock = self._locks.setdefault(os.path.abspath(self.path), asyncio.Lock())
+
+    @staticmethod
+    def generate_key() -> str:
+        from cryptography.fernet import Fernet
+
+        return Fernet.generate_key().decode()
+
+    def _read(self) -> dict[str, Any]:
+        try:
+            with open(self.path, "rb") as f:
+                return json.loads(self._fernet.decrypt(f.read()))
+        except FileNotFoundError:
+            return {}
+
+    def _write(self, data: dict[str, Any]) -> None:
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(self._fernet.encrypt(json.dumps(data).encode()))
+        os.replace(tmp_path, self.path)
+
+    async def _entry(self) -> dict[str, Any]:
+        data = await asyncio.to_thread(self._read)
+        return data.get(self.namespace) or {}
+
+    async def _update(self, **values: Any) -> None:
+        async with self._lock:
+            data = await asyncio.to_thread(self._read)
+            data.setdefault(self.namespace, {}).update(values)
+            await asyncio.to_thread(self._write, data)
+
+    async def get_tokens(self) -> OAuthToken | None:
+        return (await self.get_tokens_and_expiry())[0]
+
+    async def get_tokens_and_expiry(self) -> tuple[OAuthToken | None, float | None]:
+        """The tokens and their stored absolute expiry, in the past once they have expired."""
+        entry = await self._entry()
+        return _load_tokens(entry.get("tokens")), entry.get("expires_at")
+
+    async def set_tokens(self, tokens: OAuthToken) -> None:
+        raw, expires_at = _dump_tokens(tokens)
+        await self._update(tokens=raw, expires_at=expires_at)
+
+    async def get_client_info(self) -> OAuthClientInformationFull | None:
+        raw = (await self._entry()).get("client_info")
+        return OAuthClientInformationFull.model_validate_json(raw) if raw else None
+
+    async def set_client_info(self, client_info: OAuthClientInformationFull) -> None:
+        await self._update(client_info=client_info.model_dump_json(exclude_none=True))
+
+
+class SQLiteTokenStorage(TokenStorage):
+    """
+    Token storage in a SQLite database that several processes on one host can share.
+    Rows are keyed by `namespace` (e.g. the server URL). Writes take an immediate
+    transaction, and `acquire_refresh_lease` lets only one process refresh at a time.
+    """
+
+    def __init__(self, path: str, namespace: str = "default", busy_timeout: float = 30.0) -> None:
+        self.path = os.path.expanduser(path)
+        self.namespace = namespace
+        self.busy_timeout = busy_timeout
+        self.owner = uuid.uuid4().hex
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+        if not self._schema_ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS oauth_tokens ("
+                "namespace TEXT PRIMARY KEY, tokens TEXT, expires_at REAL, client_info TEXT, "
+                "lease_owner TEXT, lease_expires_at REAL, updated_at REAL)"
+            )
+            self._schema_ready = True
+        return conn
+
+    def _select(self, column: str) -> tuple:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                f"SELECT {column} FROM oauth_tokens WHERE namespace = ?", (self.namespace,)
+            ).fetchone()
+        return row or (None,) * (column.count(",") + 1)
+
+    def _upsert(self, **values: Any) -> None:
+        columns = list(values) + ["updated_at"]
+        params = list(values.values()) + [time.time()]
+        assignments = ", ".join(f"{c} = excluded.{c}" for c in columns)
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                f"INSERT INTO oauth_tokens (namespace, {', '.join(columns)}) "
+                f"VALUES (?, {', '.join('?' for _ in columns)}) "
+                f"ON CONFLICT(namespace) DO UPDATE SET {assignments}",
+                [self.namespace, *params],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _try_lease(self, ttl: float) -> bool:
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR IGNORE INTO oauth_tokens (namespace, updated_at) VALUES (?, ?)",
+                (self.namespace, now),
+            )
+            cursor = conn.execute(
+                "UPDATE oauth_tokens SET lease_owner = ?, lease_expires_at = ? "
+                "WHERE namespace = ? AND (lease_owner IS NULL OR lease_owner = ? OR lease_expires_at < ?)",
+                (self.owner, now + ttl, self.namespace, self.owner, now),
+            )
+            conn.execute("COMMIT")
+            return cursor.rowcount == 1
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _release_lease(self) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE oauth_tokens SET lease_owner = NULL, lease_expires_at = NULL "
+                "WHERE namespace = ? AND lease_owner = ?",
+                (self.namespace, self.owner),
+            )
+
+    async def get_tokens(self) -> OAuthToken | None:
+        return (await self.get_tokens_and_expiry())[0]
+
+    async def get_tokens_and_expiry(self) -> tuple[OAuthToken | None, float | None]:
+        """The tokens and their stored absolute expiry, in the past once they have expired."""
+        raw, expires_at = await asyncio.to_thread(self._select, "tokens, expires_at")
+        return _load_tokens(raw), expires_at
+
+    async def set_tokens(self, tokens: OAuthToken) -> None:
+        raw, expires_at = _dump_tokens(tokens)
+        await asyncio.to_thread(self._upsert, tokens=raw, expires_at=expires_at)
+
+    async def get_client_info(self) -> OAuthClientInformationFull | None:
+        (raw,) = await asyncio.to_thread(self._select, "client_info")
+        return OAuthClientInformationFull.model_validate_json(raw) if raw else None
+
+    async def set_client_info(self, client_info: OAuthClientInformationFull) -> None:
+        await asyncio.to_thread(self._upsert, client_info=client_info.model_dump_json(exclude_none=True))
+
+    async def acquire_refresh_lease(self, ttl: float = 30.0) -> bool:
+        """Try to become the only process refreshing this namespace for `ttl` seconds."""
+        return await asyncio.to_thread(self._try_lease, ttl)
+
+    async def release_refresh_lease(self) -> None:
+        await asyncio.to_thread(self._release_lease)
+
+
+def create_token_storage(config: dict[str, Any], namespace: str = "default") -> TokenStorage:
+    """
+    Build the token storage selected by `token_storage` in the config:
+    "memory" (default), "file" or "sqlite", a TokenStorage instance, or a factory
+    `namespace -> TokenStorage`. The file and SQLite storages keep each namespace apart.
+    """
+    storage = config.get("token_storage") or "memory"
+    if not isinstance(storage, str):
+        if callable(storage) and not hasattr(storage, "get_tokens"):
+            return storage(namespace)
+        return storage
+    if storage == "memory":
+        return InMemoryTokenStorage()
+    if storage == "file":
+        key = config.get("token_encryption_key") or os.environ.get("VIANEXUS_TOKEN_KEY")
+        if not key:
+            raise ValueError("token_encryption_key is required for the encrypted file token storage")
+        return EncryptedFileTokenStorage(
+            config.get("token_storage_path") or "~/.vianexus/tokens.enc", key, namespace=namespace
+        )
+    if storage == "sqlite":
+        return SQLiteTokenStorage(config.get("token_storage_path") or "~/.vianexus/tokens.db", namespace=namespace)
+    raise ValueError(f"Unknown token storage: {storage}")
@@ -0,0 +1,333 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from vianexus_agent_sdk.types.config import RateLimitConfig
+
+# Status codes worth retrying: timeouts, rate limits, overload and transient server errors
+_RETRY_STATUS = (408, 429, 500, 502, 503, 504, 529)
+_THROTTLE_STATUS = (429, 529)
+# Error types of an `error` event in the middle of an Anthropic stream (sent with HTTP 200)
+_RETRY_ERROR_TYPES = ("rate_limit_error", "overloaded_error", "api_error")
+_THROTTLE_ERROR_TYPES = ("rate_limit_error", "overloaded_error")
+
+
+def _status(error: BaseException) -> Optional[int]:
+    # SDK errors carry `status_code` (or `code`), httpx.HTTPStatusError only its response's
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def _error_type(error: BaseException) -> Optional[str]:
+    body = getattr(error, "body", None)
+    if isinstance(body, dict) and isinstance(body.get("error"), dict):
+        return body["error"].get("type")
+    return None
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """
+    Seconds the server asked us to wait before retrying `error` (0 if it did not say),
+    or None if the error is not worth retrying.
+    """
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)) or type(error).__name__ in (
+        "APIConnectionError",
+        "APITimeoutError",
+    ):
+        return 0.0
+    status = _status(error)
+    if status not in _RETRY_STATUS and _error_type(error) not in _RETRY_ERROR_TYPES:
+        return None
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return max(0.0, float(headers.get("retry-after", 0)))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def is_throttle(error: BaseException) -> bool:
+    """True for rate-limit and overload errors: the request was refused, not processed."""
+    return _status(error) in _THROTTLE_STATUS or _error_type(error) in _THROTTLE_ERROR_TYPES
+
+
+class TokenBucket:
+    """
+    Admits `rate` requests per second with bursts of up to `burst`. A None rate admits
+    everything, but the bucket can still be paused after a throttle.
+
+    With `adaptive` on, a throttle halves the rate (down to a tenth of the configured one)
+    and every success wins back 5% of it, so a limit set slightly above the real quota
+    settles just below it.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None, adaptive: bool = True) -> None:
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate or 1.0)
+        self.adaptive = adaptive
+        self.tokens = self.capacity
+        self.paused_until = 0.0
+        self.throttles = 0
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """Wait for `amount` tokens. Waiters are admitted in arrival order."""
+        if self.rate is not None:
+            self._refill(time.monotonic())
+            # Reserve now and sleep off the debt, so concurrent waiters queue up instead of racing
+            self.tokens -= amount
+            if self.tokens < 0:
+                await asyncio.sleep(-self.tokens / self.rate)
+        await self.wait_for_resume()
+
+    async def wait_for_resume(self) -> None:
+        """Wait out a pause set by `throttle`."""
+        while (pause := self.paused_until - time.monotonic()) > 0:
+            await asyncio.sleep(pause)
+
+    def throttle(self, pause: float) -> None:
+        """Hold back every caller for `pause` seconds and, if adaptive, slow down."""
+        self.throttles += 1
+        self.paused_until = max(self.paused_until, time.monotonic() + pause)
+        if self.adaptive and self.rate is not None:
+            self._refill(time.monotonic())
+            self.rate = max(self.max_rate * 0.1, self.rate * 0.5)
+
+    def succeeded(self) -> None:
+        if self.adaptive and self.rate is not None and self.rate < self.max_rate:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a tool that kept failing."""
+
+    def __init__(self, name: str, failures: int, retry_in: float) -> None:
+        super().__init__(
+            f"Tool '{name}' is unavailable after {failures} consecutive failures, try again in {retry_in:.0f}s"
+        )
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and fails calls fast for `reset_timeout`
+    seconds. Then one trial call is let through: success closes the circuit, failure opens
+    it again.
+    """
+
+    def __init__(self, name: str, threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.name = name
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() >= self.opened_at + self.reset_timeout else "open"
+
+    def check(self) -> bool:
+        """
+        Raise `CircuitOpenError` unless a call may go ahead. Returns True if the call is the
+        half-open trial: its caller must record its outcome, or `release_trial` if it has none.
+        """
+        state = self.state
+        if state == "closed":
+            return False
+        if state == "half_open" and not self._trial:
+            self._trial = True
+            return True
+        retry_in = max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+        raise CircuitOpenError(self.name, self.failures, retry_in)
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def release_trial(self) -> None:
+        """Give back a trial call that ended without an outcome, e.g. because it was cancelled."""
+        self._trial = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial or self.failures >= self.threshold:
+            if self.opened_at is None or self._trial:
+                logging.warning("Circuit for tool %s opened after %s failures", self.name, self.failures)
+            self.opened_at = time.monotonic()
+            self._trial = False
+
+
+def _limit(spec: Any) -> tuple[Optional[float], Optional[float]]:
+    """(rate per second, burst) of a limit given as requests per minute or a dict."""
+    if spec is None:
+        return None, None
+    if isinstance(spec, (int, float)):
+        return spec / 60.0, None
+    return spec["per_minute"] / 60.0, spec.get("burst")
+
+
+class RateGovernor:
+    """
+    Shared admission control for model requests and MCP tool calls.
+
+    Each model and each MCP server gets a token bucket, limited per `models` / `servers`
+    (requests per minute, `"*"` for the rest) or unlimited. The default burst is one
+    second's worth of requests, since providers enforce per-minute limits over shorter
+    windows. Retryable errors are retried with jittered exponential backoff, at least as
+    long as `retry-after` asks; a throttle pauses every caller of the same bucket. Each
+    tool has a circuit breaker.
+
+    One instance is meant to be shared by every client of a process, see `get_default_governor`.
+    """
+
+    def __init__(
+        self,
+        models: Optional[dict[str, Any]] = None,
+        servers: Optional[dict[str, Any]] = None,
+        max_retries: int = 5,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        adaptive: bool = True,
+        breaker_threshold: int = 5,
+        breaker_reset: float = 30.0,
+    ) -> None:
+        self.limits = {"model": dict(models or {}), "server": dict(servers or {})}
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.adaptive = adaptive
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self._buckets: dict[tuple[str, str], TokenBucket] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    @classmethod
+    def from_config(cls, config: RateLimitConfig | "RateGovernor" | None) -> "RateGovernor":
+        """Build a governor from a config dict. An existing one is returned as is, None gives the default."""
+        if config is None:
+            return get_default_governor()
+        if isinstance(config, RateGovernor):
+            return config
+        return cls(
+            models=config.get("models"),
+            servers=config.get("servers"),
+            max_retries=config.get("max_retries", 5),
+            initial_backoff=config.get("initial_backoff", 1.0),
+            max_backoff=config.get("max_backoff", 60.0),
+            adaptive=config.get("adaptive", True),
+            breaker_threshold=config.get("breaker_threshold", 5),
+            breaker_reset=config.get("breaker_reset", 30.0),
+        )
+
+    def bucket(self, model: Optional[str] = None, server: Optional[str] = None) -> TokenBucket:
+        kind, key = ("model", model) if model is not None else ("server", server or "")
+        bucket = self._buckets.get((kind, key))
+        if bucket is None:
+            limits = self.limits[kind]
+            rate, burst = _limit(limits.get(key, limits.get("*")))
+            bucket = self._buckets[(kind, key)] = TokenBucket(rate, burst, self.adaptive)
+        return bucket
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = self._breakers[name] = CircuitBreaker(name, self.breaker_threshold, self.breaker_reset)
+        return breaker
+
+    async def acquire(self, model: Optional[str] = None, server: Optional[str] = None) -> None:
+        await self.bucket(model, server).acquire()
+
+    def succeeded(self, model: Optional[str] = None, server: Optional[str] = None) -> None:
+        self.bucket(model, server).succeeded()
+
+    def backoff(self, attempt: int, initial: Optional[float] = None, maximum: Optional[float] = None) -> float:
+        """Jittered exponential backoff before retry number `attempt + 1`."""
+        initial = self.initial_backoff if initial is None else initial
+        maximum = self.max_backoff if maximum is None else maximum
+        return min(maximum, initial * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    def throttled(
+        self, error: BaseException, wait: float, model: Optional[str] = None, server: Optional[str] = None
+    ) -> None:
+        """Pause the bucket if `error` means we were throttled (`wait` is the pause to apply)."""
+        if is_throttle(error) or wait > 0:
+            self.bucket(model, server).throttle(wait)
+
+    def retry_delay(
+        self,
+        error: BaseException,
+        attempt: int,
+        model: Optional[str] = None,
+        server: Optional[str] = None,
+    ) -> Optional[float]:
+        """
+        Seconds to wait before retrying after `error` on attempt `attempt` (counted from 0),
+        or None to give up. Throttles, and errors the server sent a retry-after with, pause
+        the bucket for everyone. Other transient errors only delay this caller.
+        """
+        wait = retry_after(error)
+        if wait is None or attempt >= self.max_retries:
+            return None
+        delay = max(wait, self.backoff(attempt))
+        if is_throttle(error) or wait > 0:
+            self.bucket(model, server).throttle(wait or delay)
+        return delay
+
+    async def call(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        model: Optional[str] = None,
+        server: Optional[str] = None,
+        retry: Callable[[BaseException], bool] = lambda e: True,
+    ) -> Any:
+        """Run `call` through the bucket, retrying errors that are retryable and pass `retry`."""
+        attempt = 0
+        while True:
+            await self.acquire(model, server)
+            try:
+                result = await call()
+            except Exception as e:
+                delay = self.retry_delay(e, attempt, model, server) if retry(e) else None
+                if delay is None:
+                    raise
+                attempt += 1
+                logging.warning("Retrying in %.1fs after: %s", delay, e)
+                await asyncio.sleep(delay)
+                continue
+            self.succeeded(model, server)
+            return result
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "buckets": {
+                f"{kind}:{key}": {"rate_per_minute": b.rate * 60 if b.rate else None, "throttles": b.throttles}
+                for (kind, key), b in self._buckets.items()
+            },
+            "open_circuits": [name for name, b in self._breakers.items() if b.state != "closed"],
+        }
+
+
+_default_governor: Optional[RateGovernor] = None
+
+
+def get_default_governor() -> RateGovernor:
+    """The process-wide governor (no rate limits, default retries), created on first use."""
+    global _default_governor
+    if _default_governor is None:
+        _default_governor = RateGovernor()
+    return _default_governor
@@ -0,0 +1,347 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Optional
+
+from vianexus_agent_sdk.mcp_client.enhanced_mcp_client import MCPConnection
+from vianexus_agent_sdk.ratelimit.governor import retry_after
+from vianexus_agent_sdk.telemetry.tracing import _percentile, get_telemetry
+from vianexus_agent_sdk.types.config import ModelRouteConfig, RouterConfig
+from vianexus_agent_sdk.types.events import AgentEvent, Final, ModelSelected, TextDelta, ToolCallStart, ToolResult, Usage
+
+FAST = "fast"
+STRONG = "strong"
+PROVIDERS = ("anthropic", "gemini")
+
+# Used when the config lists no routes. Costs are USD per million tokens.
+DEFAULT_ROUTES: list[ModelRouteConfig] = [
+    {"name": "haiku", "provider": "anthropic", "model": "claude-3-5-haiku-20241022", "tier": FAST,
+     "input_cost": 0.8, "output_cost": 4.0},
+    {"name": "sonnet", "provider": "anthropic", "model": "claude-3-5-sonnet-20241022", "tier": STRONG,
+     "input_cost": 3.0, "output_cost": 15.0},
+]
+
+_ANALYSIS = re.compile(
+    r"\b(compar\w*|versus|vs\.?|analy[sz]\w*|trends?|correlat\w*|forecast\w*|explain|why|portfolio|"
+    r"scenario|impact|histor\w*|over the (?:last|past)|year over year|valuation|summar\w*|report|rank\w*)\b",
+    re.IGNORECASE,
+)
+_TICKER = re.compile(r"\b[A-Z]{2,5}\b")
+
+
+def classify_query(query: str) -> str:
+    """
+    Default routing policy: "strong" for multi-step analysis (long queries, analysis
+    wording, more than two tickers), "fast" for simple lookups.
+    """
+    if len(query.split()) > 30 or _ANALYSIS.search(query):
+        return STRONG
+    if len(set(_TICKER.findall(query))) > 2:
+        return STRONG
+    return FAST
+
+
+def should_fail_over(error: BaseException) -> bool:
+    """True for overload, rate limits, timeouts and transient errors: another model may well answer."""
+    return retry_after(error) is not None
+
+
+@dataclass
+class ModelRoute:
+    """A model queries can be routed to, with its price in USD per million tokens."""
+
+    name: str
+    provider: str
+    model: str
+    tier: str = STRONG
+    input_cost: float = 0.0
+    output_cost: float = 0.0
+    # Defaults to a tenth of the input price
+    cache_read_cost: Optional[float] = None
+
+    @classmethod
+    def from_config(cls, spec: ModelRouteConfig | "ModelRoute") -> "ModelRoute":
+        if isinstance(spec, ModelRoute):
+            return spec
+        if spec.get("provider") not in PROVIDERS:
+            raise ValueError(f"Route {spec.get('name')!r}: provider must be one of {PROVIDERS}")
+        return cls(
+            name=spec.get("name") or spec["model"],
+            provider=spec["provider"],
+            model=spec["model"],
+            tier=spec.get("tier", STRONG),
+            input_cost=spec.get("input_cost", 0.0),
+            output_cost=spec.get("output_cost", 0.0),
+            cache_read_cost=spec.get("cache_read_cost"),
+        )
+
+    def cost(self, usage: Usage) -> float:
+        cache_read_cost = self.input_cost * 0.1 if self.cache_read_cost is None else self.cache_read_cost
+        return (
+            usage.input_tokens * self.input_cost
+            + usage.cache_creation_input_tokens * self.input_cost * 1.25
+            + usage.cache_read_input_tokens * cache_read_cost
+            + usage.output_tokens * self.output_cost
+        ) / 1_000_000
+
+
+@dataclass
+class RouteStats:
+    requests: int = 0
+    failures: int = 0
+    failovers: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0.0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=1000))
+
+    def as_dict(self) -> dict[str, Any]:
+        latencies = list(self.latencies)
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "failovers": self.failovers,
+            "latency_p50": _percentile(latencies, 0.50) if latencies else None,
+            "latency_p99": _percentile(latencies, 0.99) if latencies else None,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cost_usd": round(self.cost, 6),
+        }
+
+
+class RoutedConversation:
+    """The turns of a conversation kept as text, so whichever model answers next can continue it."""
+
+    def __init__(self, max_turns: Optional[int] = 10) -> None:
+        self.max_turns = max_turns
+        self.turns: list[tuple[str, str]] = []
+
+    def add(self, query: str, answer: str) -> None:
+        self.turns.append((query, answer))
+        if self.max_turns is not None:
+            del self.turns[:-self.max_turns or len(self.turns)]
+
+
+class _AnthropicBackend:
+    def __init__(self, client: Any) -> None:
+        self.client = client
+
+    async def stream(
+        self, route: ModelRoute, query: str, conversation: RoutedConversation, max_retries: Optional[int]
+    ) -> AsyncIterator[AgentEvent]:
+        history = self.client.new_history()
+        for previous, answer in conversation.turns:
+            history.append("user", previous)
+            history.append("assistant", answer)
+        async for event in self.client.stream_query(query, history, model=route.model, max_retries=max_retries):
+            yield event
+
+
+class _GeminiBackend:
+    def __init__(self, tools: MCPConnection, app_name: str) -> None:
+        # The gemini package reports a missing extra with the install command
+        from vianexus_agent_sdk.gemini.tools.client_toolset import ClientMCPToolset
+
+        from google.adk.sessions import InMemorySessionService
+
+        self.toolset = ClientMCPToolset(tools)
+        self.session_service = InMemorySessionService()
+        self.app_name = app_name
+        self._runners: dict[str, Any] = {}
+
+    async def runner(self, model: str) -> Any:
+        runner = self._runners.get(model)
+        if runner is None:
+            from vianexus_agent_sdk.gemini.agents.llm_agent import GeminiLLMAgent
+            from vianexus_agent_sdk.gemini.runners.runner import GeminiRunner
+
+            runner = GeminiRunner(
+                agent=GeminiLLMAgent(model=model, tools=[self.toolset]),
+                user_id=None,
+                app_name=self.app_name,
+                session_id=None,
+                session_service=self.session_service,
+            )
+            await runner.initialize()
+            self._runners[model] = runner
+        return runner
+
+    async def stream(
+        self, route: ModelRoute, query: str, conversation: RoutedConversation, max_retries: Optional[int]
+    ) -> AsyncIterator[AgentEvent]:
+        from google.adk.events import Event
+        from google.genai import types as genai_types
+
+        runner = await self.runner(route.model)
+        user_id, session_id = "router", uuid.uuid4().hex
+        # A throwaway session seeded with the earlier turns
+        session = await self.session_service.create_session(
+            app_name=self.app_name, user_id=user_id, session_id=session_id
+        )
+        for previous, answer in conversation.turns:
+            for author, role, text in (("user", "user", previous), (runner.agent.name, "model", answer)):
+                await self.session_service.append_event(session, Event(
+                    invocation_id=f"history-{session_id}",
+                    author=author,
+                    content=genai_types.Content(role=role, parts=[genai_types.Part(text=text)]),
+                ))
+        try:
+            async for event in runner.stream_async(query, session_id=session_id, user_id=user_id):
+                yield event
+        finally:
+            await self.session_service.delete_session(app_name=self.app_name, user_id=user_id, session_id=session_id)
+
+
+class ModelRouter:
+    """
+    One query API over the Anthropic and Gemini backends, sharing one MCP connection.
+
+    Each query is routed by `policy` (`classify_query` by default) to a tier: "fast"
+    routes for simple lookups, "strong" routes for multi-step analysis. When a model is
+    overloaded, rate limited, times out (no event for `idle_timeout` seconds while waiting
+    on the model; running tools do not count) or fails transiently before any answer text
+    has streamed or any tool has been called, the query fails over to the next route of
+    the tier and then to the other tier. Model requests are retried only
+    `retries_before_failover` times first. Latency, tokens and cost are recorded per
+    route, see `stats`.
+
+    The tools of both backends go through the same `MCPConnection` (the Anthropic
+    client when there are Anthropic routes), with its caches, batching and rate limits.
+
+    Usage:
+        router = ModelRouter(config)
+        async with router.connect():
+            async for event in router.stream("What is AAPL's P/E?"):
+                ...
+    """
+
+    def __init__(self, config: RouterConfig, policy: Optional[Callable[[str], str]] = None) -> None:
+        self.config = config
+        self.routes = [ModelRoute.from_config(r) for r in (config.get("routes") or DEFAULT_ROUTES)]
+        if len({r.name for r in self.routes}) != len(self.routes):
+            raise ValueError("Route names must be unique")
+        self.policy = policy or classify_query
+        self.idle_timeout = config.get("idle_timeout", 60.0)
+        self.retries_before_failover = config.get("retries_before_failover", 1)
+        self.route_stats = {r.name: RouteStats() for r in self.routes}
+        self.conversation = RoutedConversation(config.get("max_history_turns", 10))
+
+        providers = {r.provider for r in self.routes}
+        self._backends: dict[str, Any] = {}
+        self.anthropic = None
+        if "anthropic" in providers:
+            # Imported here so a Gemini-only router does not need the anthropic extra
+            from vianexus_agent_sdk.clients.anthropic_client import AnthropicClient
+
+            self.anthropic = AnthropicClient(config)
+            self._backends["anthropic"] = _AnthropicBackend(self.anthropic)
+        self.tools: MCPConnection = self.anthropic or MCPConnection(config)
+        if "gemini" in providers:
+            self._backends["gemini"] = _GeminiBackend(self.tools, config.get("app_name", "viaNexus_Agent"))
+
+    @asynccontextmanager
+    async def connect(self) -> AsyncIterator["ModelRouter"]:
+        """Connect the shared MCP session for the duration of the block."""
+        async with self.tools.connect():
+            yield self
+
+    def candidates(self, tier: str) -> list[ModelRoute]:
+        """Routes to try for `tier`, in order: that tier's routes, then the others."""
+        return [r for r in self.routes if r.tier == tier] + [r for r in self.routes if r.tier != tier]
+
+    async def stream(
+        self,
+        query: str,
+        conversation: Optional[RoutedConversation] = None,
+        tier: Optional[str] = None,
+    ) -> AsyncIterator[AgentEvent]:
+        """
+        Answer `query` within `conversation` (the router's own by default), yielding a
+        ModelSelected event for every model tried and then that model's events. `tier`
+        overrides the policy.
+        """
+        conversation = conversation if conversation is not None else self.conversation
+        tier = tier or self.policy(query)
+        routes = self.candidates(tier)
+        reason = f"{tier} query"
+        for index, route in enumerate(routes):
+            stats = self.route_stats[route.name]
+            stats.requests += 1
+            yield ModelSelected(route=route.name, provider=route.provider, model=route.model, reason=reason)
+            started = time.perf_counter()
+            # Once text has streamed or a tool has run, another model would repeat them
+            committed = False
+            events = self._backends[route.provider].stream(
+                route, query, conversation, self.retries_before_failover
+            )
+            try:
+                async for event in self._with_idle_timeout(events):
+                    if isinstance(event, Usage):
+                        self._record_usage(route, stats, event)
+                    elif isinstance(event, (TextDelta, ToolCallStart)):
+                        committed = True
+                    elif isinstance(event, Final):
+                        self._record_latency(route, stats, time.perf_counter() - started)
+                        conversation.add(query, event.text)
+                    yield event
+                return
+            except Exception as e:
+                stats.failures += 1
+                if committed or index == len(routes) - 1 or not should_fail_over(e):
+                    raise
+                stats.failovers += 1
+                reason = f"failover from {route.name}: {type(e).__name__}"
+                logging.warning(
+                    "Model %s failed, failing over to %s: %s: %s", route.name, routes[index + 1].name, type(e).__name__, e
+                )
+
+    async def ask(self, query: str, conversation: Optional[RoutedConversation] = None) -> str:
+        """Answer `query` and return the final text."""
+        text = ""
+        async for event in self.stream(query, conversation):
+            if isinstance(event, Final):
+                text = event.text
+        return text
+
+    async def _with_idle_timeout(self, events: AsyncIterator[AgentEvent]) -> AsyncIterator[AgentEvent]:
+        """Pass `events` through, timing out when the model is silent for `idle_timeout` seconds."""
+        # Tools started and not yet answered: the wait is on them, not on the model
+        running = 0
+        try:
+            while True:
+                try:
+                    if self.idle_timeout and not running:
+                        event = await asyncio.wait_for(events.__anext__(), self.idle_timeout)
+                    else:
+                        event = await events.__anext__()
+                except StopAsyncIteration:
+                    return
+                if isinstance(event, ToolCallStart):
+                    running += 1
+                elif isinstance(event, ToolResult):
+                    running = max(0, running - 1)
+                yield event
+        finally:
+            await events.aclose()
+
+    def _record_usage(self, route: ModelRoute, stats: RouteStats, usage: Usage) -> None:
+        cost = route.cost(usage)
+        stats.input_tokens += usage.input_tokens + usage.cache_creation_input_tokens + usage.cache_read_input_tokens
+        stats.output_tokens += usage.output_tokens
+        stats.cost += cost
+        get_telemetry().record("router.request.cost", cost, route=route.name, model=route.model)
+
+    def _record_latency(self, route: ModelRoute, stats: RouteStats, seconds: float) -> None:
+        stats.latencies.append(seconds)
+        get_telemetry().record("router.query.duration", seconds, route=route.name, model=route.model)
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Per route: requests, failures, failovers, latency p50/p99 in seconds, tokens and cost in USD."""
+        return {name: stats.as_dict() for name, stats in self.route_stats.items()}
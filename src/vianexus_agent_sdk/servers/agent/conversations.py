@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Callable, Optional
+
+from vianexus_agent_sdk.types.events import AgentEvent
+
+
+class ConversationNotFound(KeyError):
+    """Raised when a conversation id is unknown."""
+
+
+class ConversationBusy(RuntimeError):
+    """Raised when a conversation's pending-query queue is full."""
+
+
+class Conversation:
+    """
+    A single conversation: its own message history and a bounded queue of pending
+    queries, answered one at a time so the history stays consistent.
+    """
+
+    def __init__(self, conversation_id: str, manager: "ConversationManager", queue_size: int) -> None:
+        self.id = conversation_id
+        self.history = manager.client.new_history()
+        self.created_at = time.monotonic()
+        self.last_active = self.created_at
+        self._manager = manager
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._busy = False
+        self._worker = asyncio.create_task(self._run(), name=f"conversation-{conversation_id}")
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def idle(self) -> bool:
+        return not self._busy and self._queue.empty()
+
+    def submit(self, query: str, on_event: Optional[Callable[[AgentEvent], None]] = None) -> asyncio.Future:
+        """Queue `query` and return a future resolving to the response text."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((query, on_event, future))
+        except asyncio.QueueFull:
+            raise ConversationBusy(f"Conversation {self.id} has {self.pending} queries pending") from None
+        self.last_active = time.monotonic()
+        return future
+
+    async def ask(self, query: str, on_event: Optional[Callable[[AgentEvent], None]] = None) -> str:
+        return await self.submit(query, on_event)
+
+    async def _run(self) -> None:
+        while True:
+            query, on_event, future = await self._queue.get()
+            self._busy = True
+            try:
+                if future.cancelled():
+                    continue
+                async with self._manager._query_slots:
+                    response = await self._manager.client.respond(query, self.history, on_event)
+                if not future.done():
+                    future.set_result(response)
+            except Exception as e:
+                logging.error("Conversation %s query failed: %s", self.id, e)
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self._busy = False
+                self.last_active = time.monotonic()
+                self._queue.task_done()
+
+    async def close(self) -> None:
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        while not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.cancel()
+
+
+class ConversationManager:
+    """
+    Programmatic, headless front end for a connected client.
+
+    Many conversations share the client's single authenticated MCP session. Each keeps its
+    own history and a bounded queue; `max_concurrent_queries` caps work across all of them.
+
+    Usage:
+        async with client.connect():
+            manager = ConversationManager(client)
+            conversation = manager.create()
+            answer = await conversation.ask("What is AAPL's P/E?")
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        max_conversations: int = 1000,
+        queue_size: int = 8,
+        max_concurrent_queries: int = 32,
+        idle_timeout: Optional[float] = None,
+    ) -> None:
+        self.client = client
+        self.max_conversations = max_conversations
+        self.queue_size = queue_size
+        self.idle_timeout = idle_timeout
+        self._conversations: dict[str, Conversation] = {}
+        self._query_slots = asyncio.Semaphore(max_concurrent_queries)
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    def create(self, conversation_id: Optional[str] = None) -> Conversation:
+        """Start a new conversation, evicting idle ones first when at capacity."""
+        conversation_id = conversation_id or uuid.uuid4().hex
+        if conversation_id in self._conversations:
+            return self._conversations[conversation_id]
+        if len(self._conversations) >= self.max_conversations:
+            self._evict_idle()
+        if len(self._conversations) >= self.max_conversations:
+            raise RuntimeError(f"Maximum number of conversations ({self.max_conversations}) reached")
+        conversation = Conversation(conversation_id, self, self.queue_size)
+        self._conversations[conversation_id] = conversation
+        return conversation
+
+    def get(self, conversation_id: str) -> Conversation:
+        try:
+            return self._conversations[conversation_id]
+        except KeyError:
+            raise ConversationNotFound(conversation_id) from None
+
+    async def ask(
+        self,
+        conversation_id: str,
+        query: str,
+        on_event: Optional[Callable[[AgentEvent], None]] = None,
+    ) -> str:
+        return await self.get(conversation_id).ask(query, on_event)
+
+    async def close(self, conversation_id: str) -> None:
+        conversation = self._conversations.pop(conversation_id, None)
+        if conversation is None:
+            raise ConversationNotFound(conversation_id)
+        await conversation.close()
+
+    async def close_all(self) -> None:
+        conversations = list(self._conversations.values())
+        self._conversations.clear()
+        await asyncio.gather(*(c.close() for c in conversations), return_exceptions=True)
+
+    def _evict_idle(self) -> None:
+        if self.idle_timeout is None:
+            return
+        cutoff = time.monotonic() - self.idle_timeout
+        for conversation_id, conversation in list(self._conversations.items()):
+            if conversation.idle and conversation.last_active < cutoff:
+                del self._conversations[conversation_id]
+                asyncio.create_task(conversation.close())
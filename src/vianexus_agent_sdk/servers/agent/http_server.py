@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any
+
+from vianexus_agent_sdk.types.events import event_to_dict
+
+from .conversations import ConversationBusy, ConversationManager, ConversationNotFound
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def create_app(manager: ConversationManager):
+    """
+    Build a Starlette app exposing the conversation manager over HTTP.
+
+    POST   /conversations                    -> {"id": ...}
+    DELETE /conversations/{id}
+    POST   /conversations/{id}/messages      {"query": ..., "stream": false} -> {"response": ...}
+           with "stream": true every agent event (text_delta, tool_call_start,
+           tool_result, usage, final) is sent as a server-sent event
+    """
+    # Imported lazily so the HTTP front end stays optional
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse, Response, StreamingResponse
+    from starlette.routing import Route
+
+    async def create_conversation(request: Request) -> Response:
+        body = await request.json() if await request.body() else {}
+        try:
+            conversation = manager.create(body.get("id"))
+        except RuntimeError as e:
+            return JSONResponse({"error": str(e)}, status_code=503)
+        return JSONResponse({"id": conversation.id}, status_code=201)
+
+    async def delete_conversation(request: Request) -> Response:
+        try:
+            await manager.close(request.path_params["conversation_id"])
+        except ConversationNotFound:
+            return JSONResponse({"error": "conversation not found"}, status_code=404)
+        return Response(status_code=204)
+
+    async def post_message(request: Request) -> Response:
+        body = await request.json()
+        query = (body.get("query") or "").strip()
+        if not query:
+            return JSONResponse({"error": "query is required"}, status_code=400)
+
+        try:
+            conversation = manager.get(request.path_params["conversation_id"])
+            if not body.get("stream"):
+                return JSONResponse({"response": await conversation.ask(query)})
+
+            events: asyncio.Queue = asyncio.Queue()
+            future = conversation.submit(query, on_event=events.put_nowait)
+        except ConversationNotFound:
+            return JSONResponse({"error": "conversation not found"}, status_code=404)
+        except ConversationBusy as e:
+            return JSONResponse({"error": str(e)}, status_code=429)
+        except Exception as e:
+            logging.error("Query failed: %s", e)
+            return JSONResponse({"error": str(e)}, status_code=500)
+
+        async def stream_events():
+            while not future.done() or not events.empty():
+                getter = asyncio.ensure_future(events.get())
+                await asyncio.wait({getter, future}, return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    event = getter.result()
+                    yield _sse(event.type, event_to_dict(event))
+                else:
+                    getter.cancel()
+            if future.cancelled():
+                yield _sse("error", {"error": "cancelled"})
+            elif future.exception() is not None:
+                yield _sse("error", {"error": str(future.exception())})
+
+        return StreamingResponse(stream_events(), media_type="text/event-stream")
+
+    return Starlette(routes=[
+        Route("/conversations", create_conversation, methods=["POST"]),
+        Route("/conversations/{conversation_id}", delete_conversation, methods=["DELETE"]),
+        Route("/conversations/{conversation_id}/messages", post_message, methods=["POST"]),
+    ])
+
+
+class AgentHTTPServer:
+    """Local HTTP/SSE front end for a `ConversationManager` (requires starlette and uvicorn)."""
+
+    def __init__(self, manager: ConversationManager, host: str = "127.0.0.1", port: int = 8080) -> None:
+        self.manager = manager
+        self.host = host
+        self.port = port
+        self.server = None
+
+    async def serve(self) -> None:
+        """Serve until cancelled or `stop()` is called."""
+        import uvicorn
+
+        config = uvicorn.Config(create_app(self.manager), host=self.host, port=self.port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        logging.debug(f"Started agent server on http://{self.host}:{self.port}")
+        try:
+            await self.server.serve()
+        finally:
+            await self.manager.close_all()
+
+    def stop(self) -> None:
+        if self.server:
+            self.server.should_exit = True
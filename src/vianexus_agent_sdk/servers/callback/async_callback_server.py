@@ -0,0 +1,131 @@
+import asyncio
+import logging
+from urllib.parse import urlparse, parse_qs
+
+_PAGE = "<html><body><h3>{message}</h3><p>You can close this window.</p></body></html>"
+
+
+class AsyncCallbackServer:
+    """
+    asyncio-native OAuth callback listener.
+
+    Each authorization flow registers its `state` with `expect()` and awaits
+    `wait_for_callback()`, which completes as soon as `/callback` is hit with that
+    state. One listener serves any number of concurrent flows.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 3030, path: str = "/callback"):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.server: asyncio.AbstractServer | None = None
+        self._pending: dict[str, asyncio.Future] = {}
+
+    @property
+    def redirect_uri(self) -> str:
+        return f"http://{self.host}:{self.port}{self.path}"
+
+    @property
+    def is_running(self) -> bool:
+        return self.server is not None
+
+    async def start(self) -> None:
+        """Start listening. Safe to call more than once."""
+        if self.server is not None:
+            return
+        try:
+            self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        except OSError as e:
+            if e.errno == 98:  # Address already in use
+                raise RuntimeError(f"Port {self.port} is already in use. Please try again or use a different port.") from e
+            raise
+        logging.debug(f"Started callback server on {self.redirect_uri}")
+
+    def expect(self, state: str) -> asyncio.Future:
+        """Register an in-flight authorization by its state and return the future it resolves."""
+        future = self._pending.get(state)
+        if future is None or future.done():
+            future = asyncio.get_running_loop().create_future()
+            self._pending[state] = future
+        return future
+
+    async def wait_for_callback(self, state: str, timeout: float = 300) -> tuple[str, str]:
+        """Wait for the callback carrying `state` and return (authorization code, state)."""
+        if self.server is None:
+            raise RuntimeError("Callback server is not running")
+        # The callback may already have arrived, e.g. when the authorization server redirects immediately
+        future = self._pending.get(state) or self.expect(state)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise Exception("Timeout waiting for OAuth callback") from None
+        finally:
+            self._pending.pop(state, None)
+
+    def cancel(self, state: str) -> None:
+        future = self._pending.pop(state, None)
+        if future and not future.done():
+            future.cancel()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = (await asyncio.wait_for(reader.readline(), 10)).decode("latin-1")
+            # Drain the headers, the request body is never needed
+            while (await asyncio.wait_for(reader.readline(), 10)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.split()
+            if len(parts) < 2 or parts[0] != "GET":
+                await self._respond(writer, 405, "Method not allowed")
+                return
+            status, message = self._dispatch(parts[1])
+            await self._respond(writer, status, message)
+        except Exception as e:
+            logging.debug(f"Callback connection error: {e}")
+        finally:
+            writer.close()
+
+    def _dispatch(self, target: str) -> tuple[int, str]:
+        """Route a callback to the flow that owns its state."""
+        logging.debug(f"Received callback: {target}")
+        parsed = urlparse(target)
+        if parsed.path != self.path:
+            return 404, "Not found"
+
+        query_params = parse_qs(parsed.query)
+        state = query_params.get("state", [None])[0]
+        future = self._pending.get(state) if state else None
+        if future is None or future.done():
+            return 400, "Unknown or missing state"
+
+        if "code" in query_params:
+            future.set_result((query_params["code"][0], state))
+            return 200, "Authorization complete"
+        if "error" in query_params:
+            future.set_exception(Exception(f"OAuth error: {query_params['error'][0]}"))
+            return 400, "Authorization failed"
+        return 400, "Missing authorization code"
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, message: str) -> None:
+        body = _PAGE.format(message=message).encode()
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}.get(status, "")
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: text/html\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+
+    def close(self) -> None:
+        """Stop accepting callbacks and cancel every pending flow."""
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+
+    async def stop(self) -> None:
+        server = self.server
+        self.close()
+        if server is not None:
+            await server.wait_closed()
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Optional
+
+from .tracing import Span, Telemetry
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import metrics, trace
+    from opentelemetry.trace import Status, StatusCode
+except ImportError:  # pragma: no cover - optional dependency
+    trace = None
+
+
+def _attribute_value(value: Any) -> Any:
+    # OpenTelemetry only accepts primitives and homogeneous sequences of them
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [str(v) for v in value]
+    return str(value)
+
+
+class _OtelSpan(Span):
+    __slots__ = ("_telemetry", "_name", "_span", "_token", "_start", "_attributes")
+
+    def __init__(self, telemetry: "OpenTelemetryTelemetry", name: str, attributes: dict[str, Any]) -> None:
+        self._telemetry = telemetry
+        # Non-recording spans (API only, or sampled out) have no `name`
+        self._name = name
+        self._span = telemetry.tracer.start_span(
+            name, attributes={k: _attribute_value(v) for k, v in attributes.items() if v is not None}
+        )
+        self._token = None
+        self._start = 0.0
+        self._attributes = attributes
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self._span.set_attribute(key, _attribute_value(value))
+
+    def record_error(self, error: BaseException) -> None:
+        self._span.record_exception(error)
+        self._span.set_status(Status(StatusCode.ERROR, str(error)))
+
+    def __enter__(self) -> "_OtelSpan":
+        self._token = otel_context.attach(trace.set_span_in_context(self._span))
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        super().__exit__(exc_type, exc, tb)
+        duration = time.perf_counter() - self._start
+        try:
+            otel_context.detach(self._token)
+        except ValueError:
+            # Spans around async generators may close in another context
+            pass
+        try:
+            self._span.end()
+            self._telemetry.record(f"{self._name}.duration", duration, **self._attributes)
+        except Exception as e:
+            # Exporting must never break the instrumented operation
+            logging.debug("Could not export span %s: %s", self._name, e)
+
+
+class OpenTelemetryTelemetry(Telemetry):
+    """
+    Exports spans and histograms through the OpenTelemetry API, using the globally
+    configured tracer and meter providers unless others are passed in. Requires the
+    `opentelemetry-api` package; exporters are set up by the application as usual.
+    """
+
+    enabled = True
+
+    def __init__(
+        self,
+        tracer_provider: Optional[Any] = None,
+        meter_provider: Optional[Any] = None,
+        name: str = "vianexus_agent_sdk",
+    ) -> None:
+        if trace is None:
+            raise ImportError("OpenTelemetryTelemetry requires the 'opentelemetry-api' package")
+        self.tracer = trace.get_tracer(name, tracer_provider=tracer_provider)
+        self.meter = metrics.get_meter(name, meter_provider=meter_provider)
+        self._histograms: dict[str, Any] = {}
+
+    def span(self, name: str, **attributes: Any) -> Span:
+        return _OtelSpan(self, name, attributes)
+
+    def record(self, metric: str, value: float, **attributes: Any) -> None:
+        histogram = self._histograms.get(metric)
+        if histogram is None:
+            unit = "s" if metric.endswith((".duration", "time_to_first_token")) else "1"
+            histogram = self._histograms[metric] = self.meter.create_histogram(metric, unit=unit)
+        # Only low-cardinality attributes (e.g. tool, model) belong on metrics
+        histogram.record(value, {k: _attribute_value(v) for k, v in attributes.items() if isinstance(v, (str, bool))})
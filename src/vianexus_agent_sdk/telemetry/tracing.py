@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import math
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+
+class Span:
+    """A timed operation. Attributes can be added while it runs."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc is not None:
+            self.record_error(exc)
+
+
+_NOOP_SPAN = Span()
+
+
+class Telemetry:
+    """
+    Instrumentation surface used throughout the SDK: spans with attributes and histograms.
+
+    This base class is the default and does nothing, so instrumented code costs one method
+    call per span. Check `enabled` before computing attributes that are expensive to get.
+    """
+
+    enabled = False
+
+    def span(self, name: str, **attributes: Any) -> Span:
+        return _NOOP_SPAN
+
+    def record(self, metric: str, value: float, **attributes: Any) -> None:
+        """Record a value in the histogram `metric` (durations in seconds)."""
+
+
+@dataclass
+class SpanRecord:
+    name: str
+    start: float
+    end: float = 0.0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class _RecordingSpan(Span):
+    __slots__ = ("_telemetry", "record")
+
+    def __init__(self, telemetry: "InMemoryTelemetry", record: SpanRecord) -> None:
+        self._telemetry = telemetry
+        self.record = record
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.record.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.record.error = f"{type(error).__name__}: {error}"
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        super().__exit__(exc_type, exc, tb)
+        self.record.end = time.perf_counter()
+        self._telemetry._finish(self.record)
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    index = max(0, math.ceil(q * len(ordered)) - 1)
+    return ordered[index]
+
+
+class InMemoryTelemetry(Telemetry):
+    """
+    Keeps the last `max_spans` finished spans and up to `max_samples` values per histogram
+    in memory, e.g. for tests, benchmarks or a debug endpoint. See `summary()`.
+    """
+
+    enabled = True
+
+    def __init__(self, max_spans: int = 10_000, max_samples: int = 10_000) -> None:
+        self.spans: deque[SpanRecord] = deque(maxlen=max_spans)
+        self.histograms: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=max_samples))
+
+    def span(self, name: str, **attributes: Any) -> Span:
+        record = SpanRecord(name=name, start=time.perf_counter(), attributes=attributes)
+        return _RecordingSpan(self, record)
+
+    def record(self, metric: str, value: float, **attributes: Any) -> None:
+        self.histograms[metric].append(value)
+
+    def _finish(self, record: SpanRecord) -> None:
+        self.spans.append(record)
+        self.record(f"{record.name}.duration", record.duration)
+
+    def find_spans(self, name: str) -> list[SpanRecord]:
+        return [s for s in self.spans if s.name == name]
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """count, mean, p50, p95, p99 and max of every histogram."""
+        result = {}
+        for metric, values in self.histograms.items():
+            if not values:
+                continue
+            samples = list(values)
+            result[metric] = {
+                "count": len(samples),
+                "mean": sum(samples) / len(samples),
+                "p50": _percentile(samples, 0.50),
+                "p95": _percentile(samples, 0.95),
+                "p99": _percentile(samples, 0.99),
+                "max": max(samples),
+            }
+        return result
+
+    def clear(self) -> None:
+        self.spans.clear()
+        self.histograms.clear()
+
+
+_telemetry: Telemetry = Telemetry()
+
+
+def get_telemetry() -> Telemetry:
+    """The process-wide telemetry backend, a no-op unless `set_telemetry` was called."""
+    return _telemetry
+
+
+def set_telemetry(telemetry: Optional[Telemetry]) -> Telemetry:
+    """Install a telemetry backend for the whole process. None restores the no-op default."""
+    global _telemetry
+    _telemetry = telemetry if telemetry is not None else Telemetry()
+    return _telemetry
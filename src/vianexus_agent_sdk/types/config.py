@@ -1,13 +1,117 @@
-from typing import TypedDict, Optional
+from typing import Any, TypedDict, Optional
+
+class ToolResultCacheConfig(TypedDict, total=False):
+    """Options for the tool result cache (see `ToolResultCache`)"""
+    ttls: dict[str, float]
+    default_ttl: Optional[float]
+    max_entries: int
+    max_bytes: int
+
+class HttpPoolConfig(TypedDict, total=False):
+    """Options for the shared HTTP connection pool (see `HttpClientPool`)"""
+    max_connections: int
+    max_keepalive_connections: int
+    keepalive_expiry: float
+    http2: bool
+
+class RateLimitConfig(TypedDict, total=False):
+    """Options for the rate governor (see `RateGovernor`)"""
+    # Name -> requests per minute, or {"per_minute": ..., "burst": ...}. "*" matches the rest
+    models: dict[str, Any]
+    servers: dict[str, Any]
+    max_retries: int
+    initial_backoff: float
+    max_backoff: float
+    adaptive: bool
+    breaker_threshold: int
+    breaker_reset: float
+
+class ToolCoalescingConfig(TypedDict, total=False):
+    """Options for coalescing tool calls (see `ToolCallCoalescer`)"""
+    window: float
+    max_batch: int
+    # Tool name -> {"tool": bulk tool, "argument": ..., "batch_argument": ..., "results": ...}
+    batch_tools: dict[str, Any]
+    share_inflight: bool
+
+class ConversationStoreConfig(TypedDict, total=False):
+    """Options for the conversation store (see `ConversationStore`)"""
+    memory_budget: Optional[int]
+    spill_path: Optional[str]
+    spill_threshold: int
+
+class ResponseCacheConfig(TypedDict, total=False):
+    """Options for the response cache (see `ResponseCache`)"""
+    backend: str  # "memory" or "sqlite"
+    path: Optional[str]
+    max_entries: int
+    ttls: dict[str, float]
+    default_ttl: Optional[float]
+    max_age: float
+    # Local embedding model, text -> vector
+    embedder: Optional[Any]
+    similarity: float
+
+class ModelRouteConfig(TypedDict, total=False):
+    """A model a `ModelRouter` can send queries to"""
+    name: str
+    provider: str  # "anthropic" or "gemini"
+    model: str
+    tier: str  # "fast" or "strong"
+    # USD per million tokens
+    input_cost: float
+    output_cost: float
+    cache_read_cost: Optional[float]
 
 class BaseConfig(TypedDict):
     """Base configuration for all clients"""
     server: str
     port: int
     software_statement: str
+    tool_cache_ttl: Optional[float] = 300.0
+    tool_result_cache: Optional[ToolResultCacheConfig] = None
+    tool_coalescing: Optional[ToolCoalescingConfig | bool] = None
+    token_storage: Optional[Any] = "memory"
+    token_storage_path: Optional[str] = None
+    token_encryption_key: Optional[str] = None
+    token_refresh_margin: Optional[float] = 60.0
+    http_pool: Optional[HttpPoolConfig] = None
+    reconnect: bool = True
+    resume_sessions: bool = True
+    max_reconnect_attempts: Optional[int] = None
+    reconnect_backoff: float = 0.5
+    reconnect_max_backoff: float = 30.0
+    reconnect_timeout: float = 60.0
+    idempotent_tools: Optional[list[str]] = None
+    tool_call_retries: int = 2
+    # Federation: server name -> config of that server (server, port, software_statement, ...)
+    servers: Optional[dict[str, Any]] = None
+    tool_namespace_separator: str = "__"
+    rate_limits: Optional[RateLimitConfig] = None
 
 class AnthropicConfig(BaseConfig):
     """Configuration specific to Anthropic client"""
     llm_api_key: str
     llm_model: Optional[str] = "claude-3-5-sonnet-20241022"
     max_tokens: Optional[int] = 1000
+    max_history_length: Optional[int] = 50
+    max_history_tokens: Optional[int] = 50_000
+    conversation_store: Optional[ConversationStoreConfig] = None
+    response_cache: Optional[ResponseCacheConfig] = None
+    history_keep_recent_turns: Optional[int] = 2
+    history_tool_result_chars: Optional[int] = 1_000
+    parallel_tool_calls: Optional[bool] = True
+    max_concurrent_tool_calls: Optional[int] = 8
+    tool_call_timeout: Optional[float] = None
+    early_tool_dispatch: Optional[bool] = False
+    prompt_caching: Optional[bool] = True
+    tool_result_max_chars: Optional[int] = 20_000
+    tool_result_limits: Optional[dict[str, Optional[int]]] = None
+    tool_payload_max_entries: Optional[int] = 256
+
+class RouterConfig(AnthropicConfig):
+    """Configuration of the model router, `llm_api_key` is the Anthropic key"""
+    routes: list[ModelRouteConfig]
+    idle_timeout: Optional[float] = 60.0
+    retries_before_failover: Optional[int] = 1
+    max_history_turns: Optional[int] = 10
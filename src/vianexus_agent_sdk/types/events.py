@@ -0,0 +1,68 @@
+from dataclasses import asdict, dataclass, field
+from typing import Any, ClassVar, Optional, Union
+
+
+@dataclass
+class TextDelta:
+    """A chunk of assistant text as it streams in"""
+    type: ClassVar[str] = "text_delta"
+    text: str
+
+
+@dataclass
+class ToolCallStart:
+    """The model requested a tool call"""
+    type: ClassVar[str] = "tool_call_start"
+    id: str
+    name: str
+    arguments: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class ToolResult:
+    """A tool call finished"""
+    type: ClassVar[str] = "tool_result"
+    id: str
+    name: str
+    content: Any = None
+    is_error: bool = False
+    # Set when the result was shortened for the model, see `get_tool_payload`
+    handle: Optional[str] = None
+
+
+@dataclass
+class Usage:
+    """Token usage of one model call"""
+    type: ClassVar[str] = "usage"
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    model: Optional[str] = None
+
+
+@dataclass
+class ModelSelected:
+    """A `ModelRouter` picked the model answering the query (again after a failover)"""
+    type: ClassVar[str] = "model_selected"
+    route: str
+    provider: str
+    model: str
+    reason: str = ""
+
+
+@dataclass
+class Final:
+    """The complete assistant answer, always the last event of a query"""
+    type: ClassVar[str] = "final"
+    text: str
+    # Served from the response cache
+    cached: bool = False
+
+
+AgentEvent = Union[TextDelta, ToolCallStart, ToolResult, Usage, ModelSelected, Final]
+
+
+def event_to_dict(event: AgentEvent) -> dict[str, Any]:
+    """Serialize an event, including its type, e.g. for server-sent events."""
+    return {"type": event.type, **asdict(event)}